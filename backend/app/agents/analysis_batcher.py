@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# takes a list of jobs, returns one result (or None if it failed) per job, in the same order
+BatchAnalyzer = Callable[[List[dict]], Awaitable[List[Optional[dict]]]]
+
+
+class AnalysisBatcher:
+    """
+    Groups the jobs coming from the concurrent URL runs into batches for the LLM
+
+    Every run `await submit(job)` and gets back its own result. A batch is sent
+    as soon as `batch_size` jobs are waiting, or `max_wait` seconds after the
+    first one arrived, whatever comes first (so the last few jobs don't hang).
+    """
+
+    def __init__(self, analyze_batch: BatchAnalyzer, batch_size: int, max_wait: float = 2.0):
+        self.analyze_batch = analyze_batch
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        # keep a reference to the running batches so they don't get garbage collected mid-flight
+        self._running = set()
+
+    async def submit(self, job: dict) -> Optional[dict]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((job, future))
+
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        self._flush()
+
+    def _flush(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        if self._pending and self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _run(self, batch: List[Tuple[dict, asyncio.Future]]):
+        jobs = [job for job, _ in batch]
+        logger.info(f"Analyzing a batch of {len(jobs)} jobs")
+        try:
+            results = await self.analyze_batch(jobs)
+        except Exception as e:
+            logger.exception(f"Batch analysis failed : {e}")
+            results = []
+
+        # whatever happened every job gets an answer, a missing one counts as failed
+        results = list(results) + [None] * (len(jobs) - len(results))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
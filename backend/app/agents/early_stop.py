@@ -0,0 +1,52 @@
+from typing import Optional
+
+from config import SCRUTINIZER_STOP_AFTER_MISSES, SCRUTINIZER_STOP_AFTER_STRONG_MATCHES, SCRUTINIZER_STRONG_MATCH_RANK
+
+
+class EarlyStop:
+    """
+    When the scrutinizer has seen enough of the (score ordered) URLs to stop scraping the rest
+
+    - `strong_matches` jobs ranked `strong_rank` or better -> the user has plenty to look at
+    - `max_misses` URLs in a row without a match -> the lower scored URLs won't do better
+    0 turns a condition off. The URLs finish in any order (several run at once), "in a row" is
+    in the order they finish. The ones already running when it stops still go through.
+    """
+
+    def __init__(self, strong_matches: Optional[int] = None, strong_rank: Optional[int] = None, max_misses: Optional[int] = None):
+        self.strong_matches = SCRUTINIZER_STOP_AFTER_STRONG_MATCHES if strong_matches is None else strong_matches
+        self.strong_rank = SCRUTINIZER_STRONG_MATCH_RANK if strong_rank is None else strong_rank
+        self.max_misses = SCRUTINIZER_STOP_AFTER_MISSES if max_misses is None else max_misses
+
+        self.strong = 0
+        self.misses_in_a_row = 0
+        self.reason: Optional[str] = None
+        self.skipped = 0
+
+    def observe(self, analyzed_job: Optional[dict]):
+        "the outcome of one URL, the analyzed job when it matched the user or None"
+        if analyzed_job is None:
+            self.misses_in_a_row += 1
+        else:
+            self.misses_in_a_row = 0
+            if (analyzed_job.get("agent_recommendation_rank") or 0) >= self.strong_rank:
+                self.strong += 1
+
+        if self.reason is not None:
+            return
+        if self.strong_matches and self.strong >= self.strong_matches:
+            self.reason = f"{self.strong} jobs ranked {self.strong_rank}+"
+        elif self.max_misses and self.misses_in_a_row >= self.max_misses:
+            self.reason = f"{self.misses_in_a_row} URLs in a row without a match"
+
+    @property
+    def stopped(self) -> bool:
+        return self.reason is not None
+
+    def stats(self) -> dict:
+        return {
+            "strong_matches": self.strong,
+            "misses_in_a_row": self.misses_in_a_row,
+            "stopped": self.reason,
+            "skipped_urls": self.skipped,
+        }
@@ -0,0 +1,246 @@
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from dateutil import parser as date_parser
+
+from app.models import ExtractedJob
+from app.tools.urls import detect_platform
+from config import PREFILTER_MAX_POSTING_AGE_DAYS
+
+
+# the most years of experience we still consider for each level (on top of what the user told us)
+LEVEL_MAX_YEARS = {
+    "fresh": 1,
+    "junior": 3,
+    "mid": 6,
+}
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+RELATIVE_DATE_RE = re.compile(r"(\d+|an?|one)\+?\s*(minute|hour|day|week|month|year)s?\s+ago")
+UNIT_DAYS = {"minute": 0, "hour": 0, "day": 1, "week": 7, "month": 30, "year": 365}
+
+# only strings that actually look like a date get parsed ("Over 100 applicants" isn't one)
+MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+DATE_RE = re.compile(
+    r"\d{4}-\d{1,2}-\d{1,2}(?:t[\d:.]+(?:z|[+-]\d{2}:?\d{2})?)?"
+    r"|(?P<first>\d{1,2})(?P<sep>[/.])(?P<second>\d{1,2})(?P=sep)\d{2,4}"
+    r"|\b" + MONTHS + r"\s+\d{1,2}(?:st|nd|rd|th)?\b(?:,?\s+\d{4})?"
+    r"|\b\d{1,2}(?:st|nd|rd|th)?\s+" + MONTHS + r"(?:,?\s+\d{4})?"
+)
+# the boards that write numeric dates day first (01/10/2025 is the 1st of October there)
+DAY_FIRST_PLATFORMS = {"Wuzzuf"}
+# anything older than that is a date we parsed wrong (or a posting nobody should apply to anyway)
+MAX_PLAUSIBLE_AGE_DAYS = 730
+
+YEARS_RE = re.compile(r"\d+(?:\.\d+)?|\b(?:" + "|".join(NUMBER_WORDS) + r")\b")
+
+LOCATION_FIELD_RE = re.compile(r"\blocation\s*[:\-]\s*([^\n;|]+)", re.IGNORECASE)
+
+# the usual short forms, expanded before the locations get compared
+LOCATION_ALIASES = {
+    "nyc": "new york", "ny": "new york", "sf": "san francisco", "la": "los angeles",
+    "us": "united states", "usa": "united states", "uk": "united kingdom", "gb": "united kingdom",
+    "uae": "united arab emirates", "ksa": "saudi arabia", "dc": "washington",
+}
+# a location made of these covers many cities / countries, we can't tell a mismatch from it
+REGION_WORDS = {
+    "remote", "anywhere", "worldwide", "global", "international", "hybrid",
+    "eu", "europe", "emea", "apac", "latam", "mena", "gcc", "gulf", "africa", "asia", "americas", "middle",
+}
+LOCATION_STOPWORDS = {"the", "of", "and", "city", "area", "greater", "metropolitan", "region", "office", "on", "site", "onsite", "in"}
+
+
+def location_tokens(location: str) -> Set[str]:
+    "the words of a location ('Cairo, Egypt' -> {'cairo', 'egypt'}, 'NYC' -> {'new', 'york'})"
+    tokens = set()
+    for word in re.findall(r"[^\W\d_]+", location.casefold()):
+        word = LOCATION_ALIASES.get(word, word)
+        tokens.update(part for part in word.split() if len(part) > 1 and part not in LOCATION_STOPWORDS)
+    return tokens
+
+
+def _as_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value]
+
+
+def parse_posting_age_days(posting_date: str, now: Optional[datetime] = None, dayfirst: Optional[bool] = None) -> Optional[int]:
+    """
+    How old a posting is in days, from whatever format the scraper gave us
+    ("3 days ago", "30+ days ago", "2025-08-01", "Aug 1, 2025", "today", ...)
+    None if we can't tell (those are never rejected)
+
+    dayfirst is how the board writes numeric dates (01/10/2025), None when we don't know:
+    then a date that reads as two different days is None too. dd.mm.yyyy is always day first.
+    """
+    now = now or datetime.now()
+    text = (posting_date or "").strip().casefold()
+    if not text:
+        return None
+
+    if "just now" in text or "today" in text or "just posted" in text:
+        return 0
+    if "yesterday" in text:
+        return 1
+
+    match = RELATIVE_DATE_RE.search(text)
+    if match:
+        amount, unit = match.groups()
+        amount = int(amount) if amount.isdigit() else 1
+        return amount * UNIT_DAYS[unit]
+
+    match = DATE_RE.search(text)
+    if not match:
+        return None
+    if match.group("sep") == ".":
+        dayfirst = True
+    elif match.group("sep") and dayfirst is None:
+        first, second = int(match.group("first")), int(match.group("second"))
+        if first <= 12 and second <= 12 and first != second:
+            return None
+    try:
+        posted = date_parser.parse(match.group(0), dayfirst=bool(dayfirst), default=now.replace(hour=0, minute=0, second=0, microsecond=0))
+    except (ValueError, OverflowError):
+        return None
+
+    posted = posted.replace(tzinfo=None)
+    if posted > now + timedelta(days=1) or (now - posted).days > MAX_PLAUSIBLE_AGE_DAYS:
+        # a date in the future / years back means we parsed it wrong
+        return None
+    return max(0, (now - posted).days)
+
+
+def parse_required_years(required_years: str) -> Optional[float]:
+    "the minimum years of experience asked for ('3+ years' -> 3, '2-4 years' -> 2), None if not specified"
+    text = (required_years or "").casefold()
+    match = YEARS_RE.search(text)
+    if not match:
+        return None
+    value = match.group(0)
+    return float(NUMBER_WORDS.get(value, value))
+
+
+class JobPrefilter:
+    """
+    Cheap deterministic checks that run before the LLM analysis
+
+    Only rejects the clear mismatches (the LLM still makes the final call), anything
+    we can't parse is let through. `check` returns the reason of the rejection or None.
+    Keeps counters of what it rejected, each rejection is an LLM call saved.
+    """
+
+    def __init__(self, user_input: dict, max_posting_age_days: Optional[int] = None):
+        self.max_posting_age_days = max_posting_age_days or PREFILTER_MAX_POSTING_AGE_DAYS
+
+        level = (user_input.get("experience_level") or "").strip().casefold()
+        try:
+            user_years = int(user_input.get("min_years_experience") or 0)
+        except (TypeError, ValueError):
+            user_years = 0
+        level_max = LEVEL_MAX_YEARS.get(level)
+        # Senior/Lead (or unknown levels) -> no cap on the experience
+        self.max_required_years = None if level_max is None else max(level_max, user_years + 2)
+
+        self.remote_preference = {pref.strip().casefold() for pref in _as_list(user_input.get("remote_preference"))}
+        self.locations = [location.strip().casefold() for location in _as_list(user_input.get("locations")) if location.strip()]
+        self.location_tokens = [location_tokens(location) for location in self.locations]
+        self.job_types = {job_type.strip().casefold().replace(" ", "-") for job_type in _as_list(user_input.get("job_type"))}
+
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.rejected = Counter()
+
+    def _check_age(self, job: ExtractedJob) -> Optional[str]:
+        age = parse_posting_age_days(job.posting_date, dayfirst=detect_platform(job.job_url) in DAY_FIRST_PLATFORMS or None)
+        if age is not None and age > self.max_posting_age_days:
+            return f"posted {age} days ago (max {self.max_posting_age_days})"
+        return None
+
+    def _check_experience(self, job: ExtractedJob) -> Optional[str]:
+        if self.max_required_years is None:
+            return None
+        required = parse_required_years(job.required_years_of_experience)
+        if required is not None and required > self.max_required_years:
+            return f"requires {required:g} years of experience (max {self.max_required_years})"
+        return None
+
+    def _check_remote(self, job: ExtractedJob) -> Optional[str]:
+        # only a remote-only user gets onsite-only postings rejected
+        if self.remote_preference != {"remote"}:
+            return None
+        text = f"{job.job_title} {job.job_description}".casefold()
+        is_remote = re.search(r"\bremote\b", text) is not None
+        is_hybrid = re.search(r"\bhybrid\b", text) is not None
+        is_onsite = re.search(r"\bon-?site\b|\bin[- ]office\b", text) is not None
+        if is_onsite and not is_remote and not is_hybrid:
+            return "onsite only, the user wants remote"
+        return None
+
+    def _check_location(self, job: ExtractedJob) -> Optional[str]:
+        # only when the posting has an explicit "Location: ..." line, otherwise we can't tell
+        if not self.locations:
+            return None
+        match = LOCATION_FIELD_RE.search(job.job_description)
+        if not match:
+            return None
+        location = match.group(1).casefold()
+        # a remote job is fine wherever the company is, as long as the user takes remote jobs
+        is_remote = "remote" in location or re.search(r"\bremote\b", job.job_description.casefold())
+        if is_remote and self.remote_preference & {"remote", "any"}:
+            return None
+        # only a clear mismatch gets rejected: city / country words on both sides and none in common
+        posting_tokens = location_tokens(location)
+        if not posting_tokens or posting_tokens & REGION_WORDS:
+            return None
+        for wanted in self.location_tokens:
+            if not wanted or wanted & REGION_WORDS or wanted & posting_tokens:
+                return None
+        return f"located in '{match.group(1).strip()}'"
+
+    def _check_job_type(self, job: ExtractedJob) -> Optional[str]:
+        if not self.job_types:
+            return None
+        title = job.job_title.casefold()
+        if re.search(r"\bintern(ship)?\b", title) and "internship" not in self.job_types:
+            return "internship, the user wants " + "/".join(sorted(self.job_types))
+        if re.search(r"\bpart[- ]time\b", title) and "part-time" not in self.job_types:
+            return "part-time, the user wants " + "/".join(sorted(self.job_types))
+        return None
+
+    def check(self, job: ExtractedJob) -> Optional[str]:
+        "None if the job should go to the LLM, the reason it got rejected otherwise"
+        reason = None
+        for rule, check in (
+            ("too_old", self._check_age),
+            ("experience", self._check_experience),
+            ("remote", self._check_remote),
+            ("location", self._check_location),
+            ("job_type", self._check_job_type),
+        ):
+            reason = check(job)
+            if reason:
+                break
+
+        with self._lock:
+            self.checked += 1
+            if reason:
+                self.rejected[rule] += 1
+        return reason
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "llm_calls_saved": sum(self.rejected.values()),
+                "rejected_by_rule": dict(self.rejected),
+            }
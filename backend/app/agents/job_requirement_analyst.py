@@ -1,7 +1,6 @@
 from crewai import Task, Agent
 from pydantic import BaseModel, Field
 from typing import List, Optional
-import os
 
 from app.clients import get_llm_main
 from datetime import datetime
@@ -81,7 +80,6 @@ class JobRequirementAnalyst:
             description=description,
             expected_output="A JSON object containing structured job requirements and optimized search queries.",
             output_json=JobSearchCriteria,
-            output_file=os.path.join(f"./results/{self.user_id}/", "step_1_job_requirements_analysis.json"),
             agent=self.agent,
         )
         return self.task
@@ -1,20 +1,36 @@
-import json
+import asyncio
 import logging
-import os
+import threading
 from typing import Optional, TypedDict , List
 from langgraph.graph import StateGraph , START , END
 
 from langsmith import traceable
-
+from pydantic import ValidationError
+
+from app.agents.analysis_batcher import AnalysisBatcher
+from app.agents.early_stop import EarlyStop
+from app.agents.job_prefilter import JobPrefilter
+from app.agents.llm_json import parse_json_response
+from app.agents.report_generator_agent import IncrementalReport
+from app.agents.scrutinizer_prompt import ScrutinizerPrompt
+from app.agents.search_agent import AllJobSearchResults
+from app.checkpoints import get_graph_checkpointer
 from app.clients import get_LangGraph_model
+from app.metrics import observe_node, record_llm_response, record_llm_tokens, record_skip
+from app.results_store import STEP_2_SEARCH_RESULTS, STEP_3_JOBS, get_results_writer
 from app.tools.scraping_tool import web_scraping_firecrawl
-from app.models import ExtractedJob , SingleJobData
-from config import CONFIG
+from app.tools.urls import canonicalize_url, dedupe_urls
+from app.models import AllExtractedData, ExtractedJob , SingleJobData
+from config import CONFIG, SCRUTINIZER_MAX_CONCURRENCY, ANALYSIS_BATCH_SIZE, ANALYSIS_BATCH_MAX_WAIT_SECONDS, PREFILTER_ENABLED, CHECKPOINTS_ENABLED
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# what the LLM has to answer with (a single job / a batch), for the providers JSON modes
+SINGLE_JOB_SCHEMA = SingleJobData.model_json_schema()
+BATCH_SCHEMA = AllExtractedData.model_json_schema()
+
 # Graph State
 class GraphState(TypedDict):
 
@@ -35,16 +51,35 @@ class GraphState(TypedDict):
 class JobScrutinizerLangGraph():
 
 
-    def __init__(self , user_id , user_input):
+    def __init__(self , user_id , user_input , max_concurrency=None , batch_size=None):
         
         self.user_id = user_id
         self.user_input = user_input
         self.model = get_LangGraph_model()
-        self.sys_prompt = self._sys_prompt()
+        # the llm_analysis_node prompts: static instructions first, job descriptions condensed to a token budget
+        self.prompt = ScrutinizerPrompt(user_input)
+        self.max_concurrency = max(1, max_concurrency or SCRUTINIZER_MAX_CONCURRENCY)
         self.saved_jobs = []
         self.final_status = False
         self.scrapped_urls = set()
+        # the sync nodes run in LangGraph's thread pool so several URLs can hit
+        # saved_jobs / scrapped_urls at the same time -> guard them with a lock
+        self._lock = threading.Lock()
+        # batch_size > 1 -> several scraped jobs get scored in one LLM call
+        self.batch_size = max(1, batch_size or ANALYSIS_BATCH_SIZE)
+        self.batcher = AnalysisBatcher(self._analyze_batch, self.batch_size, ANALYSIS_BATCH_MAX_WAIT_SECONDS) if self.batch_size > 1 else None
+        # cheap rule based checks that reject the clear mismatches before they reach the LLM
+        self.prefilter = JobPrefilter(user_input) if PREFILTER_ENABLED else None
+        # stops scraping the remaining URLs once there are enough strong matches / too many misses in a row
+        self.early_stop = EarlyStop()
+        # the report rows get rendered as the jobs come in, not all at the end
+        self.report = IncrementalReport()
         self.graph = self.build_graph()
+        # the LangGraph threads (one per URL) this run checkpointed, see scrutinize_jobs
+        self.checkpointed = False
+        self._thread_ids = []
+        # canonical URL -> ExtractedJob of the postings taken from the job index (no scrape needed)
+        self.indexed_jobs = {}
 
     # Start
 
@@ -101,124 +136,70 @@ class JobScrutinizerLangGraph():
   
 
 
-    def _sys_prompt(self):
-
-        sys_prompt = "".join([
-                        "You are an expert Job Scrutinizer with deep knowledge of job markets and technical roles.\n\n",
-                        
-                        "## YOUR ROLE\n",
-                        "- You receive job data in the ExtractedJob schema.\n",
-                        "- You must evaluate whether it matches the user's requirements.\n\n",
-                        
-                        "## INPUT FORMAT\n",
-                        "You will receive data in this schema:\n",
-                        "- job_title: string\n",
-                        "- job_description: string\n",
-                        "- job_url: string\n",
-                        "- posting_date: string\n",
-                        "- required_years_of_experience: string\n\n",
-                        
-                        "## RULES\n",
-                        "- If the provided data is literally the string 'none', you must return a valid SingleJobData object with matches_user_req=false.\n",
-                        "- If the job data does not meet user requirements, set matches_user_req=false.\n",
-                        "- If it meets user requirements, set matches_user_req=true.\n",
-                        "- Always use the job_url from the provided ExtractedJob.\n",
-                        "- If job_title or description is missing or invalid, treat it as not matching user requirements.\n\n",
-                        
-                        "## ANALYSIS CRITERIA\n",
-                        f"- Compare job description, posting date, required experience, and technologies against user requirements: {self.user_input}\n",
-                        "- If job is older than 3 months, it does not match.\n",
-                        "- If required years of experience exceed user background, it does not match.\n",
-                        "- If technology/domain does not align, it does not match.\n\n",
-                        
-                        "## OUTPUT FORMAT\n",
-                        "- You must return a valid JSON object following this schema:\n",
-                        "  {\n",
-                        "    'matches_user_req': bool,\n",
-                        "    'job_title': str,\n",
-                        "    'job_description': str,\n",
-                        "    'job_url': str,\n",
-                        "    'agent_recommendation_rank': int (1–5),\n",
-                        "    'agent_recommendation_notes': list of strings\n",
-                        "  }\n\n",
-                        "- Do not output a list. Return only a single JSON object.\n",
-                        "- Do not include markdown, code blocks, or extra text.\n\n",
-                        
-                        "## RANKING GUIDELINES\n",
-                        "- 5: Excellent match, strong alignment\n",
-                        "- 4: Very good, minor gaps\n",
-                        "- 3: Good, some gaps\n",
-                        "- 2: Fair, significant gaps\n",
-                        "- 1: Poor, major mismatch\n\n",
-                        
-                        "## CRITICAL NOTES\n",
-                        "- If input == 'none', output must still follow SingleJobData with matches_user_req=false.\n",
-                        "- Double-check JSON validity before responding.\n",
-                        "- Never include commentary or explanations outside the JSON object.\n"
-                    ])
-        
-        return sys_prompt
-
-
     # get_urls node
     @traceable
-    def get_urls(self):
+    def get_urls(self, search_results : Optional[AllJobSearchResults] = None):
 
         """
-        Read job URLs from step 2 results JSON file
-        
+        The job URLs from the step 2 (search) results
+
+        Args:
+            search_results: the search stage output handed over in memory, if it's missing
+                the persisted step 2 results of this run get loaded from the results store
+
         Returns:
-            List[str]: List of job URLs extracted from step 2 results
+            List[str]: List of job URLs extracted from step 2 results, best search score first
+            (that's the order they get scraped in), without the ones pointing to the same posting
+            (so we don't pay Firecrawl twice for it)
         """
-        step2_file = os.path.join(f"./results/{self.user_id}/", "step_2_job_search_results.json")
-        
-        try:
-            with open(step2_file, 'r') as f:
-                step2_data = json.load(f)
-            
-            # Extract URLs from the step 2 results
-            # Assuming the structure has job URLs in the data
-            urls = []
-            if isinstance(step2_data, dict):
-                
-                if 'results' in step2_data:
-                    for result in step2_data['results']:
-                        if 'url' in result:
-                            urls.append(result['url'])
-                        elif 'link' in result:
-                            urls.append(result['link'])
-            
-            return urls
-            
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Step 2 results file not found: {step2_file}")
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON in step 2 results file: {step2_file}")
+        if search_results is None:
+            step2_data = get_results_writer().load_step(self.user_id, STEP_2_SEARCH_RESULTS)
+            if step2_data is None:
+                raise FileNotFoundError(f"No step 2 results for {self.user_id}")
+            search_results = AllJobSearchResults.model_validate(step2_data)
+
+        # sorted is stable, the same scores keep the order the search gave them
+        ranked = sorted(search_results.results, key=lambda result: result.score, reverse=True)
+        urls = [result.url for result in ranked]
+
+        unique_urls = dedupe_urls(urls)
+        if len(unique_urls) < len(urls):
+            logger.info(f"Dropped {len(urls) - len(unique_urls)} duplicate URLs before scraping")
+        return unique_urls
 
     # scraping node
     @traceable(name="scraping_node")
-    def scraping_node(self , state : GraphState):
+    @observe_node("scraping_node")
+    async def scraping_node(self , state : GraphState):
         " a node used for scraping the URLs provided by the prev agent"
         url = state.get("current_url")
         if not url:
             logger.info("Couldn't find the URL Scraping failed.")
             return {"scraping_status" : False}
 
-    
-        result = web_scraping_firecrawl(tool_input=url)
+        result = self.indexed_jobs.get(canonicalize_url(url))
+        if result is not None:
+            logger.info(f"Taking {url} from the job index")
+        else:
+            # async so waiting on the Firecrawl rate limiter doesn't hold a thread (or the event loop)
+            result = await web_scraping_firecrawl.ainvoke(url)
         
         if result:
 
             logger.info("Scraping successful.")
-            # to avoid duplicates
-            if result.get("job_url"," ") in self.scrapped_urls:
-                logger.info("skipping a duplicate URL")
-                return {"scraping_status" : False}
-            
-            self.scrapped_urls.add(result.get("job_url"))
+            # to avoid duplicates (check + add has to be atomic between concurrent URLs)
+            job_url = canonicalize_url(result.get("job_url") or url)
+            with self._lock:
+                if job_url in self.scrapped_urls:
+                    logger.info("skipping a duplicate URL")
+                    record_skip("duplicate")
+                    return {"scraping_status" : False}
+                
+                self.scrapped_urls.add(job_url)
             return {"current_job": result, "scraping_status": True}
         else:
             logger.info("Scraping failed.")
+            record_skip("scrape_failed")
             return {"scraping_status" : False}
         
         
@@ -243,6 +224,7 @@ class JobScrutinizerLangGraph():
 
     # filtering node
     @traceable(name="filtering_node")
+    @observe_node("filtering_node")
     def filtering_node(self , state : GraphState):
 
         logger.info("--- Entering the filtering Node ---")
@@ -251,11 +233,20 @@ class JobScrutinizerLangGraph():
             if state.get("current_job") is not None:
                 curr_job = state.get("current_job")
                 filtering = ExtractedJob(**curr_job)
+
+                if self.prefilter is not None:
+                    reason = self.prefilter.check(filtering)
+                    if reason:
+                        logger.info(f"Prefilter rejected {filtering.job_url} : {reason}")
+                        record_skip("prefiltered")
+                        return {'filtering_status' : False}
+
                 return {'filtering_status' : True}
                 
 
         except Exception as e:
             logger.exception(f"Failed to filter the scraped results in the filtering node : {e}")
+            record_skip("invalid")
             return {
                 'filtering_status' : False
             }
@@ -269,8 +260,103 @@ class JobScrutinizerLangGraph():
         else:
             return "skip_url"
         
+    async def _analyze_job(self, current_job : dict) -> Optional[dict]:
+        "send a single job to the LLM, returns the analyzed job or None if the response couldn't be parsed"
+
+        prompt, prompt_tokens = self.prompt.single(current_job)
+        logger.info(f"LLM analysis prompt: {prompt_tokens} tokens")
+
+        # through the LLM router (it records every attempt per provider), in the providers JSON mode
+        response = await self.model.ainvoke(prompt, json_schema=SINGLE_JOB_SCHEMA)
+        record_llm_tokens("single", prompt_tokens, response)
+        
+        # Extract the content from the response
+        if hasattr(response, 'content'):
+            analysis_result = response.content
+        else:
+            analysis_result = str(response)
+        
+        logger.info(f"LLM Analysis completed: {analysis_result[:100]}...")
+        
+        # Try to parse the JSON response (repairing it if it came in a code fence / with some prose)
+        try:
+            parsed, repaired = parse_json_response(analysis_result)
+            if isinstance(parsed, list) and len(parsed) == 1:
+                # a list of the one object we asked for
+                parsed, repaired = parsed[0], True
+            analyzed_job = SingleJobData.model_validate(parsed).model_dump()
+        except (ValueError, ValidationError) as e:
+            record_llm_response("wasted")
+            logger.error(f"Failed to parse LLM response as JSON: {e}")
+            logger.error(f"Raw response: {analysis_result}")
+            return None
+
+        record_llm_response("repaired" if repaired else "valid")
+        return analyzed_job
+
+
+    async def _analyze_batch(self, jobs : List[dict]) -> List[Optional[dict]]:
+        """
+        analyze several jobs with a single LLM call
+
+        every item of the response is validated on its own against SingleJobData,
+        only the jobs whose item is missing or invalid get re-analyzed one by one
+        """
+        results : List[Optional[dict]] = [None] * len(jobs)
+
+        try:
+            prompt, prompt_tokens = self.prompt.batch(jobs)
+            logger.info(f"LLM batch analysis prompt: {len(jobs)} jobs, {prompt_tokens} tokens")
+            response = await self.model.ainvoke(prompt, json_schema=BATCH_SCHEMA)
+            record_llm_tokens("batch", prompt_tokens, response)
+            content = response.content if hasattr(response, 'content') else str(response)
+            logger.info(f"LLM batch analysis completed: {content[:100]}...")
+
+            try:
+                parsed, repaired = parse_json_response(content)
+            except ValueError:
+                # the whole batch goes to the single job fallback below
+                record_llm_response("wasted")
+                raise
+            record_llm_response("repaired" if repaired else "valid")
+            items = parsed.get("jobs", []) if isinstance(parsed, dict) else parsed
+            if not isinstance(items, list):
+                items = []
+            by_url = {item.get("job_url") : item for item in items if isinstance(item, dict)}
+
+            for i, job in enumerate(jobs):
+                # match by URL first, the model doesn't always keep the order
+                item = by_url.get(job.get("job_url"))
+                if item is None and i < len(items):
+                    item = items[i]
+                if item is None:
+                    logger.error(f"No batch item for {job.get('job_url')}")
+                    continue
+                try:
+                    results[i] = SingleJobData.model_validate(item).model_dump()
+                except Exception as e:
+                    logger.error(f"Invalid batch item for {job.get('job_url')} : {e}")
+
+        except Exception as e:
+            logger.exception(f"Failed in LLM batch analysis : {e}")
+
+        # fall back to the single job analysis for whatever failed
+        failed = [i for i, result in enumerate(results) if result is None]
+        if failed:
+            logger.info(f"Falling back to single job analysis for {len(failed)} of {len(jobs)} jobs")
+            retries = await asyncio.gather(*(self._analyze_job(jobs[i]) for i in failed), return_exceptions=True)
+            for i, retry in zip(failed, retries):
+                if isinstance(retry, Exception):
+                    logger.error(f"Single job analysis failed for {jobs[i].get('job_url')} : {retry}")
+                else:
+                    results[i] = retry
+
+        return results
+
+
     @traceable(name="llm_analysis_node")
-    def llm_analysis_node(self , state : GraphState):
+    @observe_node("llm_analysis_node")
+    async def llm_analysis_node(self , state : GraphState):
         "a node to get the analysis of the LLM"
         
         logger.info("--- Entering the LLM Analysis Node ---")
@@ -281,52 +367,34 @@ class JobScrutinizerLangGraph():
                 logger.error("No current job data available for analysis")
                 return {"analysis_status": False}
             
-            # Prepare the job data for analysis
-            job_data_str = json.dumps(current_job, indent=2)
-            
-            # Create the prompt for analysis
-            prompt = f"""
-            {self.sys_prompt}
-            
-            Job Data to Analyze:
-            {job_data_str}
-            """
-            
-            # Use the ChatNVIDIA model
-            response = self.model.invoke(prompt)
-            
-            # Extract the content from the response
-            if hasattr(response, 'content'):
-                analysis_result = response.content
+            # with batching on the job waits for a few others and they all go in one prompt
+            if self.batcher is not None:
+                analyzed_job = await self.batcher.submit(current_job)
             else:
-                analysis_result = str(response)
-            
-            logger.info(f"LLM Analysis completed: {analysis_result[:100]}...")
-            
-            # Try to parse the JSON response
-            try:
-                analyzed_job = json.loads(analysis_result)
-                if analyzed_job['matches_user_req']:
-
-                    logger.info(f"extracted job :{analyzed_job}")
-                    return {
-                        "analyzed_job": analyzed_job,
-                        "analysis_status": True
-                    }
-                else:
-                    logger.error("The Job was invalid as per the LLM analysis")
-                    return {
-                        "analyzed_job" : None,
-                        "analysis_status" : False
-                    }
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse LLM response as JSON: {e}")
-                logger.error(f"Raw response: {analysis_result}")
+                analyzed_job = await self._analyze_job(current_job)
+
+            if analyzed_job is None:
+                record_skip("analysis_failed")
                 return {"analysis_status": False}
+
+            if analyzed_job['matches_user_req']:
+
+                logger.info(f"extracted job :{analyzed_job}")
+                return {
+                    "analyzed_job": analyzed_job,
+                    "analysis_status": True
+                }
+            else:
+                logger.error("The Job was invalid as per the LLM analysis")
+                record_skip("not_a_match")
+                return {
+                    "analyzed_job" : None,
+                    "analysis_status" : False
+                }
                 
         except Exception as e:
             logger.exception(f"Failed in LLM analysis node: {e}")
+            record_skip("analysis_failed")
             return {"analysis_status": False}
 
     # Conditional Node for the user reqs
@@ -343,69 +411,112 @@ class JobScrutinizerLangGraph():
     @traceable(name="collect_valid_jobs")
     def collect_valid_jobs(self , state : GraphState):
         job = state.get("analyzed_job")
-        return self.saved_jobs.append(job)
+        with self._lock:
+            self.saved_jobs.append(job)
+            self.report.add(job)
+        return {}
     
 
     # Save results
     @traceable
     def _save_results(self, jobs_list):
         """
-        Save the list of job results to a JSON file
-        
+        Persist the list of job results (in the background, nothing waits for it)
+
         Args:
             jobs_list: List of job dictionaries to save
-            
-        Returns:
-            bool: True if saved successfully, False otherwise
         """
-        output_dir = f"./results/{self.user_id}/"
-        os.makedirs(output_dir, exist_ok=True)
-
-        output_file = os.path.join(output_dir, "step_3_job_scrutinizer_results.json")
-
-        try:
-            
-            final_result = {
-                "jobs": jobs_list
-            }
-            
-            
-            # Save to file
-            with open(output_file, 'w') as f:
-                json.dump(final_result, f, indent=2)
-            
-            # # Validate the saved data by creating AllExtractedData instance
-            # validated_data = AllExtractedData(**final_result)
-            print(f"Successfully saved {len(jobs_list)} jobs to {output_file}")
-            return True
-            
-        except Exception as e:
-            print(f"Error saving results: {str(e)}")
-            # Save raw data for debugging
-            debug_file = output_file.replace('.json', '_debug.json')
+        get_results_writer().save_step(self.user_id, STEP_3_JOBS, {"jobs": jobs_list})
+        print(f"Saving {len(jobs_list)} jobs for {self.user_id}")
+
+
+    def thread_config(self, url) -> dict:
+        "every URL of a run gets its own checkpointed LangGraph thread"
+        return {"configurable": {"thread_id": f"{self.user_id}|{url}"}}
+
+    def _restore_finished_url(self, values : dict):
+        "a URL that went all the way through the graph before a restart, just take its outcome back"
+        current_job = values.get("current_job")
+        if values.get("scraping_status") and current_job:
+            with self._lock:
+                self.scrapped_urls.add(canonicalize_url(current_job.get("job_url") or values.get("current_url")))
+        if values.get("analysis_status") and values.get("analyzed_job"):
+            self.collect_valid_jobs(values)
+
+    @staticmethod
+    def _matched_job(values) -> Optional[dict]:
+        "the analyzed job of a URL that went through the graph, None when it didn't match (or got skipped)"
+        if values and values.get("analysis_status"):
+            return values.get("analyzed_job")
+        return None
+
+    async def _process_url(self, url, semaphore : asyncio.Semaphore):
+        "run a single URL through the graph, at most max_concurrency of these run at once"
+
+        async with semaphore:
+            # the URLs get the semaphore in score order, once it's stopped the rest are the weaker ones
+            if self.early_stop.stopped:
+                self.early_stop.skipped += 1
+                record_skip("early_stop")
+                return
+
+            logger.info(f"Processing URL : {url}")
+            initial_state = {"current_url": url}
+            config = self.thread_config(url)
+            final_state = None
             try:
-                with open(debug_file, 'w') as f:
-                    json.dump({"error": str(e), "jobs_list": jobs_list}, f, indent=2)
-                print(f"Debug data saved to {debug_file}")
-            except Exception as debug_e:
-                print(f"Could not save debug file: {debug_e}")
-            return False
+                if self.checkpointed:
+                    self._thread_ids.append(config["configurable"]["thread_id"])
+                    snapshot = await self.graph.aget_state(config)
+                    if snapshot.values and not snapshot.next:
+                        logger.info(f"URL already processed before the restart : {url}")
+                        self._restore_finished_url(snapshot.values)
+                        final_state = snapshot.values
+                        return
+                    if snapshot.next:
+                        # died halfway -> carry on from the last finished node (the scrape / analysis isn't paid twice)
+                        logger.info(f"Resuming URL {url} at {snapshot.next}")
+                        current_job = snapshot.values.get("current_job")
+                        if current_job:
+                            with self._lock:
+                                self.scrapped_urls.add(canonicalize_url(current_job.get("job_url") or url))
+                        final_state = await self.graph.ainvoke(None, config)
+                        return
+
+                final_state = await self.graph.ainvoke(initial_state, config)
+            except Exception as e:
+                # one bad URL shouldn't take the other ones down with it
+                logger.exception(f"Failed to process URL {url} : {e}")
+            finally:
+                was_stopped = self.early_stop.stopped
+                self.early_stop.observe(self._matched_job(final_state))
+                if self.early_stop.stopped and not was_stopped:
+                    logger.info(f"Enough URLs scrutinized ({self.early_stop.reason}), skipping the rest")
 
 
     @traceable(name="job_scrutinizer_main")
-    async def scrutinize_jobs(self):
+    async def scrutinize_jobs(self, search_results : Optional[AllJobSearchResults] = None, indexed_jobs : List[dict] = ()):
         
 
-        job_urls = self.get_urls()
-        # loop over these urls and then enter it in the flow
+        job_urls = self.get_urls(search_results)
+        # the postings that came from the job index are already scraped
+        self.indexed_jobs = {canonicalize_url(entry["url"]) : entry["job"] for entry in indexed_jobs}
+
+        if CHECKPOINTS_ENABLED:
+            # every node of every URL gets checkpointed so a crashed run can resume from there
+            # (a copy of the compiled graph, re-adding the nodes would get them wrapped again by the tracers)
+            self.graph = self.graph.copy({"checkpointer": await get_graph_checkpointer()})
+            self.checkpointed = True
+        # run the urls through the flow, max_concurrency of them at a time
+        # (the providers rate limits are still enforced by the shared limiters in the tools/clients)
         if job_urls:
 
-            for url in job_urls:
-
-                logger.info(f"Processing URL : {url}")
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            await asyncio.gather(*(self._process_url(url, semaphore) for url in job_urls))
 
-                initial_state = {"current_url": url}
-                final_state = await self.graph.ainvoke(initial_state)
+        if self.prefilter is not None:
+            logger.info(f"Prefilter stats : {self.prefilter.stats()}")
+        logger.info(f"Early stop stats : {self.early_stop.stats()}")
 
         if len(self.saved_jobs) > 0:
             logger.info("saving jobs")
@@ -414,3 +525,13 @@ class JobScrutinizerLangGraph():
             return True
         self.final_status = True
         return False
+
+
+    async def clear_checkpoints(self):
+        "the run is over (the user got an email), its graph checkpoints aren't needed anymore"
+        if not self.checkpointed:
+            return
+        checkpointer = await get_graph_checkpointer()
+        for thread_id in self._thread_ids:
+            await checkpointer.adelete_thread(thread_id)
+        self._thread_ids = []
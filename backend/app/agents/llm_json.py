@@ -0,0 +1,50 @@
+import json
+import re
+from typing import Any, Tuple
+
+from json_repair import repair_json
+
+
+# ```json ... ``` (or just ``` ... ```) anywhere in the response
+FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+
+
+def _first_json_value(text: str) -> Any:
+    "the first complete JSON object / array in the text, whatever comes before or after it"
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"[\[{]", text):
+        try:
+            return decoder.raw_decode(text[match.start():])[0]
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("no JSON value in the response")
+
+
+def parse_json_response(text: str) -> Tuple[Any, bool]:
+    """
+    The JSON an LLM answered with, and whether it needed a repair to get it
+
+    in order, cheapest first:
+    1. the response is plain JSON
+    2. the JSON is inside a code fence and/or has prose before / after it
+    3. the JSON itself is broken (trailing commas, single quotes, cut off, ...) -> json_repair
+
+    raises ValueError when there's nothing to salvage
+    """
+    text = (text or "").strip()
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    fenced = FENCE_RE.search(text)
+    candidate = fenced.group(1).strip() if fenced else text
+    try:
+        return _first_json_value(candidate), True
+    except ValueError:
+        pass
+
+    repaired = repair_json(candidate, return_objects=True)
+    if isinstance(repaired, (dict, list)) and repaired:
+        return repaired, True
+    raise ValueError("the response isn't JSON and couldn't be repaired")
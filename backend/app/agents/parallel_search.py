@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import re
+from typing import Dict, List, Optional
+
+from langsmith import traceable
+
+from app.agents.job_requirement_analyst import JobSearchCriteria
+from app.agents.search_agent import AllJobSearchResults, SingleJobSearchResult
+from app.results_store import STEP_2_SEARCH_RESULTS, get_results_writer
+from app.tools.search_cache import get_search_cache
+from app.tools.search_tools import search_tavily
+from app.tools.urls import canonicalize_url, detect_platform, url_domain
+from config import JOB_INDEX_MIN_RESULTS, SEARCH_MAX_CONCURRENCY
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# boards we trust as much as the big ones even if they end up as "Other"
+CREDIBLE_BOARDS = {"wellfound.com", "arc.dev", "bayt.com", "weworkremotely.com", "otta.com"}
+
+# the search_query of the results that came from the job index instead of Tavily
+INDEX_SEARCH_QUERY = "job index"
+
+JOB_KEYWORDS = ("job", "career", "hiring", "vacanc", "position", "opening", "viewjob")
+
+WORD_RE = re.compile(r"[a-z0-9+#.]+")
+
+
+def _words(text: str) -> set:
+    return set(WORD_RE.findall((text or "").casefold()))
+
+
+class ParallelSearchExecutor:
+    """
+    A non-LLM replacement for the SearchAgent stage
+
+    Runs every search query from the analyst (step 1) against Tavily in parallel,
+    then merges, dedupes and scores the results in code using the same rubric the
+    search agent gets in its prompt:
+        * Title match (3)
+        * Required skills presence (3)
+        * Location/remote alignment (2)
+        * Platform credibility (2)
+    and hands over the same AllJobSearchResults the search agent would.
+
+    The postings already in the job index (see app/job_index.py) go through the same rubric,
+    with enough of them the Tavily queries don't run at all.
+    """
+
+    def __init__(self, user_id, score_threshold=0, max_concurrency=None):
+        self.user_id = user_id
+        self.score_threshold = score_threshold
+        self.max_concurrency = max(1, max_concurrency or SEARCH_MAX_CONCURRENCY)
+
+    async def _run_query(self, query: str, semaphore: asyncio.Semaphore) -> List[dict]:
+        async with semaphore:
+            try:
+                # Tavily's client is sync, the cache also coalesces identical queries from other users
+                response = await asyncio.to_thread(get_search_cache().get_or_fetch, query, search_tavily)
+            except Exception as e:
+                logger.error(f"Search query failed '{query}' : {e}")
+                return []
+
+        results = response.get("results", []) if isinstance(response, dict) else []
+        # copies, the response objects are shared through the cache
+        return [{**result, "search_query": query} for result in results]
+
+    def _looks_like_job_posting(self, url: str, title: str) -> bool:
+        if detect_platform(url) != "Other" or url_domain(url) in CREDIBLE_BOARDS:
+            return True
+        text = f"{url} {title}".casefold()
+        return any(keyword in text for keyword in JOB_KEYWORDS)
+
+    def _score(self, result: dict, criteria: JobSearchCriteria) -> Optional[SingleJobSearchResult]:
+        url = result.get("url") or ""
+        title = result.get("title") or ""
+        content = result.get("content") or ""
+
+        if not url or not self._looks_like_job_posting(url, title):
+            return None
+
+        title_words = _words(title)
+        text = f"{title} {content}".casefold()
+        text_words = _words(text)
+
+        # Title match (3) -> best share of the words of any of the wanted titles found in the result title
+        title_match = 0.0
+        for wanted in criteria.job_title:
+            wanted_words = _words(wanted)
+            if wanted_words:
+                title_match = max(title_match, len(wanted_words & title_words) / len(wanted_words))
+        title_score = 3 * title_match
+
+        # Required skills presence (3) -> 3 matching skills is a full score, no skills given is neutral
+        skills = [skill for skill in (criteria.preferred_skills or []) if skill]
+        matched_skills = [skill for skill in skills if skill.casefold() in text]
+        if skills:
+            skills_score = 3 * min(1.0, len(matched_skills) / min(len(skills), 3))
+        else:
+            skills_score = 1.5
+
+        # Location/remote alignment (2)
+        locations = [location for location in criteria.locations if location]
+        if locations:
+            location_score = 1.0 if any(_words(location) & text_words for location in locations) else 0.0
+        else:
+            location_score = 1.0
+        remote = (criteria.remote_preference or "any").casefold()
+        if remote == "any" or remote in text:
+            location_score += 1.0
+
+        # Platform credibility (2)
+        platform = detect_platform(url)
+        if platform != "Other" or url_domain(url) in CREDIBLE_BOARDS:
+            platform_score = 2.0
+        elif "career" in url.casefold() or "jobs" in url.casefold():
+            # a company careers page
+            platform_score = 1.0
+        else:
+            platform_score = 0.0
+
+        score = round(title_score + skills_score + location_score + platform_score, 2)
+        if score < self.score_threshold:
+            return None
+
+        notes = "; ".join([
+            f"title {title_score:.1f}/3",
+            f"skills {skills_score:.1f}/3" + (f" ({', '.join(matched_skills)})" if matched_skills else ""),
+            f"location/remote {location_score:.0f}/2",
+            f"platform {platform_score:.0f}/2 ({platform if platform != 'Other' else url_domain(url)})",
+        ])
+
+        return SingleJobSearchResult(
+            title=title,
+            url=url,
+            score=score,
+            search_query=result["search_query"],
+            platform=platform,
+            relevance_notes=notes,
+        )
+
+    @staticmethod
+    def indexed_raw_results(indexed_jobs: List[dict]) -> List[dict]:
+        "the job index hits (JobIndex.search) as raw search results"
+        return [
+            {
+                "url": entry["url"],
+                "title": entry["job"]["job_title"],
+                "content": entry["job"]["job_description"],
+                "search_query": INDEX_SEARCH_QUERY,
+            }
+            for entry in indexed_jobs
+        ]
+
+    def merge_results(self, raw_results: List[dict], criteria: JobSearchCriteria, results: Optional[AllJobSearchResults] = None) -> AllJobSearchResults:
+        """
+        score every raw result, keep the best scored one for each URL, best first
+        (on top of the already scored `results` if given, eg. the search agent ones)
+        """
+        best: Dict[str, SingleJobSearchResult] = {}
+        for scored in (results.results if results else []):
+            key = canonicalize_url(scored.url)
+            if key not in best or scored.score > best[key].score:
+                best[key] = scored
+        for raw in raw_results:
+            scored = self._score(raw, criteria)
+            if scored is None:
+                continue
+            key = canonicalize_url(scored.url)
+            if key not in best or scored.score > best[key].score:
+                best[key] = scored
+
+        ranked = sorted(best.values(), key=lambda result: result.score, reverse=True)
+        return AllJobSearchResults(results=ranked)
+
+    def _save_results(self, results: AllJobSearchResults):
+        # persisted in the background, the scrutinizer gets the results in memory
+        get_results_writer().save_step(self.user_id, STEP_2_SEARCH_RESULTS, results.model_dump())
+
+    @traceable(name="parallel_search")
+    async def search_jobs(self, criteria: JobSearchCriteria, indexed_jobs: List[dict] = ()) -> AllJobSearchResults:
+        raw_results = self.indexed_raw_results(indexed_jobs)
+        queries = criteria.search_queries
+        if len(indexed_jobs) >= JOB_INDEX_MIN_RESULTS:
+            # the index already covers this request
+            logger.info(f"Parallel search: {len(indexed_jobs)} indexed jobs, skipping the web search")
+            queries = []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        batches = await asyncio.gather(*(self._run_query(query, semaphore) for query in queries))
+        raw_results += [result for batch in batches for result in batch]
+
+        results = self.merge_results(raw_results, criteria)
+        logger.info(f"Parallel search: {len(indexed_jobs)} indexed jobs + {len(queries)} queries -> {len(raw_results)} raw results -> {len(results.results)} jobs")
+
+        self._save_results(results)
+        return results
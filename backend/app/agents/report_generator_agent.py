@@ -1,117 +1,160 @@
 import json
 import html
+from collections import defaultdict
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent 
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-def json_to_html_table(user_id : str ,json_file_path=None, output_html_path=None):
+
+# the whole look of the report lives in this one <style> block, the rows only carry the data
+REPORT_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Job Report</title>
+<style>
+body{background:#f9fafb;font-family:Arial,sans-serif;margin:0;padding:0}
+.wrap{max-width:1200px;margin:0 auto;padding:1rem}
+.card{background:#fff;box-shadow:0 1px 3px 0 rgba(0,0,0,.1);padding:1.5rem;border-radius:.5rem}
+.intro{margin-bottom:3rem}
+h1,h2{font-size:1.5rem;font-weight:600;color:#374151;margin-bottom:1rem}
+.sub{color:#4b5563;font-size:.875rem;margin-bottom:1rem}
+.scroll{overflow-x:auto}
+table{width:100%;background:#fff;border-collapse:collapse;border-radius:.5rem;box-shadow:0 1px 3px 0 rgba(0,0,0,.1)}
+table,th,td{border:1px solid #e5e7eb}
+thead tr{background:#f3f4f6}
+th{padding:.75rem 1rem;text-align:left;font-size:.875rem;font-weight:600;color:#4b5563}
+td{padding:.75rem 1rem;font-size:.875rem;color:#374151}
+ul{margin:0;padding-left:1.5rem}
+a{color:#3b82f6;text-decoration:underline}
+</style>
+</head>
+<body>
+<div class="wrap">
+<div class="card intro">
+<h1>Job Report</h1>
+<p class="sub">Sorted by recommendation rank descending</p>
+</div>
+<div class="card">
+<h2>Recommended Jobs</h2>
+<div class="scroll">
+<table>
+<thead><tr><th>Job Title</th><th>Job Description</th><th>Recommendation Rank</th><th>Agent Notes</th><th>Apply</th></tr></thead>
+<tbody>
+"""
+
+REPORT_ROW = "<tr><td>{title}</td><td>{description}</td><td>{rank}</td><td>{notes}</td><td><a href=\"{url}\" target=\"_blank\">Apply Link</a></td></tr>\n"
+
+REPORT_TAIL = """</tbody>
+</table>
+</div>
+</div>
+</div>
+</body>
+</html>
+"""
+
+# how many rows go out per write
+ROWS_PER_CHUNK = 64
+
+
+def render_job_row(job : dict) -> str:
+    "a single <tr> of the report"
+    notes = job.get('agent_recommendation_notes', [])
+    if notes:
+        notes_html = "<ul>" + "".join(f"<li>{html.escape(note)}</li>" for note in notes) + "</ul>"
+    else:
+        notes_html = "No recommendations available"
+
+    return REPORT_ROW.format(
+        title=html.escape(job.get('job_title', 'N/A')),
+        description=html.escape(job.get('job_description', 'N/A')),
+        rank=html.escape(str(job.get('agent_recommendation_rank', 'N/A'))),
+        notes=notes_html,
+        url=html.escape(job.get('job_url', '#')),
+    )
+
+
+class IncrementalReport:
+    """
+    The HTML report, rendered one job at a time
+
+    - `add` renders the row right away (eg. while the scrutinizer is still collecting jobs)
+      and files it under its recommendation rank, so the report still comes out sorted by rank
+      (descending, same order as sorting the whole list at the end)
+    - `chunks` / `write` stream the report out a chunk of rows at a time, the full page never
+      has to be built as one big string
+    """
+
+    def __init__(self, jobs : Iterable[dict] = ()):
+        self._rows_by_rank = defaultdict(list)
+        self.count = 0
+        for job in jobs:
+            self.add(job)
+
+    def add(self, job : dict):
+        rank = job.get('agent_recommendation_rank') or 0
+        self._rows_by_rank[rank].append(render_job_row(job))
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def chunks(self) -> Iterator[str]:
+        yield REPORT_HEAD
+        for rank in sorted(self._rows_by_rank, reverse=True):
+            rows = self._rows_by_rank[rank]
+            for start in range(0, len(rows), ROWS_PER_CHUNK):
+                yield "".join(rows[start:start + ROWS_PER_CHUNK])
+        yield REPORT_TAIL
+
+    def render(self) -> str:
+        "the whole report as one string (eg. for the email body)"
+        return "".join(self.chunks())
+
+    def write(self, output_html_path : str):
+        with open(output_html_path, 'w', encoding='utf-8') as file:
+            for chunk in self.chunks():
+                file.write(chunk)
+
+
+def json_to_html_table(user_id : str ,json_file_path=None, output_html_path=None, report : Optional[IncrementalReport] = None):
     """
     Convert JSON job data to a clean sheet-like HTML table
-    
+
     Args:
         json_file_path (str): Path to the JSON file
         output_html_path (str): Path where HTML file will be saved
+        report (IncrementalReport): the rows already rendered while the jobs were collected,
+            if given the JSON file isn't read at all
     """
-    
+
     # Set default paths and ensure results directory exists
     results_dir = BASE_DIR / "results"
     results_dir.mkdir(exist_ok=True)
-    
+
     if json_file_path is None:
         json_file_path = str(results_dir / f"{user_id}/step_3_job_scrutinizer_results.json")
     if output_html_path is None:
         output_html_path = str(results_dir / f"{user_id}/final_result.html")
-    
-    # Read JSON data
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    
-    # Sort jobs by recommendation rank (descending - higher ranks first)
-    jobs = data.get('jobs', [])
-    jobs_sorted = sorted(jobs, key=lambda x: x.get('agent_recommendation_rank') or 0, reverse=True)
-    
-    # Start building HTML
-    html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-  <meta charset="utf-8">
-  <title>Job Report</title>
-  <style>
-    table {{ border-collapse: collapse; }}
-    table, th, td {{ border: 1px solid #e5e7eb; }}
-    ul {{ margin: 0; padding-left: 1.5rem; }}
-  </style>
-</head>
-<body style='background-color: #f9fafb; font-family: Arial, sans-serif; margin: 0; padding: 0;'>
-  <div style='max-width: 1200px; margin: 0 auto; padding: 1rem;'>
-    <div style='background-color: #ffffff; box-shadow: 0 1px 3px 0 rgba(0, 0, 0, 0.1); padding: 1.5rem; border-radius: 0.5rem; margin-bottom: 3rem;'>
-      <h1 style='font-size: 1.5rem; font-weight: 600; color: #374151; margin-bottom: 1rem;'>Job Report</h1>
-      <p style='color: #4b5563; font-size: 0.875rem; margin-bottom: 1rem;'>Sorted by recommendation rank descending</p>
-    </div>
-    
-    <div style='background-color: #ffffff; padding: 1.5rem; border-radius: 0.5rem; box-shadow: 0 1px 3px 0 rgba(0, 0, 0, 0.1);'>
-      <h2 style='font-size: 1.5rem; font-weight: 600; color: #374151; margin-bottom: 1rem;'>Recommended Jobs</h2>
-      <div style='overflow-x: auto;'>
-        <table style='width: 100%; background-color: #ffffff; border-collapse: collapse; border-radius: 0.5rem; box-shadow: 0 1px 3px 0 rgba(0, 0, 0, 0.1);'>
-          <thead>
-            <tr style='background-color: #f3f4f6;'>
-              <th style='padding: 0.75rem 1rem; text-align: left; font-size: 0.875rem; font-weight: 600; color: #4b5563;'>Job Title</th>
-              <th style='padding: 0.75rem 1rem; text-align: left; font-size: 0.875rem; font-weight: 600; color: #4b5563;'>Job Description</th>
-              <th style='padding: 0.75rem 1rem; text-align: left; font-size: 0.875rem; font-weight: 600; color: #4b5563;'>Recommendation Rank</th>
-              <th style='padding: 0.75rem 1rem; text-align: left; font-size: 0.875rem; font-weight: 600; color: #4b5563;'>Agent Notes</th>
-              <th style='padding: 0.75rem 1rem; text-align: left; font-size: 0.875rem; font-weight: 600; color: #4b5563;'>Apply</th>
-            </tr>
-          </thead>
-          <tbody>"""
-    
-    # Add job rows
-    for job in jobs_sorted:
-        title = html.escape(job.get('job_title', 'N/A'))
-        description = html.escape(job.get('job_description', 'N/A'))
-        url = job.get('job_url', '#')
-        rank = job.get('agent_recommendation_rank', 'N/A')
-        notes = job.get('agent_recommendation_notes', [])
-        
-        # Format notes as a bulleted list
-        notes_html = ""
-        if notes:
-            notes_html = "<ul style='margin: 0; padding-left: 1.5rem;'>"
-            for note in notes:
-                notes_html += f"<li>{html.escape(note)}</li>"
-            notes_html += "</ul>"
-        else:
-            notes_html = "No recommendations available"
-        
-        html_content += f"""
-            <tr style='border-bottom: 1px solid #e5e7eb;'>
-              <td style='padding: 0.75rem 1rem; font-size: 0.875rem; color: #374151;'>{title}</td>
-              <td style='padding: 0.75rem 1rem; font-size: 0.875rem; color: #374151;'>{description}</td>
-              <td style='padding: 0.75rem 1rem; font-size: 0.875rem; color: #374151;'>{rank}</td>
-              <td style='padding: 0.75rem 1rem; font-size: 0.875rem; color: #374151;'>{notes_html}</td>
-              <td style='padding: 0.75rem 1rem; font-size: 0.875rem; color: #374151;'><a href='{html.escape(url)}' style='color: #3b82f6; text-decoration: underline;' target='_blank'>Apply Link</a></td>
-            </tr>"""
-    
-    # Close HTML
-    html_content += """
-          </tbody>
-        </table>
-      </div>
-    </div>
-  </div>
-</body>
-</html>"""
+
+    if report is None:
+        # Read JSON data
+        with open(json_file_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        report = IncrementalReport(data.get('jobs', []))
 
     try:
-    
+
         # Write HTML file
-        with open(output_html_path, 'w', encoding='utf-8') as file:
-            file.write(html_content)
-        
+        report.write(output_html_path)
+
         print(f"HTML table successfully created: {output_html_path}")
-        print(f"Total jobs processed: {len(jobs_sorted)}")
-    
+        print(f"Total jobs processed: {len(report)}")
+
         return True
-    
+
     except IOError as e:
 
         print(f"couldn't write the HTML file {e}")
@@ -0,0 +1,179 @@
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+from config import SCRUTINIZER_DESCRIPTION_MAX_TOKENS
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# the instructions every scrutinizer prompt starts with, byte for byte the same for every user and every call
+# so the providers that cache prompt prefixes only process them once (the user requirements come after)
+STATIC_INSTRUCTIONS = "".join([
+    "You are an expert Job Scrutinizer with deep knowledge of job markets and technical roles.\n\n",
+
+    "## YOUR ROLE\n",
+    "- You receive job data in the ExtractedJob schema.\n",
+    "- You must evaluate whether it matches the user's requirements (given below under USER REQUIREMENTS).\n\n",
+
+    "## INPUT FORMAT\n",
+    "You will receive data in this schema:\n",
+    "- job_title: string\n",
+    "- job_description: string (long descriptions are condensed, a trailing [...] marks a cut)\n",
+    "- job_url: string\n",
+    "- posting_date: string\n",
+    "- required_years_of_experience: string\n\n",
+
+    "## RULES\n",
+    "- If the provided data is literally the string 'none', you must return a valid SingleJobData object with matches_user_req=false.\n",
+    "- If the job data does not meet user requirements, set matches_user_req=false.\n",
+    "- If it meets user requirements, set matches_user_req=true.\n",
+    "- Always use the job_url from the provided ExtractedJob.\n",
+    "- If job_title or description is missing or invalid, treat it as not matching user requirements.\n\n",
+
+    "## ANALYSIS CRITERIA\n",
+    "- Compare job description, posting date, required experience, and technologies against the user requirements.\n",
+    "- If job is older than 3 months, it does not match.\n",
+    "- If required years of experience exceed user background, it does not match.\n",
+    "- If technology/domain does not align, it does not match.\n\n",
+
+    "## OUTPUT FORMAT\n",
+    "- You must return a valid JSON object following this schema:\n",
+    "  {\n",
+    "    'matches_user_req': bool,\n",
+    "    'job_title': str,\n",
+    "    'job_description': str,\n",
+    "    'job_url': str,\n",
+    "    'agent_recommendation_rank': int (1–5),\n",
+    "    'agent_recommendation_notes': list of strings\n",
+    "  }\n\n",
+    "- Do not output a list. Return only a single JSON object.\n",
+    "- Do not include markdown, code blocks, or extra text.\n\n",
+
+    "## RANKING GUIDELINES\n",
+    "- 5: Excellent match, strong alignment\n",
+    "- 4: Very good, minor gaps\n",
+    "- 3: Good, some gaps\n",
+    "- 2: Fair, significant gaps\n",
+    "- 1: Poor, major mismatch\n\n",
+
+    "## CRITICAL NOTES\n",
+    "- If input == 'none', output must still follow SingleJobData with matches_user_req=false.\n",
+    "- Double-check JSON validity before responding.\n",
+    "- Never include commentary or explanations outside the JSON object.\n\n",
+])
+
+# goes right after the static instructions in batch mode (static as well)
+BATCH_INSTRUCTIONS = "".join([
+    "## BATCH MODE\n",
+    "- This time you receive a JSON list of jobs instead of a single one.\n",
+    "- Evaluate every job on its own, exactly as described above.\n",
+    "- Return one JSON object {\"jobs\": [...]} holding exactly one SingleJobData object per input job, in the same order, each with the job_url of its input job.\n",
+    "- This replaces the single-object output rule above for this request only.\n\n",
+])
+
+CUT_MARKER = " [...]"
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# rough chars per token, only used when the tokenizer can't be loaded
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    """
+    the tiktoken encoding the prompts are measured with, or None when it can't be loaded
+    (tiktoken downloads it on first use, so offline it falls back to a chars / 4 estimate)
+
+    the providers run llama models with their own tokenizers, cl100k is close enough for a budget
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable ({e}), estimating the prompt tokens from their length")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    "the first `max_tokens` tokens of the text"
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def condense_description(description: str, max_tokens: int) -> str:
+    """
+    A job description that fits in `max_tokens`
+
+    1. the whitespace gets collapsed (scraped markdown is full of blank lines and indentation)
+    2. sentences repeated word for word are dropped (boilerplate, the same paragraph scraped twice, ...)
+    3. still too long -> cut at the last sentence that fits, marked with [...]
+    """
+    text = " ".join((description or "").split())
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text
+
+    seen = set()
+    sentences = []
+    for sentence in SENTENCE_RE.split(text):
+        key = sentence.lower()
+        if key not in seen:
+            seen.add(key)
+            sentences.append(sentence)
+    text = " ".join(sentences)
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(1, max_tokens - count_tokens(CUT_MARKER))
+    cut = _truncate_tokens(text, budget)
+    # back to the end of the last full sentence, unless that throws most of the budget away
+    sentence_end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if sentence_end > len(cut) // 2:
+        cut = cut[:sentence_end + 1]
+    return cut.rstrip() + CUT_MARKER
+
+
+def _compact_json(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ScrutinizerPrompt:
+    """
+    Builds the llm_analysis_node prompts within a token budget
+
+    - the static instructions come first, then the user requirements (the same for the whole run),
+      then the job(s): the longest possible prefix is shared between the calls
+    - the job JSON has no indentation and every job_description is condensed to `description_max_tokens`
+    - every build returns the prompt with its token count
+    """
+
+    def __init__(self, user_input: dict, description_max_tokens: int = SCRUTINIZER_DESCRIPTION_MAX_TOKENS):
+        self.description_max_tokens = description_max_tokens
+        requirements = {key: value for key, value in user_input.items() if value not in (None, "", [], {})}
+        self.requirements = f"## USER REQUIREMENTS\n{_compact_json(requirements)}\n\n"
+
+    def _compact_job(self, job: dict) -> dict:
+        if not isinstance(job, dict) or not job.get("job_description"):
+            return job
+        return {**job, "job_description": condense_description(job["job_description"], self.description_max_tokens)}
+
+    def single(self, job: dict) -> Tuple[str, int]:
+        prompt = f"{STATIC_INSTRUCTIONS}{self.requirements}Job Data to Analyze:\n{_compact_json(self._compact_job(job))}\n"
+        return prompt, count_tokens(prompt)
+
+    def batch(self, jobs: List[dict]) -> Tuple[str, int]:
+        jobs_data = _compact_json([self._compact_job(job) for job in jobs])
+        prompt = f"{STATIC_INSTRUCTIONS}{BATCH_INSTRUCTIONS}{self.requirements}Jobs Data to Analyze:\n{jobs_data}\n"
+        return prompt, count_tokens(prompt)
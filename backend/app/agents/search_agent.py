@@ -2,7 +2,6 @@ from datetime import datetime
 from crewai import Task, Agent
 from pydantic import BaseModel, Field
 from typing import List
-import os
 
 from app.clients import get_llm_search
 from app.tools.search_tools import tavily_search_engine_tool
@@ -70,7 +69,6 @@ class SearchAgent:
             description=description,
             expected_output="A pure JSON object matching AllJobSearchResults.",
             output_json=AllJobSearchResults,
-            output_file=os.path.join(f"./results/{self.user_id}/", "step_2_job_search_results.json"),
             agent=self.agent,
         )
         return self.task
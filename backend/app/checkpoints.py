@@ -0,0 +1,47 @@
+import asyncio
+import weakref
+from pathlib import Path
+
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from config import CHECKPOINT_DB_PATH
+
+
+# one saver per event loop (the aiosqlite connection belongs to the loop that opened it)
+_savers = weakref.WeakKeyDictionary()
+
+
+async def _open_saver() -> AsyncSqliteSaver:
+    print("--- Initializing Graph Checkpointer (This will run only once) ---")
+    Path(CHECKPOINT_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    conn = aiosqlite.connect(str(CHECKPOINT_DB_PATH))
+    # aiosqlite runs the connection in its own thread, a daemon one so it never keeps the process alive
+    conn.daemon = True
+    await conn
+    await conn.execute("PRAGMA journal_mode=WAL")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver
+
+
+async def get_graph_checkpointer() -> AsyncSqliteSaver:
+    """
+    The shared LangGraph checkpointer of the job scrutinizer graph (SQLite, survives restarts)
+
+    every URL of a run is its own thread (see JobScrutinizerLangGraph.thread_config)
+    """
+    loop = asyncio.get_running_loop()
+    # a task so concurrent callers wait for the same connection instead of opening their own
+    opening = _savers.get(loop)
+    if opening is None:
+        opening = _savers[loop] = loop.create_task(_open_saver())
+    return await opening
+
+
+async def close_graph_checkpointer():
+    "close the checkpointer of the running loop (on shutdown)"
+    opening = _savers.pop(asyncio.get_running_loop(), None)
+    if opening is not None:
+        saver = await opening
+        await saver.conn.close()
@@ -1,24 +1,32 @@
-from crewai import LLM
-import agentops
-from firecrawl import FirecrawlApp
-from tavily import TavilyClient
-from langchain_nvidia_ai_endpoints import ChatNVIDIA
-from langchain_groq import ChatGroq
-from langchain_cerebras import ChatCerebras
-from langchain_core.rate_limiters import InMemoryRateLimiter
-from langsmith import Client as LangSmithClient
-
-from config import CONFIG
+from typing import TYPE_CHECKING
+
+from config import CONFIG, PROVIDER_MODE, LLM_ROUTER_PROVIDERS, NVIDIA_RPM, CEREBRAS_RPM, GROQ_RPM, GEMINI_RPM, LLM_JSON_MODE, STRUCTURED_DATA_TIMEOUT_SECONDS
 
 from functools import lru_cache
 
+# the provider SDKs (crewai/litellm, langchain, firecrawl, tavily, agentops) take seconds to import
+# so each one only gets imported by the getter that needs it (see app/warmup.py, it calls them all at startup)
+if TYPE_CHECKING:
+    import httpx
+    from crewai import LLM
+    from firecrawl import FirecrawlApp
+    from tavily import TavilyClient
+    from langsmith import Client as LangSmithClient
+    from app.llm_router import LLMRouter
+
 # This decorator ensures the function only run once.
 # The result is cached and returned on all subsequent calls.
 @lru_cache(maxsize=None)
-def get_llm_main() -> LLM:
+def get_llm_main() -> "LLM":
     """Initializes and returns a shared LLM instance."""
     print("--- Initializing LLM Client (This will run only once) Qwen3 80B---")
     
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalCrewLLM
+        return LocalCrewLLM(model="local/qwen3-next-80b")
+
+    from crewai import LLM
+
     try:
         llm = LLM(
             model="qwen/qwen3-next-80b-a3b-thinking",
@@ -34,57 +42,102 @@ def get_llm_main() -> LLM:
 
 
 
-@lru_cache(maxsize=None)
-def get_LangGraph_model():
-    """Initializes and returns a shared LLM instance."""
-    print("--- Initializing LLM Client (This will run only once) LLama 3 from Nvidia NIM---")
-
-    try:
-
+def _router_chat_model(name : str):
+    "the LangChain chat model of one of the LLM router providers"
 
-        rate_limiter = InMemoryRateLimiter(
-                requests_per_second= 40 / 60,  # since I'm using Nvidia NIM here so I'm getting 40 RPM max 
-                check_every_n_seconds=0.1,  
-                max_bucket_size=1
-            )
-        
-        rate_limiter_cerebras = InMemoryRateLimiter(
-                requests_per_second= 30 / 60,  # with Cerebras I'm getting 30 RPM max 
-                check_every_n_seconds=0.1,  
-                max_bucket_size=1
-            )
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalChatModel
+        return LocalChatModel(provider=f"local/{name}-llama-3.3-70b")
 
-        model = ChatNVIDIA(
+    if name == "nvidia":
+        from langchain_nvidia_ai_endpoints import ChatNVIDIA
+        return ChatNVIDIA(
             model="meta/llama-3.3-70b-instruct",
             model_provider="langchain-nvidia-ai-endpoints",
             base_url = "https://integrate.api.nvidia.com/v1",
             temperature = 0,
             nvidia_api_key = CONFIG['NVIDIA_API_KEY'],
-            rate_limiter = rate_limiter
-        ).with_fallbacks([
-            ChatCerebras(
-                model="llama-3.3-70b",
-                temperature = 0,
-                api_key = CONFIG['CEREBRAS_API_KEY'],
-                rate_limiter= rate_limiter_cerebras
-            ),
-        ])
+        )
+    if name == "cerebras":
+        from langchain_cerebras import ChatCerebras
+        return ChatCerebras(
+            model="llama-3.3-70b",
+            temperature = 0,
+            api_key = CONFIG['CEREBRAS_API_KEY'],
+        )
+    if name == "groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(
+            model="llama-3.3-70b-versatile",
+            temperature = 0,
+            api_key = CONFIG['GROQ_API_KEY'],
+        )
+    if name == "gemini":
+        # through Gemini's OpenAI compatible endpoint
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model="gemini-2.0-flash",
+            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+            temperature = 0,
+            api_key = CONFIG['GEMINI_API_KEY'],
+        )
+    raise ValueError(f"Unknown LLM router provider: {name}")
+
+
+def _guided_json(schema : dict) -> dict:
+    # NVIDIA NIM constrains the decoding to the schema itself
+    return {"nvext": {"guided_json": schema}}
+
+
+def _json_object(schema : dict) -> dict:
+    # the OpenAI style JSON mode, always valid JSON (the schema stays in the prompt)
+    return {"response_format": {"type": "json_object"}}
 
-        return model
+
+# the JSON output mode of every router provider
+JSON_MODES = {"nvidia": _guided_json, "cerebras": _json_object, "groq": _json_object, "gemini": _json_object}
+
+
+@lru_cache(maxsize=None)
+def get_LangGraph_model() -> "LLMRouter":
+    """Initializes and returns the shared LLM router of the job scrutinizer."""
+    print(f"--- Initializing LLM Router (This will run only once) {LLM_ROUTER_PROVIDERS} ---")
+
+    from app.llm_router import LLMRouter, RoutedProvider
+
+    # no rate_limiter on the models themselves, the router paces every provider with its own bucket
+    rpm = {"nvidia": NVIDIA_RPM, "cerebras": CEREBRAS_RPM, "groq": GROQ_RPM, "gemini": GEMINI_RPM}
+
+    try:
+        return LLMRouter([
+            RoutedProvider(
+                name,
+                _router_chat_model(name),
+                rpm=rpm[name],
+                json_mode=JSON_MODES[name] if LLM_JSON_MODE else None,
+            )
+            for name in LLM_ROUTER_PROVIDERS
+        ])
 
     except Exception as e:
 
-        print(f"ERROR initializing LLM: {str(e)} : Nvidia from Langgraph")
+        print(f"ERROR initializing LLM: {str(e)} : LLM router from Langgraph")
         raise
 
 
 
 
 @lru_cache(maxsize=None)
-def get_llm_sec() -> LLM:
+def get_llm_sec() -> "LLM":
     """Initializes and returns a shared LLM instance."""
     print("--- Initializing LLM Client (This will run only once) LLama 3 from cerebras---")
     
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalCrewLLM
+        return LocalCrewLLM(model="local/cerebras-llama-3.3-70b")
+
+    from crewai import LLM
+
     try:
         llm = LLM(
             model="cerebras/llama-3.3-70b",
@@ -97,10 +150,16 @@ def get_llm_sec() -> LLM:
         raise
 
 @lru_cache(maxsize=None)
-def get_llm_with_tool_use() -> LLM:
+def get_llm_with_tool_use() -> "LLM":
     """Initializes and returns a shared LLM instance."""
     print("--- Initializing LLM Client (This will run only once) llama-3.3-70b-instruct from Nvidia NIM---")
     
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalCrewLLM
+        return LocalCrewLLM(model="local/nvidia-llama-3.3-70b")
+
+    from crewai import LLM
+
     try:
         llm = LLM(
             model="meta/llama-3.3-70b-instruct",
@@ -115,10 +174,16 @@ def get_llm_with_tool_use() -> LLM:
 
 
 @lru_cache(maxsize=None)
-def get_llm_search() -> LLM:
+def get_llm_search() -> "LLM":
     """Initializes and returns a shared LLM instance."""
     print("--- Initializing LLM Client (This will run only once) Gemini 2.0 flash ---")
     
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalCrewLLM
+        return LocalCrewLLM(model="local/gemini-2.0-flash")
+
+    from crewai import LLM
+
     try:
         llm = LLM(
             model="gemini/gemini-2.0-flash",
@@ -147,33 +212,64 @@ def get_llm_search() -> LLM:
 #         raise
 
 @lru_cache(maxsize=None)
-def get_search_client() -> TavilyClient:
+def get_search_client() -> "TavilyClient":
     """Initializes and returns a shared TavilyClient instance."""
     print("--- Initializing Tavily Client (This will run only once) ---")
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalSearchClient
+        return LocalSearchClient()
+
+    from tavily import TavilyClient
     return TavilyClient(api_key=CONFIG['TAVILY_API_KEY'])
 
 
 @lru_cache(maxsize=None)
-def get_fire_crawl_client() ->FirecrawlApp:
+def get_fire_crawl_client() -> "FirecrawlApp":
     """Initializes and returns a shared FireCrawl Client instance."""
     print("--- Initializing FireCrawl Client (This will run only once) ---")
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalFirecrawlClient
+        return LocalFirecrawlClient()
 
+    from firecrawl import FirecrawlApp
     return FirecrawlApp(
         api_key=CONFIG['FIRECRAWL_API_KEY']
     )
 
 
 @lru_cache(maxsize=None)
-def get_langsmith_client() -> LangSmithClient:
+def get_http_client() -> "httpx.AsyncClient":
+    """Initializes and returns a shared async HTTP client (the job pages the scraper reads itself)."""
+    print("--- Initializing HTTP Client (This will run only once) ---")
+    import httpx
+
+    transport = None
+    if PROVIDER_MODE == "local":
+        from app.local_providers import LocalJobPageTransport
+        transport = LocalJobPageTransport()
+
+    # one connection pool for every run, the postings of a board all come from the same few hosts
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=STRUCTURED_DATA_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_langsmith_client() -> "LangSmithClient":
     """Initializes and returns a shared LangSmith Client instance."""
     print("--- Initializing LangSmith Client (This will run only once) ---")
+    from langsmith import Client as LangSmithClient
     return LangSmithClient()
 
 def initialize_agentops():
     """Initializes AgentOps. This doesn't need to return anything."""
     print("--- Initializing AgentOps (This will run only once) ---")
     # Using a simple flag to ensure it's not re-initialized
-    if not getattr(initialize_agentops, "has_run", False):
+    if PROVIDER_MODE != "local" and not getattr(initialize_agentops, "has_run", False):
+        import agentops
         agentops.init(
             api_key=CONFIG['AGENTOPS_API_KEY'],
             skip_auto_end_session=True,
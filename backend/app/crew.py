@@ -1,14 +1,22 @@
+import asyncio
 import os
 import uuid
 from crewai import Crew, Process
 import logging
 from pathlib import Path
 
-from app.agents.job_requirement_analyst import JobRequirementAnalyst
-from app.agents.search_agent import SearchAgent
+from app.agents.job_requirement_analyst import JobRequirementAnalyst, JobSearchCriteria
+from app.agents.search_agent import SearchAgent, AllJobSearchResults
+from app.agents.parallel_search import ParallelSearchExecutor
 from app.agents.job_scrutinizer_agent import JobScrutinizerLangGraph
-from app.agents.report_generator_agent import json_to_html_table
+from app.job_index import get_job_index
+from app.tools.criteria_cache import criteria_cache_key, get_criteria_cache
 from app.tools.mail_sender import send_email
+from app.metrics import RUNS_IN_FLIGHT, StageTracker
+from app.results_store import STEP_1_CRITERIA, STEP_2_SEARCH_RESULTS, STEP_3_JOBS, get_results_writer
+from app.run_coalescer import SharedRun, get_run_coalescer
+from app.run_context import RunContext, task_output_as
+from config import SEARCH_MODE, JOB_INDEX_ENABLED, JOB_INDEX_MAX_AGE_HOURS, JOB_INDEX_MAX_RESULTS, JOB_INDEX_MIN_RESULTS, CRITERIA_CACHE_TTL_HOURS, RUN_COALESCING_ENABLED
 
 
 logging.basicConfig(level=logging.INFO)
@@ -17,67 +25,233 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 
+async def lookup_job_index(titles) -> list:
+    "the fresh indexed postings for any of the titles ([] when the index is off or the lookup fails)"
+    if not JOB_INDEX_ENABLED:
+        return []
+    try:
+        indexed_jobs = await asyncio.to_thread(get_job_index().search, titles, JOB_INDEX_MAX_AGE_HOURS * 3600, JOB_INDEX_MAX_RESULTS)
+    except Exception as e:
+        logger.error(f"Job index lookup failed, searching the web only : {e}")
+        return []
+    logger.info(f"Found {len(indexed_jobs)} matching jobs in the job index")
+    return indexed_jobs
+
+
+
+async def initialize_crew(user_input_data : dict , run_id : str = None , on_stage=None , resumed : bool = False):
+    """
+    Run the whole pipeline (analyst -> search -> scrutinizer -> report -> email) for one user
 
-async def initialize_crew(user_input_data : dict):
+    Args:
+        user_input_data: the validated UserJobSearchRequest as a dict
+        run_id: the queued run id if this runs from the job queue (a new uuid otherwise)
+        on_stage: optional callback called with the name of every stage as it starts
+        resumed: the queued run got requeued after a crash/restart, it picks up from its checkpoints
+    """
+
+    stage_tracker = StageTracker()
+
+    def report_status(stage : str):
+        if on_stage is not None:
+            on_stage(stage)
+
+    def report_stage(stage : str):
+        stage_tracker.enter(stage)
+        report_status(stage)
 
     logger.info("Initializing crew with user input data")
     email = user_input_data['email_address']
     user_input_data.pop('email_address')
     logger.info(f"Processing request for email: {email}")
 
-    id = str(uuid.uuid4()) + f"_{email}"
+    run_id = run_id or str(uuid.uuid4())
+    id = run_id + f"_{email}"
+
+    # the stages hand their outputs to each other through this, the store only gets a copy (in the background)
+    context = RunContext(run_id=run_id, user_id=id, email=email, user_input=user_input_data)
+    results_writer = get_results_writer()
 
 
-    job_analyst_agent_instance = JobRequirementAnalyst(input= user_input_data , user_id= id)
-    search_agent_instance = SearchAgent(user_id= id)
     job_scrutinizer_agent   = JobScrutinizerLangGraph(user_id=id , user_input= user_input_data)
 
-    logger.info("All agents initialized successfully")
+    # a run that got requeued after a crash/restart (same run id) -> skip the stages it already finished
+    restored = []
+    if resumed and run_id is not None:
+        restored = await asyncio.to_thread(context.restore, results_writer)
+        if restored:
+            logger.info(f"Resuming run {run_id}, already done : {restored}")
 
-    
-    logs_dir = BASE_DIR / "logs"
-    logs_dir.mkdir(exist_ok=True)
-    logs = str(logs_dir / f"{email}.txt")
 
-    crew = Crew(
-                agents=[
-                    job_analyst_agent_instance.agent,
-                    search_agent_instance.agent,
-                ],
-                tasks=[
-                    job_analyst_agent_instance.task,
-                    search_agent_instance.task,
-                ],
-                process=Process.sequential,
-                verbose=True,
-                cache=False,
-                output_log_file=logs,
-            )
+    async def shared_stages(shared : SharedRun = None) -> RunContext:
+        """
+        analyst -> search -> scrutinizer, everything equivalent requests have in common
+        (with coalescing on, only one of the concurrent equivalent runs executes this)
+        """
+        if shared is None:
+            stage = report_stage
+        else:
+            def stage(name : str):
+                # only the executing run times the shared stages, the attached runs just get the status
+                stage_tracker.enter(name)
+                shared.report_stage(name)
 
-    logger.info("Crew configured and ready to start")
+        job_analyst_agent_instance = JobRequirementAnalyst(input= user_input_data , user_id= id)
 
+        agents = [job_analyst_agent_instance.agent]
+        tasks = [job_analyst_agent_instance.task]
 
-    try:
-        # Kickoff the crew
-        logger.info("Starting crew execution")
-        results = await crew.kickoff_async(inputs={
-            "user_input" : user_input_data
-        })
+        # in parallel mode the search stage runs in code after the crew, so the crew is just the analyst
+        parallel_search = SEARCH_MODE == "parallel"
+
+        # llm mode: the index is looked up with the user's own title before the crew starts, when it
+        # already covers the request the search agent (and its Tavily calls) is left out, same as parallel mode
+        indexed_jobs = []
+        if not parallel_search and context.criteria is None:
+            indexed_jobs = await lookup_job_index([user_input_data.get("Job_title") or ""])
+            if len(indexed_jobs) >= JOB_INDEX_MIN_RESULTS:
+                logger.info(f"The job index covers this request ({len(indexed_jobs)} jobs), skipping the search agent")
+                parallel_search = True
+
+        if not parallel_search:
+            search_agent_instance = SearchAgent(user_id= id)
+            agents.append(search_agent_instance.agent)
+            tasks.append(search_agent_instance.task)
+
+        logger.info("All agents initialized successfully")
+
+        
+        logs_dir = BASE_DIR / "logs"
+        logs_dir.mkdir(exist_ok=True)
+        logs = str(logs_dir / f"{email}.txt")
+
+        def on_task_done(output):
+            # the analyst is done -> the search agent takes over
+            if output.agent == job_analyst_agent_instance.agent.role:
+                stage("searching")
+
+        crew = Crew(
+                    agents=agents,
+                    tasks=tasks,
+                    task_callback=None if parallel_search else on_task_done,
+                    process=Process.sequential,
+                    verbose=True,
+                    cache=False,
+                    output_log_file=logs,
+                )
 
-        if results.raw:
+        logger.info("Crew configured and ready to start")
 
-            agent_3_result = await job_scrutinizer_agent.scrutinize_jobs()
+        searched_by_agent = False
+
+        if context.criteria is None and CRITERIA_CACHE_TTL_HOURS > 0:
+            # the same request came in lately -> its criteria are still good, no need to run the analyst again
+            # (the search agent can't run without the analyst task so the search runs in code, same as a resume)
+            cached_criteria = await asyncio.to_thread(get_criteria_cache().get, user_input_data)
+            if cached_criteria is not None:
+                logger.info("Reusing the cached criteria of an equivalent request, skipping the analyst")
+                context.criteria = JobSearchCriteria.model_validate(cached_criteria)
+                results_writer.save_step(id, STEP_1_CRITERIA, context.criteria.model_dump())
+
+        if context.criteria is None:
+            # Kickoff the crew
+            logger.info("Starting crew execution")
+            stage("analyzing")
+            results = await crew.kickoff_async(inputs={
+                "user_input" : user_input_data
+            })
+
+            if not results.raw:
+                logging.error("Crew execution failed - no results returned")
+                raise Exception
+
+            context.criteria = task_output_as(results.tasks_output[0], JobSearchCriteria)
+            results_writer.save_step(id, STEP_1_CRITERIA, context.criteria.model_dump())
+            if CRITERIA_CACHE_TTL_HOURS > 0:
+                await asyncio.to_thread(get_criteria_cache().set, user_input_data, context.criteria.model_dump())
+
+            if not parallel_search:
+                context.search_results = task_output_as(results.tasks_output[-1], AllJobSearchResults)
+                searched_by_agent = True
+
+        # the fresh postings other runs already scraped for the same kind of job, for the analyst's titles
+        # (a restored search result already has them)
+        if context.search_results is None or searched_by_agent:
+            indexed_urls = {job["url"] for job in indexed_jobs}
+            indexed_jobs = (indexed_jobs + [
+                job for job in await lookup_job_index(context.criteria.job_title)
+                if job["url"] not in indexed_urls
+            ])[:JOB_INDEX_MAX_RESULTS]
+
+        if searched_by_agent:
+            # the agent searched the web already, the indexed jobs just get added to its results
+            if indexed_jobs:
+                search_executor = ParallelSearchExecutor(user_id= id)
+                context.search_results = search_executor.merge_results(
+                    search_executor.indexed_raw_results(indexed_jobs), context.criteria, context.search_results
+                )
+            results_writer.save_step(id, STEP_2_SEARCH_RESULTS, context.search_results.model_dump())
+
+        if context.search_results is None:
+            # parallel mode, an index that covers the request, or a resumed run that only got through the analyst
+            # (search_jobs only goes to the web for the gap the indexed jobs leave)
+            # (the search agent can't run without the analyst task so the resume always searches in code)
+            stage("searching")
+            context.search_results = await ParallelSearchExecutor(user_id= id).search_jobs(context.criteria, indexed_jobs)
+
+        if not context.scrutinized:
+            stage("scrutinizing")
+            await job_scrutinizer_agent.scrutinize_jobs(context.search_results, indexed_jobs)
+            context.jobs = job_scrutinizer_agent.saved_jobs
+            context.scrutinized = True
+
+        return context
+
+
+    # only a run that ended (email queued) drops its checkpoints, a cancelled one (shutdown) keeps them for the resume
+    finished = False
+
+    RUNS_IN_FLIGHT.inc()
+    try:
+        if RUN_COALESCING_ENABLED and not restored:
+            # the same request is already running for someone else (eg. after a shared post) -> wait for its results
+            shared_context, leader = await get_run_coalescer().run(criteria_cache_key(user_input_data), shared_stages, report_status)
+            if not leader:
+                context.criteria = shared_context.criteria
+                context.search_results = shared_context.search_results
+                context.jobs = list(shared_context.jobs)
+                context.scrutinized = shared_context.scrutinized
+                # this run's own copy of the outputs (its status / resume only ever look at its own id)
+                results_writer.save_step(id, STEP_1_CRITERIA, context.criteria.model_dump())
+                results_writer.save_step(id, STEP_2_SEARCH_RESULTS, context.search_results.model_dump())
+                results_writer.save_step(id, STEP_3_JOBS, {"jobs": context.jobs})
+        else:
+            await shared_stages()
+
+        if not job_scrutinizer_agent.final_status:
+            # scrutinized before the restart / by the equivalent run this one attached to
+            job_scrutinizer_agent.saved_jobs = context.jobs
+            for job in context.jobs:
+                job_scrutinizer_agent.report.add(job)
+            job_scrutinizer_agent.final_status = True
+        agent_3_result = bool(context.jobs)
 
         logger.info("Crew execution completed")
 
         if agent_3_result:
             logger.info("Generating HTML report from results")
-            res = json_to_html_table(user_id= id)
+            report_stage("reporting")
+            # the rows were already rendered while the jobs got collected
+            context.report_html = job_scrutinizer_agent.report.render()
 
-            if res:
+            if context.report_html:
+                results_writer.save_report(id, context.report_html)
                 logger.info("HTML report generated successfully, sending email")
-                send_email(to_email=email , user_id=id , error=False)
-                logger.info(f"Email sent successfully to {email}")
+                report_stage("emailing")
+                send_email(to_email=email , user_id=id , error=False, html_content=context.report_html)
+                logger.info(f"Email queued for {email}")
+                finished = True
+                return True
             else:
                 logging.error("Failed to generate the email bruhh")  
                 raise Exception
@@ -89,6 +263,8 @@ async def initialize_crew(user_input_data : dict):
     except Exception as e:
 
         logging.error(f"The crew Failed miserably bruhhhh : {e}")
+        report_stage("emailing")
+        finished = True
         
 
         # If we never found jobs or the process crashed before completion,
@@ -96,12 +272,20 @@ async def initialize_crew(user_input_data : dict):
         if not job_scrutinizer_agent.final_status :
             logger.info(f"Sending general error notification email to {email}")
             send_email(to_email=email, user_id=id, error=True)
-            logger.info(f"General Error Email sent successfully to {email}")
+            logger.info(f"General Error Email queued for {email}")
             return False
 
         # If the list exists but is empty (workflow finished, no jobs found)
         logger.info(f"Sending 0-jobs email to {email}")
         send_email(to_email=email, user_id=id, error=True, jobs=0)
-        logger.info(f"0 Jobs Email sent successfully to {email}")
+        logger.info(f"0 Jobs Email queued for {email}")
         return False
-           
\ No newline at end of file
+
+    finally:
+        stage_tracker.finish()
+        RUNS_IN_FLIGHT.dec()
+        if finished:
+            try:
+                await job_scrutinizer_agent.clear_checkpoints()
+            except Exception as e:
+                logger.error(f"Failed to clear the graph checkpoints of {id} : {e}")
@@ -0,0 +1,167 @@
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from app.metrics import record_cache_lookup
+from app.tools.urls import canonicalize_url, detect_platform
+from config import JOB_INDEX_DB_PATH
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _title_query(titles: Iterable[str]) -> Optional[str]:
+    """
+    The FTS5 query matching any of the wanted titles on the title column
+
+    every word of a title has to be there (in any order), the words are quoted so nothing
+    the analyst came up with can break the FTS syntax
+    eg. ["Python Developer", "Backend Engineer"] -> title : (("python" "developer") OR ("backend" "engineer"))
+    """
+    groups = []
+    for title in titles:
+        tokens = TOKEN_RE.findall((title or "").casefold())
+        if tokens:
+            groups.append("(" + " ".join(f'"{token}"' for token in tokens) + ")")
+    if not groups:
+        return None
+    return "title : (" + " OR ".join(groups) + ")"
+
+
+class JobIndex:
+    """
+    Every posting we ever scraped, searchable with SQLite FTS5 and shared by every run
+
+    - one row per canonical URL (a rescrape just refreshes it)
+    - `search` returns the postings whose title matches one of the wanted titles, scraped
+      in the last `max_age_seconds`, best match (bm25, the title weighs more than the description) first
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        # autocommit connection, one per call so it's safe from any thread
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS job_postings (
+                    id INTEGER PRIMARY KEY,
+                    canonical_url TEXT NOT NULL UNIQUE,
+                    url TEXT NOT NULL,
+                    job_url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    posting_date TEXT,
+                    experience TEXT,
+                    platform TEXT NOT NULL,
+                    scraped_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_job_postings_scraped_at ON job_postings (scraped_at);
+
+                -- the full text index only holds the searchable columns, the rows stay in job_postings
+                CREATE VIRTUAL TABLE IF NOT EXISTS job_postings_fts USING fts5(
+                    title, description, content='job_postings', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS job_postings_ai AFTER INSERT ON job_postings BEGIN
+                    INSERT INTO job_postings_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS job_postings_ad AFTER DELETE ON job_postings BEGIN
+                    INSERT INTO job_postings_fts (job_postings_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS job_postings_au AFTER UPDATE ON job_postings BEGIN
+                    INSERT INTO job_postings_fts (job_postings_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+                    INSERT INTO job_postings_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+                END;
+                """
+            )
+
+    def add(self, url: str, job: dict):
+        "index a freshly scraped posting (the ExtractedJob Firecrawl gave back for url)"
+        title = (job.get("job_title") or "").strip()
+        description = (job.get("job_description") or "").strip()
+        if not title or not description:
+            # nothing to match on
+            return
+        job_url = job.get("job_url") or url
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO job_postings (canonical_url, url, job_url, title, description, posting_date, experience, platform, scraped_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(canonical_url) DO UPDATE SET
+                    url = excluded.url, job_url = excluded.job_url, title = excluded.title,
+                    description = excluded.description, posting_date = excluded.posting_date,
+                    experience = excluded.experience, platform = excluded.platform, scraped_at = excluded.scraped_at
+                """,
+                (
+                    canonicalize_url(url), url, job_url, title, description,
+                    job.get("posting_date"), job.get("required_years_of_experience"),
+                    detect_platform(job_url), time.time(),
+                ),
+            )
+
+    def search(self, titles: Iterable[str], max_age_seconds: float, limit: int) -> List[dict]:
+        """
+        the fresh postings matching any of the titles, each one as
+        {"url", "platform", "scraped_at", "job": <the ExtractedJob dict>}
+        """
+        query = _title_query(titles)
+        if query is None:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT p.url, p.job_url, p.title, p.description, p.posting_date, p.experience, p.platform, p.scraped_at
+                FROM job_postings_fts
+                JOIN job_postings AS p ON p.id = job_postings_fts.rowid
+                WHERE job_postings_fts MATCH ? AND p.scraped_at >= ?
+                ORDER BY bm25(job_postings_fts, 10.0, 1.0)
+                LIMIT ?
+                """,
+                (query, time.time() - max_age_seconds, limit),
+            ).fetchall()
+
+        record_cache_lookup("job_index", "hit" if rows else "miss")
+        return [
+            {
+                "url": row["url"],
+                "platform": row["platform"],
+                "scraped_at": row["scraped_at"],
+                "job": {
+                    "job_title": row["title"],
+                    "job_description": row["description"],
+                    "job_url": row["job_url"],
+                    "posting_date": row["posting_date"] or "",
+                    "required_years_of_experience": row["experience"] or "",
+                },
+            }
+            for row in rows
+        ]
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM job_postings").fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def get_job_index() -> JobIndex:
+    """Initializes and returns the shared job posting index."""
+    print("--- Initializing Job Index (This will run only once) ---")
+    return JobIndex(JOB_INDEX_DB_PATH)
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# run statuses
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+# (run_id, payload, report_stage, resumed) -> whatever the pipeline returns, False means it failed
+# resumed: the run got claimed before (requeued after a crash/restart), it may have checkpoints to resume from
+RunHandler = Callable[[str, dict, Callable[[str], None], bool], Awaitable[object]]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobQueue:
+    """
+    A tiny SQLite backed queue for the crew runs.
+
+    Every run is a row so the queue survives restarts, a run that was still
+    `running` when the process died gets put back in the queue on startup.
+    All the methods are sync (sqlite3), the workers call them through asyncio.to_thread
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        # autocommit connection, one per call so it's safe from any thread
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, created_at)")
+            # queues created before the attempts column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+            if "attempts" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+                # the ones still `running` got interrupted, they get requeued right after this as resumed runs
+                conn.execute("UPDATE runs SET attempts = 1 WHERE status = ?", (RUNNING,))
+
+    def enqueue(self, payload: dict) -> str:
+        "add a new run to the queue and return its id"
+        run_id = uuid.uuid4().hex
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs (id, payload, status, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, json.dumps(payload), QUEUED, QUEUED, now, now),
+            )
+        return run_id
+
+    def claim_next(self) -> Optional[Tuple[str, dict, bool]]:
+        "atomically take the oldest queued run and mark it as running, returns (run_id, payload, resumed)"
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock right away so two workers can't claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM runs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE runs SET status = ?, stage = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (RUNNING, "starting", _now(), row["id"]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        return row["id"], json.loads(row["payload"]), row["attempts"] > 0
+
+    def update_stage(self, run_id: str, stage: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET stage = ?, updated_at = ? WHERE id = ?",
+                (stage, _now(), run_id),
+            )
+
+    def finish(self, run_id: str, success: bool, error: Optional[str] = None):
+        status = COMPLETED if success else FAILED
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, stage = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, status, error, _now(), run_id),
+            )
+
+    def get(self, run_id: str) -> Optional[Dict[str, Optional[str]]]:
+        "the public view of a run (no payload, it has the user email in it)"
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, stage, error, created_at, updated_at FROM runs WHERE id = ?",
+                (run_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "run_id": row["id"],
+            "status": row["status"],
+            "stage": row["stage"],
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def requeue_interrupted(self) -> int:
+        """
+        put back every run that was `running` when the process stopped
+        (only safe with a single process draining the queue)
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE runs SET status = ?, stage = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, QUEUED, _now(), RUNNING),
+            )
+            return cursor.rowcount
+
+
+class StageReporter:
+    """
+    The report_stage callback of one run: the pipeline calls it from the event loop,
+    the UPDATE runs in a worker thread (latest stage wins) so a busy database never stalls the run
+    """
+
+    def __init__(self, queue: JobQueue, run_id: str):
+        self.queue = queue
+        self.run_id = run_id
+        self._stage: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __call__(self, stage: str):
+        self._stage = stage
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # not called from the loop -> just do it here
+            self._write(stage)
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._write_latest())
+
+    def _write(self, stage: str):
+        try:
+            self.queue.update_stage(self.run_id, stage)
+        except Exception as e:
+            # the stage is just informational, never fail the run because of it
+            logger.error(f"Couldn't update the stage of run {self.run_id} : {e}")
+
+    async def _write_latest(self):
+        written = None
+        while self._stage != written:
+            written = self._stage
+            await asyncio.to_thread(self._write, written)
+
+    async def flush(self):
+        "waits for the pending stage update"
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class JobWorkerPool:
+    """
+    A pool of asyncio workers draining a JobQueue.
+
+    The workers wait on an event that `notify()` sets when a run gets enqueued,
+    and fall back to polling every `poll_interval` seconds just in case.
+    With `ready` (a coroutine function) they await it before claiming their first run.
+    """
+
+    def __init__(self, queue: JobQueue, handler: RunHandler, size: int = 2, poll_interval: float = 5.0,
+                 ready: Optional[Callable[[], Awaitable[None]]] = None):
+        self.queue = queue
+        self.handler = handler
+        self.ready = ready
+        self.size = max(1, size)
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        requeued = await asyncio.to_thread(self.queue.requeue_interrupted)
+        if requeued:
+            logger.info(f"Re-queued {requeued} interrupted run(s)")
+
+        self._workers = [
+            asyncio.create_task(self._worker(n), name=f"job-worker-{n}")
+            for n in range(self.size)
+        ]
+        logger.info(f"Started {self.size} job worker(s)")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def notify(self):
+        "wake the workers up, there is something new in the queue"
+        self._wakeup.set()
+
+    async def _worker(self, n: int):
+        if self.ready is not None:
+            await self.ready()
+        while True:
+            # clear before looking so a notify() that lands while we claim isn't lost
+            self._wakeup.clear()
+            claimed = await asyncio.to_thread(self.queue.claim_next)
+
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            run_id, payload, resumed = claimed
+            logger.info(f"[worker {n}] Picked up run {run_id}" + (" (resumed)" if resumed else ""))
+            await self._run(run_id, payload, resumed)
+
+    async def _run(self, run_id: str, payload: dict, resumed: bool = False):
+        report_stage = StageReporter(self.queue, run_id)
+        try:
+            result = await self.handler(run_id, payload, report_stage, resumed)
+        except asyncio.CancelledError:
+            # shutting down, the run stays `running` and gets re-queued on the next start
+            raise
+        except Exception as e:
+            logger.exception(f"Run {run_id} crashed : {e}")
+            await report_stage.flush()
+            await asyncio.to_thread(self.queue.finish, run_id, False, str(e))
+            return
+
+        # the last stage lands before the run gets marked finished
+        await report_stage.flush()
+        if result is False:
+            await asyncio.to_thread(self.queue.finish, run_id, False, "The job search pipeline failed")
+        else:
+            await asyncio.to_thread(self.queue.finish, run_id, True)
+        logger.info(f"Run {run_id} finished")
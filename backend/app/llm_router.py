@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List, Optional
+
+from app.metrics import is_rate_limit_error, track_provider_call
+from app.tools.token_bucket import AsyncTokenBucket
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RoutedProvider:
+    """
+    One chat model behind the router, with its own rate budget and latency estimate
+
+    - `limiter` spaces the calls out to the provider's RPM (nothing gets sent just to collect a 429)
+    - `latency` is an EWMA of the successful calls, it starts at `initial_latency`
+    - after a 429 / an error the provider sits out for a while (`cooldown_until`)
+    - `json_mode` turns a JSON schema into the invoke kwargs of the provider's own JSON output mode
+      (None = the provider doesn't have one, its answers just get parsed / repaired)
+    """
+
+    def __init__(self, name: str, model, rpm: float, burst: int = 1, initial_latency: float = 2.0,
+                 json_mode: Optional[Callable[[dict], dict]] = None):
+        self.name = name
+        self.model = model
+        self.json_mode = json_mode
+        self.rpm = rpm
+        self.limiter = AsyncTokenBucket(requests_per_minute=rpm, burst=burst)
+        self.latency = initial_latency
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+
+    def expected_seconds(self, now: float) -> float:
+        "when a call routed here right now would be done: the wait for a token (or the cooldown) + the usual latency"
+        wait = max(self.limiter.estimated_wait(), self.cooldown_until - now)
+        return wait + self.latency
+
+    def observe_latency(self, seconds: float, alpha: float):
+        self.latency = alpha * seconds + (1 - alpha) * self.latency
+
+    def stats(self) -> dict:
+        return {
+            "rpm": self.rpm,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "latency_seconds": round(self.latency, 3),
+        }
+
+
+class LLMRouter:
+    """
+    Spreads the scrutinizer's LLM calls over several providers (NVIDIA, Cerebras, Groq, Gemini, ...)
+
+    Every call goes to the provider expected to answer first, given how long its rate limiter
+    would make the call wait and how fast it has been answering lately. So once the fastest
+    provider's RPM is used up the next calls spill over to the others instead of queueing behind it,
+    and the throughput gets close to the sum of the quotas.
+
+    A failed call is retried on the next best provider it hasn't tried yet (the failed one cools down),
+    the error only comes out once every provider failed. Same `ainvoke` as a LangChain chat model,
+    plus `json_schema` to ask every provider for JSON (through its own JSON mode) matching that schema.
+    """
+
+    def __init__(
+        self,
+        providers: List[RoutedProvider],
+        latency_alpha: float = 0.3,
+        rate_limit_cooldown_seconds: float = 30.0,
+        error_cooldown_seconds: float = 5.0,
+    ):
+        if not providers:
+            raise ValueError("the LLM router needs at least one provider")
+        self.providers = providers
+        self.latency_alpha = latency_alpha
+        self.rate_limit_cooldown_seconds = rate_limit_cooldown_seconds
+        self.error_cooldown_seconds = error_cooldown_seconds
+
+    def _pick(self, exclude) -> Optional[RoutedProvider]:
+        now = time.monotonic()
+        candidates = [provider for provider in self.providers if provider.name not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda provider: provider.expected_seconds(now))
+
+    async def ainvoke(self, input: Any, config=None, json_schema: Optional[dict] = None, **kwargs):
+        tried = set()
+        last_error: Optional[BaseException] = None
+
+        while True:
+            provider = self._pick(tried)
+            if provider is None:
+                raise last_error
+            tried.add(provider.name)
+
+            # the cooldown is a deadline, not a token so it's waited on here
+            cooldown = provider.cooldown_until - time.monotonic()
+            if cooldown > 0:
+                await asyncio.sleep(cooldown)
+            await provider.limiter.acquire()
+
+            call_kwargs = dict(kwargs)
+            if json_schema is not None and provider.json_mode is not None:
+                call_kwargs.update(provider.json_mode(json_schema))
+
+            provider.calls += 1
+            started = time.monotonic()
+            try:
+                with track_provider_call(f"llm:{provider.name}"):
+                    response = await provider.model.ainvoke(input, config=config, **call_kwargs)
+            except Exception as e:
+                last_error = e
+                provider.failures += 1
+                if is_rate_limit_error(e):
+                    provider.rate_limited += 1
+                    provider.cooldown_until = time.monotonic() + self.rate_limit_cooldown_seconds
+                else:
+                    provider.cooldown_until = time.monotonic() + self.error_cooldown_seconds
+                logger.warning(f"LLM provider {provider.name} failed ({e}), rerouting")
+                continue
+
+            provider.observe_latency(time.monotonic() - started, self.latency_alpha)
+            return response
+
+    def stats(self) -> dict:
+        return {provider.name: provider.stats() for provider in self.providers}
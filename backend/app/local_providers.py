@@ -0,0 +1,453 @@
+"""
+Local stand-ins for every external provider (NVIDIA/Cerebras/Gemini LLMs, Tavily, Firecrawl, the job boards, SMTP)
+
+Used when PROVIDER_MODE=local so the whole pipeline can run offline (benchmarks, load tests).
+Every stand-in goes through a LocalProviderBehavior that adds latency, random errors and
+429s once a provider gets more than its RPM, so it behaves roughly like the real thing.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+from crewai.llms.base_llm import BaseLLM
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from config import (
+    LOCAL_PROVIDER_ERROR_RATE,
+    LOCAL_PROVIDER_LATENCY_MS,
+    LOCAL_PROVIDER_MALFORMED_RATE,
+    LOCAL_PROVIDER_RATE_LIMIT_RPM,
+    LOCAL_PROVIDER_STRUCTURED_RATE,
+)
+
+
+class LocalProviderError(RuntimeError):
+    "a random failure of a stand-in provider"
+    status_code = 500
+
+
+class LocalRateLimitError(LocalProviderError):
+    "the stand-in provider got more than its RPM"
+    status_code = 429
+
+
+class LocalProviderBehavior:
+    """
+    latency / error rate / 429 behaviour of a stand-in provider
+
+    - every call waits `latency_ms` (+-50% jitter)
+    - fails with LocalProviderError with a probability of `error_rate`
+    - fails with LocalRateLimitError once more than `rate_limit_rpm` calls were made in the last minute (0 = no limit)
+    """
+
+    def __init__(self, name: str, latency_ms: float = None, error_rate: float = None, rate_limit_rpm: int = None):
+        self.name = name
+        self.latency_ms = LOCAL_PROVIDER_LATENCY_MS if latency_ms is None else latency_ms
+        self.error_rate = LOCAL_PROVIDER_ERROR_RATE if error_rate is None else error_rate
+        self.rate_limit_rpm = LOCAL_PROVIDER_RATE_LIMIT_RPM if rate_limit_rpm is None else rate_limit_rpm
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self.total_calls = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def _delay(self) -> float:
+        return self.latency_ms / 1000 * random.uniform(0.5, 1.5)
+
+    def _check(self):
+        now = time.monotonic()
+        with self._lock:
+            self.total_calls += 1
+            while self._calls and now - self._calls[0] > 60:
+                self._calls.popleft()
+            if self.rate_limit_rpm and len(self._calls) >= self.rate_limit_rpm:
+                self.rate_limited += 1
+                raise LocalRateLimitError(f"{self.name}: 429 Too Many Requests (stand-in limit {self.rate_limit_rpm} RPM)")
+            self._calls.append(now)
+            if random.random() < self.error_rate:
+                self.errors += 1
+                raise LocalProviderError(f"{self.name}: simulated provider error")
+
+    def call(self):
+        self._check()
+        time.sleep(self._delay())
+
+    async def acall(self):
+        self._check()
+        await asyncio.sleep(self._delay())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.total_calls, "rate_limited": self.rate_limited, "errors": self.errors}
+
+
+def _stable_int(text: str) -> int:
+    "a deterministic number out of a string (hash() is salted per process)"
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+
+
+def _messages_text(messages: Union[str, List[Dict[str, str]], List[BaseMessage]]) -> str:
+    if isinstance(messages, str):
+        return messages
+    parts = []
+    for message in messages:
+        content = message.get("content", "") if isinstance(message, dict) else message.content
+        parts.append(content if isinstance(content, str) else json.dumps(content))
+    return "\n".join(parts)
+
+
+def _first_json_object(text: str, after: str) -> Optional[Any]:
+    "the first JSON value that comes after `after` in the text"
+    index = text.find(after)
+    if index == -1:
+        return None
+    decoder = json.JSONDecoder()
+    rest = text[index + len(after):]
+    for match in re.finditer(r"[\[{]", rest):
+        try:
+            return decoder.raw_decode(rest[match.start():])[0]
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+# ---------------- Search + scraping ----------------
+
+BOARD_URLS = [
+    "https://www.linkedin.com/jobs/view/{slug}-{id}",
+    "https://www.indeed.com/viewjob?jk={hex}",
+    "https://wuzzuf.net/jobs/p/{hex}-{slug}",
+]
+
+
+class LocalSearchClient:
+    """stand-in for TavilyClient, every query returns a few postings (some of them shared with other queries)"""
+
+    def __init__(self, results_per_query: int = 5):
+        self.behavior = LocalProviderBehavior("tavily")
+        self.results_per_query = results_per_query
+
+    def search(self, query: str, **kwargs) -> dict:
+        self.behavior.call()
+        words = [word for word in re.findall(r"[A-Za-z]+", query) if not word.lower().startswith("site")]
+        title = " ".join(words[:3]).title() or "Software Engineer"
+        slug = "-".join(words[:3]).lower() or "software-engineer"
+
+        results = []
+        for i in range(self.results_per_query):
+            # half of the ids come from a small shared pool so different queries overlap
+            seed = _stable_int(f"{query}{i}") if i % 2 else _stable_int(slug) + i
+            template = BOARD_URLS[seed % len(BOARD_URLS)]
+            url = template.format(slug=slug, id=3_000_000_000 + seed % 1_000_000, hex=f"{seed:x}")
+            results.append({
+                "title": f"{title} - hiring",
+                "url": url,
+                "content": f"{title} job opening, Python, remote or onsite, posted {seed % 60} days ago",
+                "score": round(0.5 + (seed % 50) / 100, 2),
+            })
+        return {"query": query, "results": results, "response_time": self.behavior.latency_ms / 1000}
+
+
+class _ScrapeResult:
+    def __init__(self, data: Optional[dict]):
+        self.json = data
+
+
+def _local_job(url: str) -> dict:
+    "the posting behind a stand-in URL, the same for Firecrawl and the job page"
+    seed = _stable_int(url)
+    # the title out of the URL slug when there's one (.../junior-python-developer-123 -> Junior Python Developer)
+    slug_words = [word for word in re.split(r"[-_/]", urlsplit(url).path.rsplit("/", 1)[-1]) if word.isalpha()]
+    title = " ".join(slug_words).title() if slug_words else "Software Engineer"
+    return {
+        "job_title": f"{title} #{seed % 1000}",
+        "job_description": "We are hiring a Python engineer. Remote friendly. " * (1 + seed % 20),
+        "job_url": url,
+        "posting_date": f"{seed % 120} days ago",
+        "required_years_of_experience": f"{seed % 6}+ years",
+    }
+
+
+class LocalFirecrawlClient:
+    """stand-in for FirecrawlApp, returns an ExtractedJob-like dict for every URL"""
+
+    def __init__(self):
+        self.behavior = LocalProviderBehavior("firecrawl")
+
+    def scrape_url(self, url: str, **kwargs) -> _ScrapeResult:
+        self.behavior.call()
+        return _ScrapeResult(_local_job(url))
+
+
+def _job_page(url: str) -> str:
+    """
+    the HTML of a stand-in job page, LOCAL_PROVIDER_STRUCTURED_RATE of them carry the posting the way the boards do
+    (LinkedIn: JSON-LD, Indeed: microdata, Wuzzuf: JSON-LD in a @graph), the others only have OpenGraph tags
+    """
+    job = _local_job(url)
+    seed = _stable_int(url)
+    posted = time.strftime("%Y-%m-%d", time.gmtime(time.time() - (seed % 120) * 86400))
+    years = seed % 6
+    head = f'<meta property="og:title" content="{job["job_title"]}"><meta property="og:description" content="Python engineer, remote friendly">'
+
+    if (seed % 100) / 100 >= LOCAL_PROVIDER_STRUCTURED_RATE:
+        return f"<html><head>{head}</head><body><h1>{job['job_title']}</h1><p>Sign in to see the job</p></body></html>"
+
+    posting = {
+        "@context": "https://schema.org",
+        "@type": "JobPosting",
+        "title": job["job_title"],
+        "description": f"<p>{job['job_description']}</p>",
+        "datePosted": posted,
+        "experienceRequirements": {"@type": "OccupationalExperienceRequirements", "monthsOfExperience": years * 12},
+        "hiringOrganization": {"@type": "Organization", "name": "Local Corp"},
+    }
+    if "indeed." in url:
+        body = (
+            '<div itemscope itemtype="https://schema.org/JobPosting">'
+            f'<h1 itemprop="title">{job["job_title"]}</h1>'
+            '<div itemprop="hiringOrganization" itemscope itemtype="https://schema.org/Organization"><span itemprop="name">Local Corp</span></div>'
+            f'<meta itemprop="datePosted" content="{posted}">'
+            f'<div itemprop="description" id="jobDescriptionText"><p>{job["job_description"]}</p><p>{years}+ years of experience</p></div>'
+            '</div>'
+        )
+        return f"<html><head>{head}</head><body>{body}</body></html>"
+    data = {"@context": "https://schema.org", "@graph": [{"@type": "WebPage", "name": job["job_title"]}, posting]} if "wuzzuf." in url else posting
+    return f'<html><head>{head}<script type="application/ld+json">{json.dumps(data)}</script></head><body><h1>{job["job_title"]}</h1></body></html>'
+
+
+class LocalJobPageTransport(httpx.AsyncBaseTransport):
+    """stand-in for the job boards themselves (the pages the scraper GETs before trying Firecrawl)"""
+
+    def __init__(self):
+        self.behavior = LocalProviderBehavior("job_pages")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            await self.behavior.acall()
+        except LocalRateLimitError:
+            return httpx.Response(429, request=request)
+        except LocalProviderError:
+            return httpx.Response(503, request=request)
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, text=_job_page(str(request.url)), request=request)
+
+
+# ---------------- LLMs ----------------
+
+def _criteria_answer(prompt: str) -> dict:
+    user_input = re.search(r"'Job_title': '([^']+)'", prompt)
+    title = user_input.group(1) if user_input else "Software Engineer"
+    return {
+        "job_title": [title],
+        "preferred_skills": ["Python"],
+        "experience_level": "Junior",
+        "min_years_experience": 1,
+        "locations": ["Cairo"],
+        "remote_preference": "any",
+        "specified_websites": [],
+        "search_queries": [f"{title} jobs {suffix}" for suffix in ("remote", "Cairo", "hiring", "site:linkedin.com/jobs")],
+    }
+
+
+def _search_answer(prompt: str) -> dict:
+    criteria = _first_json_object(prompt, '"search_queries"')
+    queries = criteria if isinstance(criteria, list) and criteria else ["software engineer jobs"]
+    # same path the search agent's tool takes (shared stand-in client + search cache)
+    from app.tools.search_cache import get_search_cache
+    from app.tools.search_tools import search_tavily
+    results = []
+    for query in queries:
+        for result in get_search_cache().get_or_fetch(query, search_tavily)["results"]:
+            results.append({
+                "title": result["title"],
+                "url": result["url"],
+                "score": result["score"] * 10,
+                "search_query": query,
+                "platform": "Other",
+                "relevance_notes": "local stand-in result",
+            })
+    return {"results": results}
+
+
+class LocalCrewLLM(BaseLLM):
+    """stand-in for the CrewAI LLMs (analyst + search agent), answers with the JSON the task expects"""
+
+    def __init__(self, model: str = "local/stand-in", temperature: Optional[float] = 0):
+        super().__init__(model=model, temperature=temperature)
+        self.behavior = LocalProviderBehavior(model)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> str:
+        self.behavior.call()
+        prompt = _messages_text(messages)
+        if "AllJobSearchResults" in prompt:
+            answer = _search_answer(prompt)
+        else:
+            answer = _criteria_answer(prompt)
+        return "Thought: I now can give a great answer\nFinal Answer: " + json.dumps(answer)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128_000
+
+
+def _analyze(job: dict) -> dict:
+    rank = 1 + _stable_int(job.get("job_url", "")) % 5
+    return {
+        "matches_user_req": rank >= 2,
+        "job_title": job.get("job_title", ""),
+        "job_description": job.get("job_description", "")[:200],
+        "job_url": job.get("job_url", ""),
+        "agent_recommendation_rank": rank,
+        "agent_recommendation_notes": ["local stand-in analysis"],
+    }
+
+
+class LocalChatModel(BaseChatModel):
+    """stand-in for the LangGraph chat model, scores the job(s) in the prompt deterministically"""
+
+    provider: str = "local-chat"
+    behavior: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.behavior = LocalProviderBehavior(self.provider)
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-stand-in"
+
+    def _answer(self, messages: List[BaseMessage], json_mode: bool = False) -> ChatResult:
+        prompt = _messages_text(messages)
+        jobs = _first_json_object(prompt, "Jobs Data to Analyze:")
+        if isinstance(jobs, list):
+            content = json.dumps({"jobs": [_analyze(job) for job in jobs]})
+        else:
+            job = _first_json_object(prompt, "Job Data to Analyze:") or {}
+            content = json.dumps(_analyze(job))
+        # without a JSON mode the real models sometimes wrap the JSON in prose / code fences
+        if not json_mode and random.random() < LOCAL_PROVIDER_MALFORMED_RATE:
+            content = random.choice([
+                "```json\n{}\n```",
+                "Here is the analysis:\n{}",
+                "{}\nLet me know if you need anything else.",
+            ]).format(content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    @staticmethod
+    def _json_mode(kwargs) -> bool:
+        return "response_format" in kwargs or "nvext" in kwargs
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.behavior.call()
+        return self._answer(messages, self._json_mode(kwargs))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await self.behavior.acall()
+        return self._answer(messages, self._json_mode(kwargs))
+
+
+# ---------------- SMTP ----------------
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    "just enough SMTP for smtplib (EHLO, AUTH, MAIL, RCPT, DATA, NOOP, RSET, QUIT)"
+
+    def _reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server: "LocalSMTPServer" = self.server.stand_in
+        self._reply("220 localhost local SMTP stand-in")
+        mail_from, recipients = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "HELO":
+                self._reply("250 localhost")
+            elif verb == "AUTH":
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, recipients = line.decode(errors="replace").strip(), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(line.decode(errors="replace").strip())
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    data.append(chunk)
+                try:
+                    server.behavior.call()
+                except LocalRateLimitError:
+                    self._reply("421 4.7.0 Try again later")
+                    continue
+                except LocalProviderError:
+                    self._reply("451 4.3.0 Local stand-in error")
+                    continue
+                server.received.append((mail_from, recipients, b"".join(data)))
+                self._reply("250 OK queued")
+            elif verb in ("NOOP", "RSET"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPServer:
+    """stand-in for the Gmail SMTP server, accepts (and keeps) every message on a local port"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.behavior = LocalProviderBehavior("smtp")
+        self.received = deque(maxlen=1000)
+        self._server = _ThreadingSMTPServer((host, port), _SMTPHandler)
+        self._server.stand_in = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-smtp", daemon=True)
+
+    def start(self) -> "LocalSMTPServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        return {"received": len(self.received), **self.behavior.stats()}
+
+
+@lru_cache(maxsize=None)
+def get_local_smtp_server() -> LocalSMTPServer:
+    print("--- Starting the local SMTP stand-in (This will run only once) ---")
+    return LocalSMTPServer().start()
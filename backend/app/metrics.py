@@ -0,0 +1,242 @@
+"""
+Prometheus metrics for the pipeline, exposed on GET /metrics
+
+- dawrly_stage_duration_seconds{stage}           every crew stage (analyst, search, scrutinizer, report, email)
+- dawrly_graph_node_duration_seconds{node}       every LangGraph node of the job scrutinizer
+- dawrly_provider_call_duration_seconds{provider,outcome}   every call to an external provider
+- dawrly_skipped_urls_total{reason}              URLs the scrutinizer dropped and why
+- dawrly_cache_lookups_total{cache,result}       scrape/search cache hits, misses and coalesced lookups
+- dawrly_provider_rate_limited_total{provider}   429s we got back
+- dawrly_runs_in_flight                          pipeline runs currently running
+- dawrly_startup_seconds{phase}                  how long the API took to import / to warm up
+- dawrly_llm_responses_total{outcome}            scrutinizer LLM responses: valid JSON, repaired, or wasted (dropped)
+- dawrly_scrapes_total{source}                   where the scraped postings came from (json_ld, microdata, html, opengraph, firecrawl)
+- dawrly_llm_tokens{kind,direction}              tokens of every scrutinizer LLM call (single/batch, prompt/completion)
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+# the stage names initialize_crew reports -> the label we use for them
+STAGE_LABELS = {
+    "analyzing": "analyst",
+    "searching": "search",
+    "scrutinizing": "scrutinizer",
+    "reporting": "report",
+    "emailing": "email",
+}
+
+STAGE_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 900, 1800, float("inf"))
+TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000, float("inf"))
+CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float("inf"))
+
+
+STAGE_SECONDS = Histogram(
+    "dawrly_stage_duration_seconds",
+    "Wall time of every stage of a pipeline run",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+NODE_SECONDS = Histogram(
+    "dawrly_graph_node_duration_seconds",
+    "Wall time of every node of the job scrutinizer graph",
+    ["node"],
+    buckets=CALL_BUCKETS,
+)
+
+PROVIDER_SECONDS = Histogram(
+    "dawrly_provider_call_duration_seconds",
+    "Latency of the calls to the external providers",
+    ["provider", "outcome"],
+    buckets=CALL_BUCKETS,
+)
+
+SKIPPED_URLS = Counter(
+    "dawrly_skipped_urls_total",
+    "URLs the job scrutinizer dropped, by reason",
+    ["reason"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "dawrly_cache_lookups_total",
+    "Cache lookups by cache and result (hit/miss/coalesced)",
+    ["cache", "result"],
+)
+
+RATE_LIMITED = Counter(
+    "dawrly_provider_rate_limited_total",
+    "429 responses we got from the providers",
+    ["provider"],
+)
+
+RUNS_IN_FLIGHT = Gauge(
+    "dawrly_runs_in_flight",
+    "Pipeline runs currently in progress",
+)
+
+# wasted / total is the share of LLM calls (and of the scrapes behind them) thrown away,
+# (repaired + wasted) / total is what it would be without the JSON repair
+LLM_RESPONSES = Counter(
+    "dawrly_llm_responses_total",
+    "Scrutinizer LLM responses by outcome (valid/repaired/wasted)",
+    ["outcome"],
+)
+
+SCRAPES = Counter(
+    "dawrly_scrapes_total",
+    "Scraped job postings by where the data came from",
+    ["source"],
+)
+
+LLM_TOKENS = Histogram(
+    "dawrly_llm_tokens",
+    "Tokens per scrutinizer LLM call",
+    ["kind", "direction"],
+    buckets=TOKEN_BUCKETS,
+)
+
+STARTUP_SECONDS = Gauge(
+    "dawrly_startup_seconds",
+    "Time spent starting the API by phase (import, warmup)",
+    ["phase"],
+)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "429" in str(error) or "rate limit" in str(error).lower()
+
+
+@contextmanager
+def track_provider_call(provider: str):
+    "time a provider call, a 429 gets counted on top of the error outcome"
+    started = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except Exception as e:
+        if is_rate_limit_error(e):
+            outcome = "rate_limited"
+            RATE_LIMITED.labels(provider=provider).inc()
+        else:
+            outcome = "error"
+        raise
+    finally:
+        PROVIDER_SECONDS.labels(provider=provider, outcome=outcome).observe(time.perf_counter() - started)
+
+
+def observe_node(node: str):
+    "decorator timing a LangGraph node (sync or async)"
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    NODE_SECONDS.labels(node=node).observe(time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                NODE_SECONDS.labels(node=node).observe(time.perf_counter() - started)
+        return wrapper
+
+    return decorator
+
+
+def record_skip(reason: str):
+    SKIPPED_URLS.labels(reason=reason).inc()
+
+
+def record_cache_lookup(cache: str, result: str):
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+
+
+def record_scrape(source: str):
+    SCRAPES.labels(source=source).inc()
+
+
+def scrape_counts() -> dict:
+    "{source: count} of the scraped postings so far (this process)"
+    counts = {}
+    for metric in SCRAPES.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_total"):
+                counts[sample.labels["source"]] = int(sample.value)
+    return counts
+
+
+def record_llm_response(outcome: str):
+    LLM_RESPONSES.labels(outcome=outcome).inc()
+
+
+def llm_response_counts() -> dict:
+    "{outcome: count} of the LLM responses so far (this process)"
+    counts = {"valid": 0, "repaired": 0, "wasted": 0}
+    for metric in LLM_RESPONSES.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_total"):
+                counts[sample.labels["outcome"]] = int(sample.value)
+    return counts
+
+
+def record_llm_tokens(kind: str, prompt_tokens: int, response=None):
+    "the prompt tokens (counted by us) and, when the provider reports its usage, the completion tokens of one call"
+    LLM_TOKENS.labels(kind=kind, direction="prompt").observe(prompt_tokens)
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("output_tokens"):
+        LLM_TOKENS.labels(kind=kind, direction="completion").observe(usage["output_tokens"])
+
+
+def llm_token_stats() -> dict:
+    "{kind: {calls, mean_prompt_tokens}} of the LLM calls so far (this process)"
+    totals = {}
+    for metric in LLM_TOKENS.collect():
+        for sample in metric.samples:
+            if sample.labels.get("direction") != "prompt":
+                continue
+            entry = totals.setdefault(sample.labels["kind"], {"calls": 0, "tokens": 0})
+            if sample.name.endswith("_count"):
+                entry["calls"] = int(sample.value)
+            elif sample.name.endswith("_sum"):
+                entry["tokens"] = int(sample.value)
+    return {
+        kind: {"calls": entry["calls"], "mean_prompt_tokens": round(entry["tokens"] / entry["calls"]) if entry["calls"] else 0}
+        for kind, entry in totals.items()
+    }
+
+
+class StageTracker:
+    "turns the stage transitions of one run into stage durations"
+
+    def __init__(self):
+        self._current = None
+        self._started = None
+
+    def enter(self, stage: str):
+        self.finish()
+        self._current = STAGE_LABELS.get(stage, stage)
+        self._started = time.perf_counter()
+
+    def finish(self):
+        if self._current is not None:
+            STAGE_SECONDS.labels(stage=self._current).observe(time.perf_counter() - self._started)
+        self._current = None
+
+
+def render_metrics():
+    "the body and the content type for the /metrics endpoint"
+    return generate_latest(), CONTENT_TYPE_LATEST
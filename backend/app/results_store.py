@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Set
+
+from config import RESULTS_DB_PATH, RESULTS_DIR, RESULTS_STORE
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# the outputs every run persists (same names as the old ./results files)
+STEP_1_CRITERIA = "step_1_job_requirements_analysis"
+STEP_2_SEARCH_RESULTS = "step_2_job_search_results"
+STEP_3_JOBS = "step_3_job_scrutinizer_results"
+
+
+class ResultsStore(ABC):
+    """
+    Where the outputs of the runs get persisted
+
+    Nothing in the pipeline reads them back on the hot path (the stages hand their outputs over
+    in memory through the RunContext), they're kept for debugging and for the user's report.
+    """
+
+    @abstractmethod
+    def save_step(self, user_id: str, step: str, data: dict):
+        ...
+
+    @abstractmethod
+    def load_step(self, user_id: str, step: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def save_report(self, user_id: str, html: str):
+        ...
+
+
+class FileResultsStore(ResultsStore):
+    "RESULTS_DIR/<user_id>/<step>.json and RESULTS_DIR/<user_id>/final_result.html"
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _run_dir(self, user_id: str) -> Path:
+        run_dir = self.root / user_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        return run_dir
+
+    def save_step(self, user_id: str, step: str, data: dict):
+        with open(self._run_dir(user_id) / f"{step}.json", "w") as f:
+            json.dump(data, f, indent=2)
+
+    def load_step(self, user_id: str, step: str) -> Optional[dict]:
+        try:
+            with open(self.root / user_id / f"{step}.json") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save_report(self, user_id: str, html: str):
+        with open(self._run_dir(user_id) / "final_result.html", "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+class SQLiteResultsStore(ResultsStore):
+    "one row per (run, step), the report is just another step"
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        # autocommit connection, one per call so it's safe from any thread
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS run_results (
+                    user_id TEXT NOT NULL,
+                    step TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (user_id, step)
+                )
+                """
+            )
+
+    def _save(self, user_id: str, step: str, content: str):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO run_results (user_id, step, content, updated_at) VALUES (?, ?, ?, ?)",
+                (user_id, step, content, datetime.now(timezone.utc).isoformat()),
+            )
+
+    def save_step(self, user_id: str, step: str, data: dict):
+        self._save(user_id, step, json.dumps(data))
+
+    def load_step(self, user_id: str, step: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT content FROM run_results WHERE user_id = ? AND step = ?", (user_id, step)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_report(self, user_id: str, html: str):
+        self._save(user_id, "final_result.html", html)
+
+
+class BackgroundResultsWriter:
+    """
+    Persists the run outputs without making the pipeline wait for the disk
+
+    every save runs in a worker thread, `drain` waits for the pending ones (eg. on shutdown)
+    a failed save only gets logged, the run itself doesn't depend on it
+    """
+
+    def __init__(self, store: ResultsStore):
+        self.store = store
+        self._pending: Set[asyncio.Task] = set()
+
+    def _submit(self, func, *args):
+        try:
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(self._run, func, *args))
+        except RuntimeError:
+            # no event loop (a script / the CLI) -> just do it here
+            self._run(func, *args)
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    @staticmethod
+    def _run(func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            logger.exception(f"Failed to persist the run results ({func.__name__}) : {e}")
+
+    def save_step(self, user_id: str, step: str, data: dict):
+        self._submit(self.store.save_step, user_id, step, data)
+
+    def save_report(self, user_id: str, html: str):
+        self._submit(self.store.save_report, user_id, html)
+
+    def load_step(self, user_id: str, step: str) -> Optional[dict]:
+        return self.store.load_step(user_id, step)
+
+    async def drain(self):
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+
+@lru_cache(maxsize=None)
+def get_results_writer() -> BackgroundResultsWriter:
+    """Initializes and returns the shared results writer."""
+    print("--- Initializing Results Store (This will run only once) ---")
+    if RESULTS_STORE == "sqlite":
+        store = SQLiteResultsStore(RESULTS_DB_PATH)
+    else:
+        store = FileResultsStore(RESULTS_DIR)
+    return BackgroundResultsWriter(store)
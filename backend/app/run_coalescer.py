@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.metrics import record_cache_lookup
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SharedRun:
+    "one in-flight pipeline execution and the stage listeners of every run attached to it"
+
+    def __init__(self):
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.listeners: List[Callable[[str], None]] = []
+        self.stage: Optional[str] = None
+        self.attached = 1
+
+    def report_stage(self, stage: str):
+        "the shared stages show up in the status of every attached run"
+        self.stage = stage
+        for listener in list(self.listeners):
+            listener(stage)
+
+    def attach(self, on_stage: Callable[[str], None]):
+        self.listeners.append(on_stage)
+        # a late joiner catches up with the stage the execution is at
+        if self.stage is not None:
+            on_stage(self.stage)
+
+    def detach(self, on_stage: Callable[[str], None]):
+        if on_stage in self.listeners:
+            self.listeners.remove(on_stage)
+
+
+class RunCoalescer:
+    """
+    Singleflight for the pipeline: concurrent runs of equivalent requests share one execution
+
+    - keyed by the canonical request profile (criteria_cache_key), the first run executes the
+      shared stages and the ones coming in while it's in flight attach to it and wait for its result
+    - errors are shared too, a cancelled leader (shutdown) isn't: its followers start over
+    - only meant for the event loop, no locking
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, SharedRun] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, execute: Callable[[SharedRun], Awaitable[T]], on_stage: Callable[[str], None]) -> Tuple[T, bool]:
+        """
+        execute(shared_run) once for every group of concurrent runs with the same key,
+        returns its result and whether this run was the one executing it
+        """
+        while True:
+            shared = self._inflight.get(key)
+            if shared is None:
+                break
+
+            self.coalesced += 1
+            shared.attached += 1
+            record_cache_lookup("pipeline", "coalesced")
+            logger.info(f"An equivalent run is in flight, attaching to it ({shared.attached} runs)")
+            shared.attach(on_stage)
+            try:
+                # shielded so a follower getting cancelled doesn't cancel the execution of everyone else
+                return await asyncio.shield(shared.future), False
+            except asyncio.CancelledError:
+                if not shared.future.cancelled():
+                    raise
+                # the leader got cancelled, not us -> go again (maybe as the new leader)
+            finally:
+                # done, cancelled or starting over, this run doesn't follow the execution anymore
+                shared.detach(on_stage)
+
+        shared = SharedRun()
+        shared.attach(on_stage)
+        self._inflight[key] = shared
+        self.executions += 1
+        record_cache_lookup("pipeline", "miss")
+        try:
+            result = await execute(shared)
+        except asyncio.CancelledError:
+            shared.future.cancel()
+            raise
+        except BaseException as e:
+            shared.future.set_exception(e)
+            # retrieved here so a run without followers doesn't log "exception was never retrieved"
+            shared.future.exception()
+            raise
+        else:
+            shared.future.set_result(result)
+            return result, True
+        finally:
+            if self._inflight.get(key) is shared:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+@lru_cache(maxsize=None)
+def get_run_coalescer() -> RunCoalescer:
+    """Initializes and returns the shared pipeline coalescer."""
+    print("--- Initializing Run Coalescer (This will run only once) ---")
+    return RunCoalescer()
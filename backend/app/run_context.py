@@ -0,0 +1,63 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.agents.job_requirement_analyst import JobSearchCriteria
+from app.agents.search_agent import AllJobSearchResults
+from app.results_store import STEP_1_CRITERIA, STEP_2_SEARCH_RESULTS, STEP_3_JOBS
+
+
+class RunContext(BaseModel):
+    """
+    Everything one pipeline run hands from a stage to the next one, kept in memory
+
+    analyst -> criteria, search -> search_results, scrutinizer -> jobs, report -> report_html
+    (the results store only gets a copy of each of them, in the background)
+    """
+
+    run_id: str
+    user_id: str
+    email: str
+    user_input: dict
+
+    criteria: Optional[JobSearchCriteria] = None
+    search_results: Optional[AllJobSearchResults] = None
+    jobs: List[dict] = Field(default_factory=list)
+    scrutinized: bool = False
+    report_html: Optional[str] = None
+
+    def restore(self, results_store) -> List[str]:
+        """
+        fill in the stage outputs this run already persisted (a requeued run that died halfway)
+        returns the stages that don't have to run again
+        """
+        restored = []
+
+        criteria = results_store.load_step(self.user_id, STEP_1_CRITERIA)
+        if criteria is None:
+            return restored
+        self.criteria = JobSearchCriteria.model_validate(criteria)
+        restored.append("analyzing")
+
+        search_results = results_store.load_step(self.user_id, STEP_2_SEARCH_RESULTS)
+        if search_results is None:
+            return restored
+        self.search_results = AllJobSearchResults.model_validate(search_results)
+        restored.append("searching")
+
+        jobs = results_store.load_step(self.user_id, STEP_3_JOBS)
+        if jobs is None:
+            return restored
+        self.jobs = jobs.get("jobs", [])
+        self.scrutinized = True
+        restored.append("scrutinizing")
+        return restored
+
+
+def task_output_as(output, model):
+    "the (pydantic) output of a CrewAI task, whatever form CrewAI managed to parse it in"
+    if isinstance(output.pydantic, model):
+        return output.pydantic
+    if output.json_dict:
+        return model(**output.json_dict)
+    return model.model_validate_json(output.raw)
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from diskcache import Cache
+
+from app.metrics import record_cache_lookup
+from app.tools.search_cache import normalize_query
+from config import CRITERIA_CACHE_DIR, CRITERIA_CACHE_TTL_HOURS
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _normalized_set(*values) -> list:
+    "every item of every list case-folded, deduped and sorted (the order the user typed them in doesn't matter)"
+    items = set()
+    for value in values:
+        for item in _as_list(value):
+            item = normalize_query(str(item))
+            if item:
+                items.add(item)
+    return sorted(items)
+
+
+def criteria_cache_key(user_input: dict) -> str:
+    """
+    The key of a UserJobSearchRequest (without the email) in the criteria cache
+
+    two requests asking for the same thing get the same key, eg.
+    {"Job_title": "Junior ML Engineer", "skills": ["PyTorch", "python"], "locations": "Cairo", ...}
+    {"Job_title": "junior ml  engineer", "skills": ["Python", "PyTorch"], "locations": ["cairo"], ...}
+    """
+    min_years = user_input.get("min_years_experience") or 0
+    canonical = {
+        "job_title": normalize_query(user_input.get("Job_title", "")),
+        "skills": _normalized_set(user_input.get("skills"), user_input.get("preferred_skills")),
+        "experience_level": normalize_query(user_input.get("experience_level", "")),
+        "min_years_experience": int(min_years) if str(min_years).isdigit() else 0,
+        "locations": _normalized_set(user_input.get("locations")),
+        "remote_preference": _normalized_set(user_input.get("remote_preference")),
+        "job_type": _normalized_set(user_input.get("job_type")),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+class CriteriaCache:
+    """
+    A disk-backed cache for the analyst output (step 1 JobSearchCriteria), shared by every run
+
+    - keyed by criteria_cache_key so equivalent requests skip the analyst LLM completely
+    - entries expire after `ttl_seconds` (the search queries carry recency hints, they shouldn't live forever)
+    - keeps hit/miss counters for this process
+    """
+
+    def __init__(self, directory, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._cache = Cache(str(directory))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_input: dict) -> Optional[dict]:
+        "the cached criteria (JobSearchCriteria dump) for this request or None"
+        value = self._cache.get(criteria_cache_key(user_input))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        record_cache_lookup("criteria", "miss" if value is None else "hit")
+        return value
+
+    def set(self, user_input: dict, criteria: dict):
+        self._cache.set(criteria_cache_key(user_input), criteria, expire=self.ttl_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._cache),
+            }
+
+    def clear(self):
+        self._cache.clear()
+
+
+@lru_cache(maxsize=None)
+def get_criteria_cache() -> CriteriaCache:
+    """Initializes and returns the shared analyst criteria cache."""
+    print("--- Initializing Criteria Cache (This will run only once) ---")
+    return CriteriaCache(
+        directory=CRITERIA_CACHE_DIR,
+        ttl_seconds=CRITERIA_CACHE_TTL_HOURS * 3600,
+    )
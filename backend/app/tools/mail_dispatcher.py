@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import random
+import smtplib
+import time
+from email.message import Message
+from functools import lru_cache
+from typing import Optional
+
+from app.metrics import track_provider_call
+from config import (
+    CONFIG,
+    MAIL_MAX_RETRIES,
+    MAIL_QUEUE_SIZE,
+    MAIL_RETRY_BACKOFF_SECONDS,
+    PROVIDER_MODE,
+    SMTP_HOST,
+    SMTP_POOL_SIZE,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+)
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# a connection that sat idle longer than this gets a NOOP before it's used (Gmail drops idle ones)
+KEEPALIVE_CHECK_SECONDS = 60
+
+
+def _is_permanent(error: Exception) -> bool:
+    "5xx answers (bad recipient, bad credentials, ...) won't get better with a retry"
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+class _PooledConnection:
+    "one authenticated SMTP connection, opened lazily and reopened whenever it breaks"
+
+    def __init__(self, dispatcher: "MailDispatcher"):
+        self.dispatcher = dispatcher
+        self.server: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+
+    def _open(self):
+        d = self.dispatcher
+        server = smtplib.SMTP(d.host, d.port, timeout=d.timeout)
+        try:
+            if d.starttls:
+                server.starttls()
+            if d.username:
+                server.login(d.username, d.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.dispatcher.connections_opened += 1
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                self.server.close()
+            self.server = None
+
+    def send(self, message: Message):
+        "blocking, runs in a worker thread"
+        if self.server is not None and time.monotonic() - self.last_used > KEEPALIVE_CHECK_SECONDS:
+            try:
+                if self.server.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.server = None
+        if self.server is None:
+            self._open()
+        try:
+            self.server.send_message(message)
+        except smtplib.SMTPResponseException as e:
+            # 421 -> the server closed the connection on us, any other answer leaves it usable
+            if e.smtp_code == 421:
+                self.server = None
+            raise
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # the connection is gone, the next attempt opens a fresh one
+            self.server = None
+            raise
+        finally:
+            self.last_used = time.monotonic()
+
+
+class MailDispatcher:
+    """
+    Sends the emails in the background through a small pool of reused SMTP connections
+
+    - `enqueue` only puts the message on a bounded queue, the pipeline never waits for the delivery
+    - `pool_size` workers drain the queue, each one keeps its own authenticated connection open
+      (so the connect / STARTTLS / login handshake happens once per connection, not once per email)
+    - failed sends are retried `max_retries` times with exponential backoff (+ jitter), 5xx answers aren't retried
+    - when the queue is full the email is dropped and enqueue returns False
+    """
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None, starttls: bool = True,
+                 pool_size: int = 2, queue_size: int = 100, max_retries: int = 3, backoff_seconds: float = 2,
+                 timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.pool_size = max(1, pool_size)
+        self.queue_size = max(1, queue_size)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._connections = []
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self.connections_opened = 0
+
+    # ---------------- lifecycle ----------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        # first use (or a new event loop, eg. a second asyncio.run in a script)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._connections = [_PooledConnection(self) for _ in range(self.pool_size)]
+        self._workers = [
+            loop.create_task(self._worker(connection), name=f"mail-worker-{i}")
+            for i, connection in enumerate(self._connections)
+        ]
+
+    async def start(self):
+        self._ensure_started()
+
+    async def stop(self, timeout: float = 30):
+        "wait (up to `timeout`) for the queued emails to go out, then close the connections"
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Mail dispatcher stopped with {self._queue.qsize()} emails still queued")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await asyncio.gather(*(asyncio.to_thread(connection.close) for connection in self._connections))
+        self._workers = []
+        self._connections = []
+
+    # ---------------- sending ----------------
+
+    def enqueue(self, message: Message) -> bool:
+        """
+        queue the message for delivery and return right away
+        True if it got queued, False if the queue is full
+
+        has to be called from the event loop, without a running loop the message is sent right here (blocking)
+        """
+        try:
+            self._ensure_started()
+        except RuntimeError:
+            return self.send_now(message)
+
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Mail queue is full ({self.queue_size}), dropping the email to {message['To']}")
+            return False
+
+    def send_now(self, message: Message) -> bool:
+        "blocking delivery with the same retries, for callers outside of an event loop"
+        connection = _PooledConnection(self)
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    with track_provider_call("smtp"):
+                        connection.send(message)
+                    self.sent += 1
+                    return True
+                except Exception as e:
+                    if _is_permanent(e) or attempt == self.max_retries:
+                        logger.error(f"Failed to send the email to {message['To']} : {e}")
+                        self.failed += 1
+                        return False
+                    self.retries += 1
+                    time.sleep(self._backoff(attempt))
+        finally:
+            connection.close()
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def _deliver(self, connection: _PooledConnection, message: Message):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with track_provider_call("smtp"):
+                    await asyncio.to_thread(connection.send, message)
+                self.sent += 1
+                logger.info(f"Email sent to {message['To']}")
+                return
+            except Exception as e:
+                if _is_permanent(e) or attempt == self.max_retries:
+                    self.failed += 1
+                    logger.error(f"Giving up on the email to {message['To']} after {attempt + 1} attempts : {e}")
+                    return
+                self.retries += 1
+                delay = self._backoff(attempt)
+                logger.warning(f"Sending the email to {message['To']} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _worker(self, connection: _PooledConnection):
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(connection, message)
+            except Exception as e:
+                logger.exception(f"Mail worker failed on the email to {message['To']} : {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "connections_opened": self.connections_opened,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_mail_dispatcher() -> MailDispatcher:
+    """Initializes and returns the shared mail dispatcher."""
+    print("--- Initializing Mail Dispatcher (This will run only once) ---")
+
+    if PROVIDER_MODE == "local":
+        # the local SMTP stand-in, same code path as the real thing without sending anything out
+        from app.local_providers import get_local_smtp_server
+        server = get_local_smtp_server()
+        return MailDispatcher(
+            host=server.host,
+            port=server.port,
+            username="local",
+            password="local",
+            starttls=False,
+            pool_size=SMTP_POOL_SIZE,
+            queue_size=MAIL_QUEUE_SIZE,
+            max_retries=MAIL_MAX_RETRIES,
+            backoff_seconds=MAIL_RETRY_BACKOFF_SECONDS,
+        )
+
+    return MailDispatcher(
+        host=SMTP_HOST,
+        port=SMTP_PORT,
+        username=CONFIG['EMAIL'],
+        password=CONFIG['EMAIL_PASSWORD'],
+        starttls=SMTP_STARTTLS,
+        pool_size=SMTP_POOL_SIZE,
+        queue_size=MAIL_QUEUE_SIZE,
+        max_retries=MAIL_MAX_RETRIES,
+        backoff_seconds=MAIL_RETRY_BACKOFF_SECONDS,
+    )
@@ -1,23 +1,31 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 import os
-from dotenv import load_dotenv
 from pathlib import Path
 
+from app.tools.mail_dispatcher import get_mail_dispatcher
+from config import CONFIG
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-def send_email(to_email, user_id : str,html_file_path=None , error=False , jobs=1):
+def send_email(to_email, user_id : str,html_file_path=None , error=False , jobs=1, html_content=None):
 
     """
         this function is used to send an email to the user containing the results of the Dawrly Crew 
         it send it as an HTML to be directly rendered from the user
         and it send the actual file aswell !
+
+        the email only gets queued here, the mail dispatcher delivers it in the background
+        returns True if it got queued
+        html_content is the already rendered report, when given nothing is read from disk
     """
 
     # Set default path and ensure results directory exists
-    if (html_file_path is None) and (error == False):
+    if html_content is not None and not error:
+        html_file_path = html_file_path or "final_result.html"
+
+    elif (html_file_path is None) and (error == False):
         results_dir = BASE_DIR / "results"
         results_dir.mkdir(exist_ok=True)
         html_file_path = str(results_dir / f"{user_id}/final_result.html")
@@ -38,11 +46,11 @@ def send_email(to_email, user_id : str,html_file_path=None , error=False , jobs=
 
 
     
-    load_dotenv()
-    from_email = os.getenv('EMAIL')
-    password   = os.getenv('EMAIL_PASSWORD')
+    from_email = CONFIG['EMAIL']
 
-    html_content = read_file_content(html_file_path)
+    # the error templates never change -> read them once
+    if html_content is None or error:
+        html_content = read_template(html_file_path) if error else read_file_content(html_file_path)
     if not html_content:
         return False
    
@@ -56,25 +64,28 @@ def send_email(to_email, user_id : str,html_file_path=None , error=False , jobs=
     html_part = MIMEText(html_content, 'html', 'utf-8')
     msg.attach(html_part)
     
-    # Attach the HTML file
-    with open(html_file_path, "rb") as file:
-        attachment = MIMEApplication(file.read(), Name=os.path.basename(html_file_path))
+    # Attach the HTML file (same content as the body, no need to read it again)
+    attachment = MIMEApplication(html_content.encode('utf-8'), Name=os.path.basename(html_file_path))
     
     attachment['Content-Disposition'] = f'attachment; filename="{os.path.basename(html_file_path)}"'
     msg.attach(attachment)
    
-    # Send via Gmail SMTP
-    try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(from_email, password)
-        server.send_message(msg)
-        server.quit()
-        print("Email sent successfully!")
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+    # Send via Gmail SMTP (pooled connections, retried in the background)
+    return get_mail_dispatcher().enqueue(msg)
+
+
+# file path -> content of the templates read so far
+_templates = {}
+
+
+def read_template(file_path):
+    "read once and kept, only when the read worked (a missing template gets tried again on the next email)"
+    html_content = _templates.get(file_path)
+    if not html_content:
+        html_content = read_file_content(file_path)
+        if html_content:
+            _templates[file_path] = html_content
+    return html_content
 
 
 def read_file_content(file_path=None):
@@ -0,0 +1,71 @@
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from diskcache import Cache
+
+from app.metrics import record_cache_lookup
+from app.tools.urls import canonicalize_url
+from config import SCRAPE_CACHE_DIR, SCRAPE_CACHE_SIZE_MB, SCRAPE_CACHE_TTL_HOURS
+
+
+class ScrapeCache:
+    """
+    A disk-backed cache for the Firecrawl scrapes, shared by every run (and every process on the same disk)
+
+    - keyed by the canonical URL so tracking params, mobile subdomains etc. don't cause misses
+    - entries expire after `ttl_seconds`
+    - once the cache grows past `size_limit_bytes` the least recently used entries get evicted
+    - keeps hit/miss counters for this process
+    """
+
+    def __init__(self, directory, ttl_seconds: float, size_limit_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self._cache = Cache(
+            str(directory),
+            size_limit=size_limit_bytes,
+            eviction_policy="least-recently-used",
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[dict]:
+        "the cached scrape for this URL or None if it's not there (or it expired)"
+        value = self._cache.get(canonicalize_url(url))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        record_cache_lookup("scrape", "miss" if value is None else "hit")
+        return value
+
+    def set(self, url: str, value: dict):
+        self._cache.set(canonicalize_url(url), value, expire=self.ttl_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self._cache),
+            "size_bytes": self._cache.volume(),
+        }
+
+    def clear(self):
+        self._cache.clear()
+
+
+@lru_cache(maxsize=None)
+def get_scrape_cache() -> ScrapeCache:
+    """Initializes and returns the shared Firecrawl scrape cache."""
+    print("--- Initializing Scrape Cache (This will run only once) ---")
+    return ScrapeCache(
+        directory=SCRAPE_CACHE_DIR,
+        ttl_seconds=SCRAPE_CACHE_TTL_HOURS * 3600,
+        size_limit_bytes=SCRAPE_CACHE_SIZE_MB * 1024 * 1024,
+    )
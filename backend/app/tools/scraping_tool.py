@@ -1,8 +1,14 @@
-import time
+import asyncio
 from langchain_core.tools import tool
 from firecrawl import JsonConfig
 from app.clients import  get_fire_crawl_client
+from app.job_index import get_job_index
+from app.metrics import record_scrape, track_provider_call
 from app.models import ExtractedJob
+from app.tools.scrape_cache import get_scrape_cache
+from app.tools.structured_data import scrape_structured
+from app.tools.token_bucket import get_firecrawl_limiter
+from config import JOB_INDEX_ENABLED, STRUCTURED_DATA_ENABLED
 import json
 
 
@@ -13,51 +19,74 @@ import json
 
 
 
-# Global counter for web_scraping_firecrawl function
-cnt = 0
-
-
 json_config = JsonConfig(
     prompt= "Extract ```json\n" + json.dumps(ExtractedJob.model_json_schema()) + "```\n From the web page"
 )
 
+async def _store(page_url : str, job : dict):
+    "a freshly scraped posting goes in the scrape cache and the job index"
+    await asyncio.to_thread(get_scrape_cache().set, page_url, job)
+    if JOB_INDEX_ENABLED:
+        # so the next runs looking for the same kind of job find it without searching / scraping
+        try:
+            await asyncio.to_thread(get_job_index().add, page_url, job)
+        except Exception as e:
+            print(f"couldn't index {page_url} : {e}")
+
+
 @tool
-def web_scraping_firecrawl(page_url : str):
+async def web_scraping_firecrawl(page_url : str):
     """
     An AI Tool using FireCrawl to help an agent to scrape a web page
+    (pages with structured data get read directly, see app/tools/structured_data.py)
 
     Example:
-    web_scraping_firecrawl(
-        page_url="https://www.indeed.com/viewjob?jk=013dfb26c48a8ecd"
+    await web_scraping_firecrawl.ainvoke(
+        "https://www.indeed.com/viewjob?jk=013dfb26c48a8ecd"
     )
     """
-    global cnt
-    cnt += 1 
     
     scraper = get_fire_crawl_client()
     print("="*50)
     print("Visited Firecrawl tool")
-    print(f"Function call count: {cnt}")
-    
-    # Check if we need to rate limit (every 10 calls)
-    if cnt % 10 == 0:
-        print(f"Rate limit reached after {cnt} calls. Waiting 60 seconds...")
-        time.sleep(60)
-        print("Rate limit wait completed. Continuing...")
+
+    # same posting scraped recently (maybe for another user) -> no need to pay for it again
+    cache = get_scrape_cache()
+    cached = await asyncio.to_thread(cache.get, page_url)
+    if cached is not None:
+        print(f"cache hit for url : {page_url}")
+        return cached
+
+    # most boards embed the posting as structured data, then a plain GET is enough (no Firecrawl credits / LLM extraction)
+    if STRUCTURED_DATA_ENABLED:
+        job, source = await scrape_structured(page_url)
+        if job is not None:
+            print(f"structured data ({source}) for url : {page_url}")
+            record_scrape(source)
+            await _store(page_url, job)
+            return job
+
+    # wait for our turn, this only suspends this run, the event loop (and the other users) keep going
+    await get_firecrawl_limiter().acquire()
+
     try:
         print(f"processing url : {page_url}")
-        # Perform the scraping (same logic regardless of rate limiting)
-        results = scraper.scrape_url(
-            url=page_url,
-            formats=['json'],
-            json_options=json_config.model_dump(exclude_none=True),
-            only_main_content=False,
-            remove_base64_images=True,
-            block_ads=True
-        )
+        # the Firecrawl client is sync so it runs in a thread
+        with track_provider_call("firecrawl"):
+            results = await asyncio.to_thread(
+                scraper.scrape_url,
+                url=page_url,
+                formats=['json'],
+                json_options=json_config.model_dump(exclude_none=True),
+                only_main_content=False,
+                remove_base64_images=True,
+                block_ads=True
+            )
 
         if results and results.json:
             print(results.json)
+            record_scrape("firecrawl")
+            await _store(page_url, results.json)
             return results.json
         
         else : 
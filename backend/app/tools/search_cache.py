@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, Dict
+
+from cachetools import TTLCache
+
+from app.metrics import record_cache_lookup
+from config import SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL_MINUTES
+
+
+def normalize_query(query: str) -> str:
+    "case-fold and collapse the whitespace, 'Junior  Python Developer' and 'junior python developer' are the same search"
+    return " ".join((query or "").split()).casefold()
+
+
+class SearchCache:
+    """
+    An in-memory cache for the search engine results, shared by every run in the process
+
+    - keyed by the normalized query, entries live for `ttl_seconds`
+    - identical queries that are in flight at the same time are coalesced,
+      only the first caller hits the search engine and the others wait for its result
+    - thread safe (the CrewAI tools run in worker threads)
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_fetch(self, query: str, fetch: Callable[[str], dict]) -> dict:
+        "the cached result for this query, otherwise fetch(query) (once, even for concurrent callers)"
+        key = normalize_query(query)
+
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                record_cache_lookup("search", "hit")
+                return self._cache[key]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                future = Future()
+                self._inflight[key] = future
+                leader = True
+
+        record_cache_lookup("search", "miss" if leader else "coalesced")
+
+        if not leader:
+            # same query already running for someone else, just wait for it (errors are shared too)
+            return future.result()
+
+        try:
+            result = fetch(query)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = result
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._cache),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+@lru_cache(maxsize=None)
+def get_search_cache() -> SearchCache:
+    """Initializes and returns the shared search results cache."""
+    print("--- Initializing Search Cache (This will run only once) ---")
+    return SearchCache(
+        ttl_seconds=SEARCH_CACHE_TTL_MINUTES * 60,
+        maxsize=SEARCH_CACHE_MAX_ENTRIES,
+    )
@@ -1,10 +1,18 @@
 from crewai.tools import tool
 from app.clients import get_search_client 
+from app.metrics import track_provider_call
+from app.tools.search_cache import get_search_cache
+
+
+def search_tavily(query: str) -> dict:
+    "a single (uncached) Tavily search"
+    with track_provider_call("tavily"):
+        return get_search_client().search(query)
 
 
 @tool
 def tavily_search_engine_tool(query: str):
     """Useful for search-based queries. Use this to find current information about any query related pages using a search engine"""
 
-    tavliy_search_client = get_search_client()
-    return tavliy_search_client.search(query)
\ No newline at end of file
+    # same query from another user a few minutes ago (or right now) -> reuse it instead of calling Tavily again
+    return get_search_cache().get_or_fetch(query, search_tavily)
\ No newline at end of file
@@ -0,0 +1,211 @@
+import asyncio
+import html as html_lib
+import json
+import re
+from typing import Iterator, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from app.clients import get_http_client
+from app.metrics import track_provider_call
+from app.tools.urls import detect_platform
+from config import STRUCTURED_DATA_MIN_DESCRIPTION_CHARS
+
+
+# Most job boards embed the posting for search engines (schema.org JobPosting as JSON-LD or microdata),
+# so for those pages a plain GET + a parser gives us the ExtractedJob, no Firecrawl LLM extraction needed
+
+
+JOB_POSTING_TYPE_RE = re.compile(r"(^|/)JobPosting$", re.IGNORECASE)
+# "3+ years", "2-4 years", "5 yrs" ... (the first number is the minimum)
+YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:(?:-|to)\s*\d{1,2}\s*)?(?:years?|yrs?)\b", re.IGNORECASE)
+
+# per board: where the posting is in the HTML when the structured data misses a field
+# (the boards render the same data for the visitors, these are the selectors of their job pages)
+# Wuzzuf isn't here, its class names are generated but every posting page has the JSON-LD
+PLATFORM_SELECTORS = {
+    "LinkedIn": {
+        "job_title": "h1.top-card-layout__title, h1.topcard__title",
+        "job_description": "div.show-more-less-html__markup, div.description__text",
+        "posting_date": "span.posted-time-ago__text",
+    },
+    "Indeed": {
+        "job_title": "h1.jobsearch-JobInfoHeader-title, h1[data-testid='jobsearch-JobInfoHeader-title']",
+        "job_description": "div#jobDescriptionText",
+    },
+    "Glassdoor": {
+        "job_description": "div[class*='JobDetails_jobDescription']",
+    },
+}
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def _text(value) -> str:
+    "plain text out of a value that may hold HTML (JSON-LD descriptions usually do), whitespace collapsed"
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(_text(item) for item in value)
+    if isinstance(value, dict):
+        return _text(value.get("name") or value.get("description") or "")
+    # some boards HTML-escape the description inside the JSON-LD (&lt;p&gt;...)
+    value = html_lib.unescape(str(value))
+    if "<" in value and ">" in value:
+        value = BeautifulSoup(value, "html.parser").get_text(" ")
+    return " ".join(value.split())
+
+
+def _json_ld_items(soup: BeautifulSoup) -> Iterator[dict]:
+    "every JSON-LD object of the page (lists and @graph flattened)"
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or script.get_text() or "", strict=False)
+        except json.JSONDecodeError:
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop(0)
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                if isinstance(item.get("@graph"), list):
+                    stack.extend(item["@graph"])
+                yield item
+
+
+def _is_job_posting(item: dict) -> bool:
+    types = item.get("@type", [])
+    types = types if isinstance(types, list) else [types]
+    return any(JOB_POSTING_TYPE_RE.search(str(value)) for value in types)
+
+
+def _json_ld_posting(soup: BeautifulSoup) -> Optional[dict]:
+    return next((item for item in _json_ld_items(soup) if _is_job_posting(item)), None)
+
+
+def _microdata_posting(soup: BeautifulSoup) -> Optional[dict]:
+    "the schema.org JobPosting microdata of the page as a dict of its itemprops"
+    scope = soup.find(attrs={"itemtype": JOB_POSTING_TYPE_RE})
+    if scope is None:
+        return None
+    posting = {}
+    for element in scope.find_all(attrs={"itemprop": True}):
+        name = element["itemprop"]
+        # the props of the nested items (hiringOrganization's name, ...) aren't the posting's
+        if name in posting or element.find_parent(attrs={"itemscope": True}) is not scope:
+            continue
+        value = element.get("content") or element.get("datetime") or element.decode_contents()
+        posting[name] = value
+    return posting
+
+
+def _open_graph(soup: BeautifulSoup) -> dict:
+    tags = {}
+    for meta in soup.find_all("meta", attrs={"property": re.compile(r"^og:")}):
+        tags.setdefault(meta["property"][3:], meta.get("content", ""))
+    return tags
+
+
+def _select_text(soup: BeautifulSoup, selector: str) -> str:
+    element = soup.select_one(selector) if selector else None
+    return _text(element.get_text(" ")) if element is not None else ""
+
+
+def required_years(experience, description: str) -> str:
+    """
+    required_years_of_experience the way Firecrawl gives it ("3+ years"), from the posting's
+    experienceRequirements (text or OccupationalExperienceRequirements) or else from the description
+    """
+    if isinstance(experience, dict) and experience.get("monthsOfExperience"):
+        try:
+            return f"{round(float(experience['monthsOfExperience']) / 12)}+ years"
+        except (TypeError, ValueError):
+            pass
+    for text in (_text(experience), description):
+        match = YEARS_RE.search(text or "")
+        if match:
+            return f"{match.group(1)}+ years"
+    return "Not specified"
+
+
+def extract_job(html: str, url: str) -> Tuple[Optional[dict], str]:
+    """
+    The ExtractedJob (as a dict) of a job page out of its structured data, and where it came from
+
+    in order: schema.org JobPosting JSON-LD, JobPosting microdata, the board's own markup
+    (PLATFORM_SELECTORS), OpenGraph tags. The first one with the field wins, field by field.
+    Returns (None, "none") when there's no title or the description is too short to judge the job on
+    (the OpenGraph description alone usually is), the page then goes to Firecrawl.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    source = "json_ld"
+    posting = _json_ld_posting(soup)
+    if posting is None:
+        source = "microdata"
+        posting = _microdata_posting(soup)
+    if posting is None:
+        source = "html"
+        posting = {}
+
+    job = {
+        "job_title": _text(posting.get("title") or posting.get("name")),
+        "job_description": _text(posting.get("description")),
+        "posting_date": _text(posting.get("datePosted")),
+    }
+
+    # the gaps get filled from the board's markup, then from the OpenGraph tags
+    selectors = PLATFORM_SELECTORS.get(detect_platform(url), {})
+    open_graph = _open_graph(soup)
+    fallbacks_used = set()
+    for field, og_name in (("job_title", "title"), ("job_description", "description"), ("posting_date", None)):
+        if job[field]:
+            continue
+        job[field] = _select_text(soup, selectors.get(field, ""))
+        if job[field]:
+            fallbacks_used.add("html")
+        elif og_name and open_graph.get(og_name):
+            job[field] = _text(open_graph[og_name])
+            fallbacks_used.add("opengraph")
+    if not posting and "html" not in fallbacks_used:
+        source = "opengraph"
+
+    if not job["job_title"] or len(job["job_description"]) < STRUCTURED_DATA_MIN_DESCRIPTION_CHARS:
+        return None, "none"
+
+    job["job_url"] = url
+    job["required_years_of_experience"] = required_years(posting.get("experienceRequirements"), job["job_description"])
+    return job, source
+
+
+async def fetch_page(url: str) -> Optional[str]:
+    "the HTML of the page or None (blocked, not found, not HTML, ...)"
+    client = get_http_client()
+    try:
+        with track_provider_call("page_fetch"):
+            response = await client.get(url, headers=BROWSER_HEADERS)
+    except Exception as e:
+        print(f"couldn't fetch {url} : {e}")
+        return None
+    if response.status_code != 200 or "html" not in response.headers.get("content-type", "html"):
+        print(f"couldn't fetch {url} : HTTP {response.status_code}")
+        return None
+    return response.text
+
+
+async def scrape_structured(url: str) -> Tuple[Optional[dict], str]:
+    "the ExtractedJob of the page from its structured data (see extract_job), without Firecrawl"
+    html = await fetch_page(url)
+    if not html:
+        return None, "none"
+    # parsing a big page takes a few ms, not on the event loop
+    try:
+        return await asyncio.to_thread(extract_job, html, url)
+    except Exception as e:
+        print(f"couldn't read the structured data of {url} : {e}")
+        return None, "none"
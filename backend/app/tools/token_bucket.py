@@ -0,0 +1,64 @@
+import asyncio
+import time
+from functools import lru_cache
+
+from config import FIRECRAWL_BURST, FIRECRAWL_RPM
+
+
+class AsyncTokenBucket:
+    """
+    An async token bucket rate limiter
+
+    - the bucket holds up to `burst` tokens and refills at `requests_per_minute`
+    - `await acquire()` takes one token, waiting (without blocking the event loop) until one is available
+    - waiters are served in order, so one busy run can't starve the others
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+
+        self.rate = requests_per_minute / 60  # tokens per second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        "wait for a token and take it"
+        self._waiting += 1
+        try:
+            # only one waiter at a time sleeps on the bucket, the others queue up on the lock
+            async with self._lock:
+                self._refill()
+                while self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self._waiting -= 1
+
+    def estimated_wait(self) -> float:
+        "how long an acquire() called now would wait (the callers already queued go first)"
+        tokens = min(self.capacity, self._tokens + (time.monotonic() - self._updated) * self.rate)
+        return max(0.0, (self._waiting + 1 - tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@lru_cache(maxsize=None)
+def get_firecrawl_limiter() -> AsyncTokenBucket:
+    """Initializes and returns the Firecrawl rate limiter shared by every run in the process."""
+    print(f"--- Initializing FireCrawl rate limiter ({FIRECRAWL_RPM} RPM) (This will run only once) ---")
+    return AsyncTokenBucket(requests_per_minute=FIRECRAWL_RPM, burst=FIRECRAWL_BURST)
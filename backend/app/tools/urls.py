@@ -0,0 +1,160 @@
+import re
+from typing import Iterable, List
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# query params that only track where the click came from, they never change the page itself
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "_ga",
+    "ref", "refid", "ref_src", "src", "source", "trk", "trkinfo", "tracking_id",
+    "from", "vjs", "tk", "lipi", "originalsubdomain",
+}
+
+
+MOBILE_PREFIXES = ("m.", "mobile.")
+
+# /en/, /ar/, /en-us/ ... at the start of the path, only dropped on the boards (see canonicalize_url)
+LOCALE_PATH_RE = re.compile(r"^/[a-z]{2}(?:[-_][a-z]{2})?(?=/)", re.IGNORECASE)
+# /en-us/, /pt_br/ ... can't be anything but a locale, that one is dropped on any site
+# (a plain /hr/ or /it/ on a company site may well be a department)
+REGION_LOCALE_PATH_RE = re.compile(r"^/[a-z]{2}[-_][a-z]{2}(?=/)", re.IGNORECASE)
+
+LINKEDIN_JOB_ID_RE = re.compile(r"/jobs/view/(?:[^/]*-)?(\d+)")
+WUZZUF_JOB_ID_RE = re.compile(r"/jobs/p/([A-Za-z0-9]+)")
+
+# domain -> platform name (the values SingleJobSearchResult.platform expects)
+PLATFORMS = {
+    "linkedin.com": "LinkedIn",
+    "indeed.com": "Indeed",
+    "wuzzuf.net": "Wuzzuf",
+    "remoteok.com": "RemoteOK",
+    "remoteok.io": "RemoteOK",
+    "glassdoor.com": "Glassdoor",
+}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith("utm_") or name in TRACKING_PARAMS
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so the same page always gives the same string
+
+    - lowercases the scheme and the host, drops `www.` and default ports
+    - drops the fragment and the tracking query params (utm_*, trk, refId, ...)
+    - sorts the remaining query params and strips the trailing slash
+
+    Example:
+    normalize_url("HTTPS://www.Indeed.com/viewjob/?utm_source=x&jk=013dfb26c48a8ecd#apply")
+    -> "https://indeed.com/viewjob?jk=013dfb26c48a8ecd"
+    """
+    url = (url or "").strip()
+    if not url:
+        return url
+
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "https").lower()
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    path = parts.path.rstrip("/")
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(key)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def _board_domain(host: str, domain: str) -> bool:
+    "host is the board itself or one of its country subdomains (eg.linkedin.com, ca.indeed.com, ...)"
+    return host == domain or host.endswith("." + domain)
+
+
+def url_domain(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def detect_platform(url: str) -> str:
+    domain = url_domain(url)
+    for platform_domain, platform in PLATFORMS.items():
+        # matches the country subdomains too (ca.indeed.com, eg.linkedin.com, ...)
+        if _board_domain(domain, platform_domain):
+            return platform
+    return "Other"
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    The canonical URL of a job posting, the same posting always gives the same string
+    even when it shows up with tracking params, a mobile/country subdomain or a locale path
+
+    Per board rules on top of normalize_url:
+    - LinkedIn: /jobs/view/<slug>-<id> or any page with ?currentJobId=<id> -> https://linkedin.com/jobs/view/<id>
+    - Indeed: any page with ?jk=<id> (viewjob, rc/clk, m/viewjob, ...) -> https://indeed.com/viewjob?jk=<id>
+    - Wuzzuf: /jobs/p/<id>-<title>-<company>-<city> -> https://wuzzuf.net/jobs/p/<id>
+    The other boards (PLATFORMS) get the mobile subdomain and the locale path (/en/, /ar/, ...) dropped,
+    any other site only a language-region locale path (/en-us/, ...), a 2 letter segment there can be a real path.
+
+    Only meant as a key (to dedupe / cache), the original URL is the one that gets scraped.
+    """
+    url = normalize_url(url)
+    if not url:
+        return url
+
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    for prefix in MOBILE_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    query = parse_qs(parts.query)
+    # normalize_url already dropped the default port, any other one is a different site
+    netloc = f"{host}:{parts.port}" if parts.port else host
+
+    if _board_domain(host, "linkedin.com"):
+        job_id = query.get("currentjobid", query.get("currentJobId", [None]))[0]
+        if not job_id:
+            match = LINKEDIN_JOB_ID_RE.search(parts.path)
+            job_id = match.group(1) if match else None
+        if job_id:
+            return f"https://linkedin.com/jobs/view/{job_id}"
+
+    if _board_domain(host, "indeed.com") or re.match(r"^([a-z]+\.)?indeed\.[a-z.]+$", host):
+        job_key = query.get("jk", query.get("vjk", [None]))[0]
+        if job_key:
+            return f"https://indeed.com/viewjob?jk={job_key}"
+
+    if _board_domain(host, "wuzzuf.net"):
+        match = WUZZUF_JOB_ID_RE.search(parts.path)
+        if match:
+            return f"https://wuzzuf.net/jobs/p/{match.group(1)}"
+
+    locale_re = LOCALE_PATH_RE if detect_platform(url) != "Other" else REGION_LOCALE_PATH_RE
+    path = locale_re.sub("", parts.path)
+    return urlunsplit((parts.scheme, netloc, path, parts.query, ""))
+
+
+def dedupe_urls(urls: Iterable[str]) -> List[str]:
+    "drop the URLs that point to a posting we already have (keeps the first one, in order)"
+    seen = set()
+    unique = []
+    for url in urls:
+        if not url:
+            continue
+        key = canonicalize_url(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(url)
+    return unique
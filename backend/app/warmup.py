@@ -0,0 +1,113 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.metrics import STARTUP_SECONDS
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _import_pipeline():
+    # crewai, langgraph, langchain & co, the bulk of a cold start
+    importlib.import_module("app.crew")
+
+
+def _build_clients():
+    from app.clients import get_fire_crawl_client, get_http_client, get_LangGraph_model, get_llm_main, get_llm_search, get_search_client
+
+    get_llm_main()
+    get_llm_search()
+    get_LangGraph_model()
+    get_search_client()
+    get_fire_crawl_client()
+    get_http_client()
+
+    # the tokenizer the scrutinizer prompts are measured with (tiktoken downloads it the first time)
+    from app.agents.scrutinizer_prompt import count_tokens
+    count_tokens("")
+
+
+def _open_stores():
+    from app.job_index import get_job_index
+    from app.results_store import get_results_writer
+    from app.tools.criteria_cache import get_criteria_cache
+    from app.tools.scrape_cache import get_scrape_cache
+    from app.tools.search_cache import get_search_cache
+
+    get_scrape_cache()
+    get_search_cache()
+    get_criteria_cache()
+    get_job_index()
+    get_results_writer()
+
+
+# run in this order, each one in a worker thread (they're all blocking)
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("imports", _import_pipeline),
+    ("clients", _build_clients),
+    ("stores", _open_stores),
+]
+
+
+class WarmUp:
+    """
+    Everything the first request would otherwise pay for, done once at startup
+
+    the heavy imports, the shared clients of app/clients.py and the caches / stores,
+    GET /ready reports `ready` once it's done (the API itself is up before that, see GET /health)
+    and the job workers `wait()` for it before they pick up a run
+    """
+
+    def __init__(self, steps=WARMUP_STEPS):
+        self.steps = steps
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.step_seconds: Dict[str, float] = {}
+        self.done = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    async def run(self):
+        try:
+            await self._run_steps()
+        finally:
+            # failed or not, nobody keeps waiting (a run then pays for whatever didn't warm up)
+            self.done.set()
+
+    async def _run_steps(self):
+        self.status = "warming"
+        started = time.perf_counter()
+        for name, step in self.steps:
+            step_started = time.perf_counter()
+            try:
+                await asyncio.to_thread(step)
+            except Exception as e:
+                logger.exception(f"Warm-up step '{name}' failed : {e}")
+                self.status = "failed"
+                self.error = f"{name}: {e}"
+                return
+            self.step_seconds[name] = round(time.perf_counter() - step_started, 3)
+
+        self.seconds = round(time.perf_counter() - started, 3)
+        STARTUP_SECONDS.labels(phase="warmup").set(self.seconds)
+        self.status = "ready"
+        logger.info(f"Warm-up done in {self.seconds}s {self.step_seconds}")
+
+    async def wait(self):
+        "returns once the warm-up is over (ready or failed)"
+        await self.done.wait()
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "warmup_seconds": self.seconds,
+            "steps": self.step_seconds,
+        }
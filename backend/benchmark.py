@@ -0,0 +1,170 @@
+"""
+End to end benchmark of the pipeline against the local stand-in providers
+
+Runs initialize_crew (analyst -> search -> scrutinizer -> report -> email) offline and reports
+the wall time of every stage, the throughput and the peak memory.
+
+Usage (from the backend directory):
+    python benchmark.py --runs 4 --concurrency 2 --latency-ms 300 --error-rate 0.05 --rate-limit-rpm 40
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Dawrly pipeline against the local stand-in providers")
+    parser.add_argument("--runs", type=int, default=3, help="how many pipeline runs in total")
+    parser.add_argument("--concurrency", type=int, default=1, help="how many runs at the same time")
+    parser.add_argument("--latency-ms", type=float, default=200, help="mean latency of every stand-in provider call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a stand-in provider call failing")
+    parser.add_argument("--rate-limit-rpm", type=int, default=0, help="stand-in provider RPM before they answer 429 (0 = no limit)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of the stand-in LLM answers wrapped in prose / code fences")
+    parser.add_argument("--no-json-mode", action="store_true", help="don't ask the LLM providers for JSON mode (LLM_JSON_MODE=false)")
+    parser.add_argument("--description-max-tokens", type=int, default=None, help="override SCRUTINIZER_DESCRIPTION_MAX_TOKENS (0 = descriptions as scraped)")
+    parser.add_argument("--structured-rate", type=float, default=None, help="share of the stand-in job pages with structured data (0 = every page goes to Firecrawl)")
+    parser.add_argument("--stop-after-matches", type=int, default=None, help="override SCRUTINIZER_STOP_AFTER_STRONG_MATCHES (0 = scrutinize every URL)")
+    parser.add_argument("--no-coalescing", action="store_true", help="every run executes its own pipeline even when an equivalent one is in flight")
+    parser.add_argument("--firecrawl-rpm", type=float, default=None, help="override FIRECRAWL_RPM (our own Firecrawl limiter)")
+    parser.add_argument("--job-title", default="Junior Python Developer")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # has to happen before anything imports config
+    os.environ["PROVIDER_MODE"] = "local"
+    os.environ["LANGSMITH_TRACING"] = "false"
+    os.environ["LOCAL_PROVIDER_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LOCAL_PROVIDER_ERROR_RATE"] = str(args.error_rate)
+    os.environ["LOCAL_PROVIDER_RATE_LIMIT_RPM"] = str(args.rate_limit_rpm)
+    os.environ["LOCAL_PROVIDER_MALFORMED_RATE"] = str(args.malformed_rate)
+    if args.no_json_mode:
+        os.environ["LLM_JSON_MODE"] = "false"
+    if args.description_max_tokens is not None:
+        os.environ["SCRUTINIZER_DESCRIPTION_MAX_TOKENS"] = str(args.description_max_tokens)
+    if args.structured_rate is not None:
+        os.environ["LOCAL_PROVIDER_STRUCTURED_RATE"] = str(args.structured_rate)
+    if args.stop_after_matches is not None:
+        os.environ["SCRUTINIZER_STOP_AFTER_STRONG_MATCHES"] = str(args.stop_after_matches)
+    if args.no_coalescing:
+        os.environ["RUN_COALESCING_ENABLED"] = "false"
+    if args.firecrawl_rpm is not None:
+        os.environ["FIRECRAWL_RPM"] = str(args.firecrawl_rpm)
+        os.environ["FIRECRAWL_BURST"] = str(max(1, int(args.firecrawl_rpm // 60)))
+
+
+class StageTimer:
+    "records when every stage of a run starts, a stage lasts until the next one starts"
+
+    def __init__(self):
+        self.marks = []
+
+    def __call__(self, stage: str):
+        self.marks.append((stage, time.perf_counter()))
+
+    def durations(self, finished_at: float) -> dict:
+        durations = {}
+        for (stage, start), (_, end) in zip(self.marks, self.marks[1:] + [(None, finished_at)]):
+            durations[stage] = durations.get(stage, 0.0) + end - start
+        return durations
+
+
+async def run_once(n: int, args, semaphore: asyncio.Semaphore):
+    from app.crew import initialize_crew
+
+    user_input = {
+        "Job_title": args.job_title,
+        "email_address": f"benchmark{n}@example.com",
+        "skills": ["Python", "FastAPI"],
+        "preferred_skills": ["Python", "FastAPI"],
+        "experience_level": "Junior",
+        "min_years_experience": 1,
+        "locations": ["Cairo"],
+        "remote_preference": ["any"],
+        "job_type": ["Full-Time"],
+    }
+
+    async with semaphore:
+        timer = StageTimer()
+        started = time.perf_counter()
+        result = await initialize_crew(user_input, on_stage=timer)
+        finished = time.perf_counter()
+
+    return {
+        "ok": result is not False,
+        "total": finished - started,
+        "stages": timer.durations(finished),
+    }
+
+
+async def main(args):
+    # import before the clock starts, the cold import isn't part of a run
+    import app.crew  # noqa: F401
+
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    runs = await asyncio.gather(*(run_once(n, args, semaphore) for n in range(args.runs)))
+    elapsed = time.perf_counter() - started
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the emails go out in the background, wait for them (not part of the runs wall time)
+    from app.tools.mail_dispatcher import get_mail_dispatcher
+    mail_dispatcher = get_mail_dispatcher()
+    await mail_dispatcher.stop()
+    from app.results_store import get_results_writer
+    await get_results_writer().drain()
+    from app.checkpoints import close_graph_checkpointer
+    await close_graph_checkpointer()
+
+    # ru_maxrss is in KB on linux (bytes on mac)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+    stages = defaultdict(list)
+    for run in runs:
+        for stage, duration in run["stages"].items():
+            stages[stage].append(duration)
+
+    print("\n" + "=" * 60)
+    print(f"runs: {args.runs}  concurrency: {args.concurrency}  latency: {args.latency_ms}ms  "
+          f"error rate: {args.error_rate}  rate limit: {args.rate_limit_rpm or 'none'} RPM")
+    print("=" * 60)
+    print(f"{'stage':<15}{'mean (s)':>10}{'p50 (s)':>10}{'max (s)':>10}")
+    for stage, durations in stages.items():
+        print(f"{stage:<15}{statistics.mean(durations):>10.2f}{statistics.median(durations):>10.2f}{max(durations):>10.2f}")
+    totals = [run["total"] for run in runs]
+    print(f"{'total':<15}{statistics.mean(totals):>10.2f}{statistics.median(totals):>10.2f}{max(totals):>10.2f}")
+    print("-" * 60)
+    print(f"succeeded:     {sum(run['ok'] for run in runs)}/{len(runs)}")
+    print(f"wall time:     {elapsed:.2f}s")
+    print(f"throughput:    {len(runs) / elapsed * 60:.2f} runs/min")
+    print(f"peak heap:     {peak_heap / (1024 * 1024):.1f} MB (tracemalloc)")
+    print(f"peak RSS:      {peak_rss_mb:.1f} MB")
+    print(f"emails:        {mail_dispatcher.stats()}")
+
+    from app.metrics import llm_response_counts, llm_token_stats, scrape_counts
+    responses = llm_response_counts()
+    total = sum(responses.values())
+    if total:
+        print(f"llm responses: {responses}  wasted: {responses['wasted'] / total:.1%} "
+              f"(without the JSON repair: {(responses['wasted'] + responses['repaired']) / total:.1%})")
+    print(f"llm prompts:   {llm_token_stats()}")
+    print(f"scrapes:       {scrape_counts()}")
+    from app.run_coalescer import get_run_coalescer
+    print(f"coalescing:    {get_run_coalescer().stats()}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_environment(args)
+    asyncio.run(main(args))
@@ -0,0 +1,67 @@
+"""
+Benchmark of the HTML report renderer (render time and output size)
+
+Usage (from the backend directory):
+    python benchmark_report.py --sizes 10 100 1000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the report renderer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="how many jobs per report")
+    parser.add_argument("--repeat", type=int, default=5, help="renders per size (the median is reported)")
+    return parser.parse_args()
+
+
+def fake_jobs(n: int) -> list:
+    rng = random.Random(n)
+    return [
+        {
+            "matches_user_req": True,
+            "job_title": f"Python Developer #{i}",
+            "job_description": "Build and maintain backend services with Python & FastAPI. " * rng.randint(1, 6),
+            "job_url": f"https://www.linkedin.com/jobs/view/python-developer-{3_000_000_000 + i}",
+            "agent_recommendation_rank": rng.randint(1, 5),
+            "agent_recommendation_notes": [f"note {j} about <skills> & experience" for j in range(rng.randint(1, 4))],
+        }
+        for i in range(n)
+    ]
+
+
+def main(args):
+    os.environ.setdefault("PROVIDER_MODE", "local")
+    from app.agents.report_generator_agent import IncrementalReport
+
+    print(f"{'jobs':>6}{'add (ms)':>11}{'write (ms)':>12}{'total (ms)':>12}{'html (KB)':>11}{'json (KB)':>11}{'html/json':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "final_result.html")
+        for size in args.sizes:
+            jobs = fake_jobs(size)
+            adds, writes = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                report = IncrementalReport()
+                for job in jobs:
+                    report.add(job)
+                added = time.perf_counter()
+                report.write(output)
+                adds.append(added - started)
+                writes.append(time.perf_counter() - added)
+
+            html_bytes = os.path.getsize(output)
+            json_bytes = len(json.dumps({"jobs": jobs}).encode())
+            add_ms, write_ms = statistics.median(adds) * 1000, statistics.median(writes) * 1000
+            print(f"{size:>6}{add_ms:>11.2f}{write_ms:>12.2f}{add_ms + write_ms:>12.2f}"
+                  f"{html_bytes / 1024:>11.1f}{json_bytes / 1024:>11.1f}{html_bytes / json_bytes:>11.2f}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,67 @@
+"""
+Benchmark of the API cold start (how long `import main` takes in a fresh interpreter)
+
+Every run is a new process so nothing is cached in sys.modules. Reports the median import time,
+the modules that took the longest (python -X importtime) and, with --max-seconds, exits with 1
+when the median goes over it so a regression (eg. a provider SDK imported at module level again) fails CI.
+
+Usage (from the backend directory):
+    python benchmark_startup.py --repeat 5 --top 15 --max-seconds 1.5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the API import time")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to time (the median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="how many of the slowest imports to list")
+    parser.add_argument("--max-seconds", type=float, default=None, help="fail when the median import time is over this")
+    parser.add_argument("--module", default="main", help="the module to import")
+    return parser.parse_args()
+
+
+def time_import(module: str, env: dict) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], env=env, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def slowest_imports(module: str, env: dict, top: int) -> list:
+    "(cumulative microseconds, module) of the slowest imports, from python -X importtime"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], env=env, check=True, capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main(args):
+    # the local stand-ins so no keys are needed, the imports are the same
+    env = {**os.environ, "PROVIDER_MODE": os.environ.get("PROVIDER_MODE", "local")}
+
+    # the baseline: a bare interpreter, so the numbers below are only what the import adds
+    interpreter = statistics.median(time_import("sys", env) for _ in range(args.repeat))
+    timings = [time_import(args.module, env) - interpreter for _ in range(args.repeat)]
+    median = statistics.median(timings)
+
+    print(f"import {args.module}: median {median:.3f}s  min {min(timings):.3f}s  max {max(timings):.3f}s  ({args.repeat} runs)")
+    print(f"\n{'cumulative (ms)':>16}  module")
+    for cumulative, name in slowest_imports(args.module, env, args.top):
+        print(f"{cumulative / 1000:>16.1f}  {name}")
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"\nFAIL: import {args.module} took {median:.3f}s, the budget is {args.max_seconds:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -1,10 +1,16 @@
 import os
 from dotenv import load_dotenv
+from pathlib import Path
 from typing import Dict
 
 def load_environment() -> Dict[str, str]:
     """Load and validate all required environment variables"""
     load_dotenv()  
+
+    # with the local stand-in providers none of the keys are needed (and nothing gets traced)
+    local_providers = os.getenv('PROVIDER_MODE', 'live').lower() == 'local'
+    if local_providers:
+        os.environ.setdefault('LANGSMITH_TRACING', 'false')
     
     required_vars = {
         'AGENTOPS_API_KEY': 'AgentOps API key',
@@ -24,6 +30,8 @@ def load_environment() -> Dict[str, str]:
     config = {}
     for var, description in required_vars.items():
         value = os.getenv(var)
+        if not value and local_providers:
+            value = 'local'
         if not value:
             raise ValueError(f"Missing required environment variable: {var} ({description})")
         config[var] = value
@@ -40,4 +48,129 @@ try:
     CONFIG = load_environment()
 except ValueError as e:
     print(f"Configuration error: {str(e)}")
-    raise
\ No newline at end of file
+    raise
+
+
+# Tunables (optional, these all have defaults so the .env doesn't have to set them)
+
+# "live" -> the real providers, "local" -> the stand-ins from app/local_providers.py (offline benchmarks / load tests)
+PROVIDER_MODE = os.getenv('PROVIDER_MODE', 'live').lower()
+LOCAL_PROVIDER_LATENCY_MS = float(os.getenv('LOCAL_PROVIDER_LATENCY_MS', '200'))
+LOCAL_PROVIDER_ERROR_RATE = float(os.getenv('LOCAL_PROVIDER_ERROR_RATE', '0'))
+LOCAL_PROVIDER_RATE_LIMIT_RPM = int(os.getenv('LOCAL_PROVIDER_RATE_LIMIT_RPM', '0'))
+# share of the stand-in LLM answers wrapped in prose / code fences (only when no JSON mode was asked for)
+LOCAL_PROVIDER_MALFORMED_RATE = float(os.getenv('LOCAL_PROVIDER_MALFORMED_RATE', '0'))
+# share of the stand-in job pages that carry structured data (JSON-LD / microdata), the others go to Firecrawl
+LOCAL_PROVIDER_STRUCTURED_RATE = float(os.getenv('LOCAL_PROVIDER_STRUCTURED_RATE', '0.75'))
+
+# how many URLs the job scrutinizer scrapes + analyzes at the same time
+# keep it low-ish, both Firecrawl and Nvidia NIM are rate limited anyway
+SCRUTINIZER_MAX_CONCURRENCY = int(os.getenv('SCRUTINIZER_MAX_CONCURRENCY', '5'))
+
+# where the local state lives (job queue db, caches, ...)
+DATA_DIR = Path(os.getenv('DAWRLY_DATA_DIR', Path(__file__).resolve().parent / 'data'))
+
+# the /jobs/search runs get queued in SQLite and drained by this many background workers
+JOB_QUEUE_DB_PATH = Path(os.getenv('JOB_QUEUE_DB_PATH', DATA_DIR / 'job_queue.db'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+
+# the Firecrawl scrapes are cached on disk (keyed by the normalized URL) so the same posting isn't paid for twice
+SCRAPE_CACHE_DIR = Path(os.getenv('SCRAPE_CACHE_DIR', DATA_DIR / 'scrape_cache'))
+SCRAPE_CACHE_TTL_HOURS = float(os.getenv('SCRAPE_CACHE_TTL_HOURS', '24'))
+SCRAPE_CACHE_SIZE_MB = int(os.getenv('SCRAPE_CACHE_SIZE_MB', '256'))
+
+# Firecrawl rate limit, shared by every run in the process (the free plan gives 10 scrapes per minute)
+FIRECRAWL_RPM = float(os.getenv('FIRECRAWL_RPM', '10'))
+FIRECRAWL_BURST = int(os.getenv('FIRECRAWL_BURST', '1'))
+
+# the Tavily results are cached in memory for a short while (a lot of users run the same queries)
+SEARCH_CACHE_TTL_MINUTES = float(os.getenv('SEARCH_CACHE_TTL_MINUTES', '30'))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '1024'))
+
+# "llm" -> the Gemini search agent runs the queries, "parallel" -> they run in parallel and get scored in code
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'llm').lower()
+SEARCH_MAX_CONCURRENCY = int(os.getenv('SEARCH_MAX_CONCURRENCY', '4'))
+
+# how many scraped jobs get scored per LLM call in the scrutinizer (1 = one job per call)
+# only SCRUTINIZER_MAX_CONCURRENCY jobs are in flight at once so a bigger batch never fills up
+# a batch gets sent once it's full or after ANALYSIS_BATCH_MAX_WAIT_SECONDS, whatever comes first
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', '1'))
+ANALYSIS_BATCH_MAX_WAIT_SECONDS = float(os.getenv('ANALYSIS_BATCH_MAX_WAIT_SECONDS', '2'))
+
+# the rule based prefilter that rejects the clear mismatches before the LLM analysis
+PREFILTER_ENABLED = os.getenv('PREFILTER_ENABLED', 'true').lower() == 'true'
+PREFILTER_MAX_POSTING_AGE_DAYS = int(os.getenv('PREFILTER_MAX_POSTING_AGE_DAYS', '90'))
+
+# the emails go out through a small pool of reused SMTP connections, in the background
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', 'true').lower() == 'true'
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '2'))
+MAIL_QUEUE_SIZE = int(os.getenv('MAIL_QUEUE_SIZE', '100'))
+MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES', '3'))
+MAIL_RETRY_BACKOFF_SECONDS = float(os.getenv('MAIL_RETRY_BACKOFF_SECONDS', '2'))
+
+# the /jobs/search limit per IP, "memory" keeps the counters per process, "sqlite" shares them between workers
+RATE_LIMIT_PER_DAY = int(os.getenv('RATE_LIMIT_PER_DAY', '3'))
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+RATE_LIMIT_DB_PATH = Path(os.getenv('RATE_LIMIT_DB_PATH', DATA_DIR / 'rate_limits.db'))
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+
+# where the outputs of every run get persisted (off the hot path, the stages hand them over in memory)
+# "file" -> RESULTS_DIR/<user_id>/*.json + final_result.html, "sqlite" -> RESULTS_DB_PATH
+RESULTS_STORE = os.getenv('RESULTS_STORE', 'file').lower()
+RESULTS_DIR = Path(os.getenv('RESULTS_DIR', Path(__file__).resolve().parent / 'results'))
+RESULTS_DB_PATH = Path(os.getenv('RESULTS_DB_PATH', DATA_DIR / 'results.db'))
+
+# crash resume: the scrutinizer graph checkpoints every URL here (LangGraph's SQLite checkpointer)
+# so a requeued run picks up where it died instead of paying for the scrapes / LLM calls again
+CHECKPOINTS_ENABLED = os.getenv('CHECKPOINTS_ENABLED', 'true').lower() == 'true'
+CHECKPOINT_DB_PATH = Path(os.getenv('CHECKPOINT_DB_PATH', DATA_DIR / 'checkpoints.db'))
+
+# every scraped posting goes into a full text index (SQLite FTS5) shared by every run, a new run
+# takes the fresh matching postings from it first (no Firecrawl for them) and only searches the web for the gap
+JOB_INDEX_ENABLED = os.getenv('JOB_INDEX_ENABLED', 'true').lower() == 'true'
+JOB_INDEX_DB_PATH = Path(os.getenv('JOB_INDEX_DB_PATH', DATA_DIR / 'job_index.db'))
+JOB_INDEX_MAX_AGE_HOURS = float(os.getenv('JOB_INDEX_MAX_AGE_HOURS', '72'))
+JOB_INDEX_MAX_RESULTS = int(os.getenv('JOB_INDEX_MAX_RESULTS', '20'))
+# with at least this many indexed matches the web search (Tavily) gets skipped altogether
+JOB_INDEX_MIN_RESULTS = int(os.getenv('JOB_INDEX_MIN_RESULTS', '10'))
+
+# the analyst output (step 1 criteria) is cached on disk under a normalized key of the request,
+# so the same request (same title / skills / locations / ... in any order or case) skips the analyst LLM, 0 = off
+CRITERIA_CACHE_DIR = Path(os.getenv('CRITERIA_CACHE_DIR', DATA_DIR / 'criteria_cache'))
+CRITERIA_CACHE_TTL_HOURS = float(os.getenv('CRITERIA_CACHE_TTL_HOURS', '24'))
+
+# the scrutinizer's LLM calls get spread over these providers by the router (app/llm_router.py),
+# each one capped at its own RPM (the free tier limits), so the total is about the sum of them
+# (Gemini also serves the search agent, hence the lower cap)
+LLM_ROUTER_PROVIDERS = [name.strip().lower() for name in os.getenv('LLM_ROUTER_PROVIDERS', 'nvidia,cerebras,groq,gemini').split(',') if name.strip()]
+NVIDIA_RPM = float(os.getenv('NVIDIA_RPM', '40'))
+CEREBRAS_RPM = float(os.getenv('CEREBRAS_RPM', '30'))
+GROQ_RPM = float(os.getenv('GROQ_RPM', '30'))
+GEMINI_RPM = float(os.getenv('GEMINI_RPM', '10'))
+
+# ask the scrutinizer's LLM providers for JSON through their own JSON output mode
+# (NVIDIA: guided decoding against the schema, the others: the OpenAI style json_object mode)
+LLM_JSON_MODE = os.getenv('LLM_JSON_MODE', 'true').lower() == 'true'
+
+# every job_description goes in the scrutinizer prompts condensed to this many tokens (0 = as scraped)
+SCRUTINIZER_DESCRIPTION_MAX_TOKENS = int(os.getenv('SCRUTINIZER_DESCRIPTION_MAX_TOKENS', '600'))
+
+# the scraper first GETs the page itself and reads the posting out of its structured data
+# (schema.org JobPosting JSON-LD / microdata, the board's markup, OpenGraph), Firecrawl only gets the pages without it
+# a description shorter than STRUCTURED_DATA_MIN_DESCRIPTION_CHARS isn't enough to judge the job -> Firecrawl
+STRUCTURED_DATA_ENABLED = os.getenv('STRUCTURED_DATA_ENABLED', 'true').lower() == 'true'
+STRUCTURED_DATA_TIMEOUT_SECONDS = float(os.getenv('STRUCTURED_DATA_TIMEOUT_SECONDS', '10'))
+STRUCTURED_DATA_MIN_DESCRIPTION_CHARS = int(os.getenv('STRUCTURED_DATA_MIN_DESCRIPTION_CHARS', '200'))
+
+# the scrutinizer goes through the URLs best search score first and stops scraping once it has
+# SCRUTINIZER_STOP_AFTER_STRONG_MATCHES jobs ranked SCRUTINIZER_STRONG_MATCH_RANK+ or after
+# SCRUTINIZER_STOP_AFTER_MISSES URLs in a row without a match (0 = that condition is off)
+SCRUTINIZER_STOP_AFTER_STRONG_MATCHES = int(os.getenv('SCRUTINIZER_STOP_AFTER_STRONG_MATCHES', '15'))
+SCRUTINIZER_STRONG_MATCH_RANK = int(os.getenv('SCRUTINIZER_STRONG_MATCH_RANK', '4'))
+SCRUTINIZER_STOP_AFTER_MISSES = int(os.getenv('SCRUTINIZER_STOP_AFTER_MISSES', '20'))
+
+# concurrent runs of equivalent requests (same normalized profile, see criteria_cache_key) share one
+# analyst -> search -> scrutinizer execution, every user still gets their own report and email
+RUN_COALESCING_ENABLED = os.getenv('RUN_COALESCING_ENABLED', 'true').lower() == 'true'
@@ -1,21 +1,72 @@
-from fastapi import Depends, FastAPI, HTTPException, status 
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Response, status 
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Union
+import asyncio
+import importlib
 import logging
 
-from app.crew import initialize_crew
+from app.job_queue import JobQueue, JobWorkerPool
+from app.metrics import STARTUP_SECONDS, render_metrics
+from app.results_store import get_results_writer
+from app.tools.mail_dispatcher import get_mail_dispatcher
+from app.warmup import WarmUp
+from config import JOB_QUEUE_DB_PATH, JOB_WORKERS
 from utils import rate_limiter
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# the pipeline (crewai, langgraph, the provider SDKs) isn't imported here, the warm-up does it
+# in the background once the API is up, keep it that way or the cold start gets slow again
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 3)
+STARTUP_SECONDS.labels(phase="import").set(IMPORT_SECONDS)
+logger.info(f"API imported in {IMPORT_SECONDS}s")
+
+
+async def run_queued_search(run_id : str, payload : dict, report_stage, resumed : bool):
+    "what the background workers run for every queued /jobs/search request"
+    # already imported by the warm-up normally, if not (it failed) the import doesn't block the event loop
+    crew = await asyncio.to_thread(importlib.import_module, "app.crew")
+    return await crew.initialize_crew(payload, run_id=run_id, on_stage=report_stage, resumed=resumed)
+
+
+warmup = WarmUp()
+job_queue = JobQueue(JOB_QUEUE_DB_PATH)
+# the workers only start claiming runs once the warm-up is over
+job_workers = JobWorkerPool(job_queue, run_queued_search, size=JOB_WORKERS, ready=warmup.wait)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await get_mail_dispatcher().start()
+    # the API answers right away, GET /ready says when the clients are built
+    warmup_task = asyncio.create_task(warmup.run())
+    await job_workers.start()
+    yield
+    warmup_task.cancel()
+    await job_workers.stop()
+    await get_results_writer().drain()
+    from app.checkpoints import close_graph_checkpointer
+    await close_graph_checkpointer()
+    from app.clients import get_http_client
+    # only when something built it, no need to create one just to close it
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+    # let the queued emails go out before shutting down
+    await get_mail_dispatcher().stop()
+
 
 app = FastAPI(
     title="Job Search API",
     description="API for finding job searches",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -83,9 +134,20 @@ class UserJobSearchRequest(BaseModel):
     
 
 class JobSearchResponse(BaseModel):
-    """Response model for successful job search"""
+    """Response model for an accepted (queued) job search"""
     success: bool
     status_code : int
+    run_id : str
+    status : str
+
+class JobStatusResponse(BaseModel):
+    """Response model for the status of a queued job search"""
+    run_id : str
+    status : str = Field(..., description="queued/running/completed/failed")
+    stage : str = Field(..., description="The pipeline stage the run is currently in")
+    error : Optional[str] = None
+    created_at : str
+    updated_at : str
 
 class ErrorResponse(BaseModel):
     """Error response model"""
@@ -113,14 +175,44 @@ async def health_check():
     """Health check endpoint to verify API status"""
     return {"status": "healthy", "service": "Job Search API is working"}
 
+
+# Readiness endpoint
+@app.get(
+    "/ready",
+    summary="Readiness Check",
+    description="Check if the startup warm-up (imports, provider clients, caches) is done",
+    responses={
+        200: {"description": "Ready to run job searches"},
+        503: {"description": "Still warming up (or the warm-up failed)"},
+    },
+)
+async def readiness_check(response: Response):
+    """Readiness endpoint, 503 until the warm-up is done"""
+    if not warmup.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {**warmup.report(), "import_seconds": IMPORT_SECONDS}
+
+
+# Prometheus scrape endpoint
+@app.get(
+    "/metrics",
+    summary="Prometheus Metrics",
+    description="Stage, graph node and provider latencies, skipped URLs, cache lookups and 429s in the Prometheus text format",
+    include_in_schema=False,
+)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Job search endpoint
 @app.post(
     "/jobs/search",
     summary="Search for Jobs",
-    description="Search for jobs based on user criteria",
+    description="Queue a job search based on user criteria, the results get sent by email",
     response_model=JobSearchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     responses={
-        200: {"description": "Job search completed successfully"},
+        202: {"description": "Job search queued successfully"},
         400: {"description": "Invalid request data"},
         422: {"description": "Validation error"},
         500: {"description": "Internal server error"}
@@ -128,39 +220,32 @@ async def health_check():
 )
 async def search_jobs(user_data: UserJobSearchRequest):
     """
-    Search for jobs based on user criteria
+    Queue a job search based on user criteria
     
     Args:
         user_data: User job search parameters including skills, experience, etc.
         
     Returns:
-        JobSearchResponse: Results of the job search operation
+        JobSearchResponse: the id of the queued run (poll GET /jobs/{run_id} for its progress)
         
     Raises:
-        HTTPException: If job search fails or invalid data provided
+        HTTPException: If the run couldn't be queued or invalid data provided
     """
     try:
-        logger.info(f"Processing job search request for user with skills: {user_data.skills}")
+        logger.info(f"Queueing job search request for user with skills: {user_data.skills}")
         
         # Convert Pydantic model to dict for crew initialization
         user_dict = user_data.model_dump()
         
-        # Initialize crew with user data
-        crew_result = await initialize_crew(user_dict)
+        run_id = await asyncio.to_thread(job_queue.enqueue, user_dict)
+        job_workers.notify()
         
-        if crew_result is False:
-            logger.error("Crew initialization and execution failed")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to process job search request. Please try again later."
-            )
-        
-        logger.info("Job search completed successfully")
+        logger.info(f"Job search queued as run {run_id}")
         return JobSearchResponse(
             success=True,
-            message="Job search completed successfully",
-            search_id=f"search_{hash(str(user_dict))}" ,
-            status_code=200
+            status_code=status.HTTP_202_ACCEPTED,
+            run_id=run_id,
+            status="queued",
         )
         
     except ValueError as e:
@@ -170,8 +255,29 @@ async def search_jobs(user_data: UserJobSearchRequest):
             detail=f"Invalid request data: {str(e)}"
         )
     except Exception as e:
-        logger.error(f"Unexpected error during job search: {str(e)}")
+        logger.error(f"Unexpected error while queueing the job search: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred. Please try again later."
-        )
\ No newline at end of file
+        )
+
+
+# Job search status endpoint
+@app.get(
+    "/jobs/{run_id}",
+    summary="Job Search Status",
+    description="Get the status and current stage of a queued job search",
+    response_model=JobStatusResponse,
+    responses={
+        404: {"description": "Run not found"},
+    },
+)
+async def get_job_status(run_id: str):
+    """Report the status and the current pipeline stage of a queued run"""
+    run = await asyncio.to_thread(job_queue.get, run_id)
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No job search found with id {run_id}"
+        )
+    return JobStatusResponse(**run)
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+
+# the tests import the backend the way main.py does (app.*, config), with the offline stand-ins so no keys are needed
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("PROVIDER_MODE", "local")
+# the tests are written against the default minimum description
+os.environ["STRUCTURED_DATA_MIN_DESCRIPTION_CHARS"] = "200"
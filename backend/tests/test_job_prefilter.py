@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.agents.job_prefilter import JobPrefilter, location_tokens, parse_posting_age_days, parse_required_years
+from app.models import ExtractedJob
+
+
+NOW = datetime(2025, 10, 20, 12, 0)
+
+
+def make_job(**fields) -> ExtractedJob:
+    job = {
+        "job_title": "Python Developer",
+        "job_description": "We build APIs with FastAPI.",
+        "job_url": "https://example.com/jobs/1",
+        "posting_date": "",
+        "required_years_of_experience": "Not specified",
+    }
+    job.update(fields)
+    return ExtractedJob(**job)
+
+
+def ambiguous_date(days_ago: int) -> str:
+    "a dd/mm/yyyy date about `days_ago` back that also reads as a valid (different) mm/dd/yyyy one"
+    day = date.today() - timedelta(days=days_ago)
+    day = day.replace(day=5 if day.month != 5 else 6)
+    return day.strftime("%d/%m/%Y")
+
+
+@pytest.mark.parametrize("posting_date, dayfirst, expected", [
+    ("", None, None),
+    ("just now", None, 0),
+    ("Posted today", None, 0),
+    ("yesterday", None, 1),
+    ("3 days ago", None, 3),
+    ("30+ days ago", None, 30),
+    ("an hour ago", None, 0),
+    ("2 weeks ago", None, 14),
+    ("2025-10-01", None, 19),
+    ("2025-10-01T14:17:58.000Z", None, 18),
+    ("Aug 1, 2025", None, 80),
+    ("Posted on 12 Sep 2025", None, 38),
+    # numeric dates: day first on the boards that write them that way, ambiguous ones are unknown otherwise
+    ("01/10/2025", True, 19),
+    ("01/10/2025", None, None),
+    ("10.09.2025", None, 40),
+    ("13/09/2025", None, 37),
+    ("09/13/2025", None, 37),
+    ("05/05/2025", None, 168),
+    # not dates at all
+    ("Over 100 applicants", None, None),
+    ("Reposted, 200 applicants", None, None),
+    # in the future / years back -> we parsed it wrong
+    ("2025-12-25", None, None),
+    ("1990-01-01", None, None),
+])
+def test_parse_posting_age_days(posting_date, dayfirst, expected):
+    assert parse_posting_age_days(posting_date, now=NOW, dayfirst=dayfirst) == expected
+
+
+@pytest.mark.parametrize("required_years, expected", [
+    ("3+ years", 3),
+    ("2-4 years", 2),
+    ("1.5 years", 1.5),
+    ("two years", 2),
+    ("Not specified", None),
+    ("", None),
+])
+def test_parse_required_years(required_years, expected):
+    assert parse_required_years(required_years) == expected
+
+
+def test_location_tokens():
+    assert location_tokens("Cairo, Egypt") == {"cairo", "egypt"}
+    assert location_tokens("NYC") == {"new", "york"}
+    assert location_tokens("Greater London Area") == {"london"}
+
+
+@pytest.mark.parametrize("user_location, posting_location, rejected", [
+    ("Cairo, Egypt", "Cairo", False),
+    ("NYC", "New York", False),
+    ("USA", "Austin, TX, United States", False),
+    ("Remote - EU", "Berlin, Germany", False),
+    ("Cairo", "EMEA", False),
+    ("Cairo", "Berlin, Germany", True),
+])
+def test_location(user_location, posting_location, rejected):
+    prefilter = JobPrefilter({"locations": [user_location]})
+    reason = prefilter.check(make_job(job_description=f"Great team.\nLocation: {posting_location}\n"))
+    assert (reason is not None) == rejected
+
+
+def test_location_needs_an_explicit_location_line():
+    prefilter = JobPrefilter({"locations": ["Cairo"]})
+    assert prefilter.check(make_job(job_description="Our office is in Berlin, Germany.")) is None
+
+
+def test_remote_posting_passes_the_location_for_remote_users():
+    prefilter = JobPrefilter({"locations": ["Cairo"], "remote_preference": ["remote"]})
+    assert prefilter.check(make_job(job_description="Location: Berlin, Germany (Remote)")) is None
+
+
+def test_too_old():
+    prefilter = JobPrefilter({}, max_posting_age_days=30)
+    assert prefilter.check(make_job(posting_date="45 days ago")) == "posted 45 days ago (max 30)"
+    assert prefilter.check(make_job(posting_date="3 days ago")) is None
+    assert prefilter.check(make_job(posting_date="Over 100 applicants")) is None
+
+
+def test_ambiguous_numeric_date_is_only_read_day_first_on_wuzzuf():
+    prefilter = JobPrefilter({}, max_posting_age_days=90)
+    posting_date = ambiguous_date(200)
+    assert prefilter.check(make_job(posting_date=posting_date)) is None
+    assert prefilter.check(make_job(posting_date=posting_date, job_url="https://wuzzuf.net/jobs/p/abc")) is not None
+
+
+@pytest.mark.parametrize("level, required_years, rejected", [
+    ("Junior", "5+ years", True),
+    ("Junior", "3+ years", False),
+    ("Fresh", "3 years", True),
+    ("Fresh", "2 years", False),
+    ("Senior", "10+ years", False),
+    ("Junior", "Not specified", False),
+])
+def test_experience(level, required_years, rejected):
+    prefilter = JobPrefilter({"experience_level": level})
+    assert (prefilter.check(make_job(required_years_of_experience=required_years)) is not None) == rejected
+
+
+def test_experience_cap_follows_the_users_years():
+    prefilter = JobPrefilter({"experience_level": "Junior", "min_years_experience": 3})
+    assert prefilter.check(make_job(required_years_of_experience="5 years")) is None
+
+
+def test_remote_only_user():
+    prefilter = JobPrefilter({"remote_preference": ["remote"]})
+    assert prefilter.check(make_job(job_description="This role is onsite in our Cairo office.")) is not None
+    assert prefilter.check(make_job(job_description="Hybrid: onsite twice a week.")) is None
+    assert JobPrefilter({"remote_preference": ["any"]}).check(make_job(job_description="Onsite only.")) is None
+
+
+def test_job_type():
+    prefilter = JobPrefilter({"job_type": ["Full Time"]})
+    assert prefilter.check(make_job(job_title="Python Intern")) is not None
+    assert prefilter.check(make_job(job_title="Part-time Python Developer")) is not None
+    assert JobPrefilter({"job_type": ["Internship"]}).check(make_job(job_title="Python Intern")) is None
+
+
+def test_stats():
+    prefilter = JobPrefilter({"experience_level": "Junior"}, max_posting_age_days=30)
+    prefilter.check(make_job(posting_date="45 days ago"))
+    prefilter.check(make_job(required_years_of_experience="8 years"))
+    prefilter.check(make_job())
+    assert prefilter.stats() == {
+        "checked": 3,
+        "llm_calls_saved": 2,
+        "rejected_by_rule": {"too_old": 1, "experience": 1},
+    }
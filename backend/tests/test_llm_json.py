@@ -0,0 +1,47 @@
+import pytest
+
+from app.agents.llm_json import parse_json_response
+
+
+JOB = {"matches_user_req": True, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4}
+
+
+@pytest.mark.parametrize("text", [
+    '{"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4}',
+    '  {"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4}\n',
+])
+def test_plain_json_needs_no_repair(text):
+    assert parse_json_response(text) == (JOB, False)
+
+
+@pytest.mark.parametrize("text", [
+    # code fences
+    '```json\n{"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4}\n```',
+    '```\n{"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4}\n```',
+    # prose around the object
+    'Here is the analysis:\n{"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4}\nHope it helps!',
+    'Sure! ```json {"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4} ``` Let me know.',
+    # broken JSON
+    '{"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4,}',
+    "{'matches_user_req': true, 'job_url': 'https://example.com/jobs/1', 'agent_recommendation_rank': 4}",
+    '{"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4',
+])
+def test_salvaged_json_is_marked_repaired(text):
+    assert parse_json_response(text) == (JOB, True)
+
+
+def test_braces_in_the_prose_before_the_json():
+    text = 'Criteria {see below}: {"matches_user_req": true, "job_url": "https://example.com/jobs/1", "agent_recommendation_rank": 4}'
+    assert parse_json_response(text) == (JOB, True)
+
+
+def test_batch_response():
+    parsed, repaired = parse_json_response('```json\n{"jobs": [{"job_url": "a"}, {"job_url": "b"}]}\n```')
+    assert parsed == {"jobs": [{"job_url": "a"}, {"job_url": "b"}]}
+    assert repaired
+
+
+@pytest.mark.parametrize("text", ["", "   ", "none", "I can't analyze this job.", "```json\n```"])
+def test_nothing_to_salvage(text):
+    with pytest.raises(ValueError):
+        parse_json_response(text)
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+import utils
+from utils import GCRARateLimiter, InMemoryRateLimitBackend, SQLiteRateLimitBackend
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # starts at the real time so the in-memory backend's own expiry (real time) behaves the same
+    clock = FakeClock(utils.time.time())
+    monkeypatch.setattr(utils, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteRateLimitBackend(tmp_path / "rate_limits.db")
+    return InMemoryRateLimitBackend(max_keys=100)
+
+
+def test_a_fresh_key_gets_the_whole_limit_at_once(clock, backend):
+    limiter = GCRARateLimiter(limit=3, window_seconds=300, backend=backend)
+    assert [limiter.hit("1.2.3.4").allowed for _ in range(3)] == [True, True, True]
+
+    result = limiter.hit("1.2.3.4")
+    assert not result.allowed
+    # the next one frees up window / limit after the first
+    assert result.retry_after == pytest.approx(100)
+
+
+def test_one_more_request_per_emission_interval(clock, backend):
+    limiter = GCRARateLimiter(limit=3, window_seconds=300, backend=backend)
+    for _ in range(3):
+        limiter.hit("1.2.3.4")
+
+    clock.now += 99
+    assert not limiter.hit("1.2.3.4").allowed
+    clock.now += 1
+    assert limiter.hit("1.2.3.4").allowed
+    assert not limiter.hit("1.2.3.4").allowed
+
+
+def test_a_rejected_request_doesnt_push_the_limit_further(clock, backend):
+    limiter = GCRARateLimiter(limit=2, window_seconds=100, backend=backend)
+    limiter.hit("1.2.3.4")
+    limiter.hit("1.2.3.4")
+    for _ in range(5):
+        assert not limiter.hit("1.2.3.4").allowed
+    clock.now += 50
+    assert limiter.hit("1.2.3.4").allowed
+
+
+def test_the_full_limit_comes_back_after_a_window(clock, backend):
+    limiter = GCRARateLimiter(limit=3, window_seconds=300, backend=backend)
+    for _ in range(3):
+        limiter.hit("1.2.3.4")
+    clock.now += 300
+    assert [limiter.hit("1.2.3.4").allowed for _ in range(4)] == [True, True, True, False]
+
+
+def test_keys_are_limited_separately(clock, backend):
+    limiter = GCRARateLimiter(limit=1, window_seconds=60, backend=backend)
+    assert limiter.hit("1.2.3.4").allowed
+    assert not limiter.hit("1.2.3.4").allowed
+    assert limiter.hit("5.6.7.8").allowed
+
+
+def test_in_memory_backend_is_bounded():
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    limiter = GCRARateLimiter(limit=3, window_seconds=3600, backend=backend)
+    for n in range(50):
+        limiter.hit(f"10.0.0.{n}")
+    assert len(backend) == 10
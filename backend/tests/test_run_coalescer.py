@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from app.run_coalescer import RunCoalescer
+
+
+class Execution:
+    "a fake pipeline execution that reports a stage and waits until the test releases it"
+
+    def __init__(self, result="jobs", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, shared):
+        self.calls += 1
+        shared.report_stage("analyzing")
+        await self.release.wait()
+        shared.report_stage("scrutinizing")
+        if self.error is not None:
+            raise self.error
+        return f"{self.result} #{self.calls}"
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_equivalent_runs_share_one_execution():
+    async def run():
+        coalescer = RunCoalescer()
+        execute = Execution()
+        stages = {"a": [], "b": [], "c": []}
+        runs = [
+            asyncio.create_task(coalescer.run("python-cairo", execute, stages[name].append))
+            for name in ("a", "b", "c")
+        ]
+        await settle()
+        assert coalescer.stats() == {"executions": 1, "coalesced": 2, "in_flight": 1}
+        execute.release.set()
+        results = await asyncio.gather(*runs)
+
+        assert execute.calls == 1
+        assert results == [("jobs #1", True), ("jobs #1", False), ("jobs #1", False)]
+        # every attached run saw the shared stages
+        assert stages == {name: ["analyzing", "scrutinizing"] for name in stages}
+        assert coalescer.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_different_keys_dont_coalesce():
+    async def run():
+        coalescer = RunCoalescer()
+        execute = Execution()
+        execute.release.set()
+        results = await asyncio.gather(
+            coalescer.run("python-cairo", execute, lambda stage: None),
+            coalescer.run("java-berlin", execute, lambda stage: None),
+        )
+        assert sorted(leader for _, leader in results) == [True, True]
+        assert execute.calls == 2
+
+    asyncio.run(run())
+
+
+def test_runs_after_the_execution_ended_execute_again():
+    async def run():
+        coalescer = RunCoalescer()
+        execute = Execution()
+        execute.release.set()
+        assert await coalescer.run("python-cairo", execute, lambda stage: None) == ("jobs #1", True)
+        assert await coalescer.run("python-cairo", execute, lambda stage: None) == ("jobs #2", True)
+
+    asyncio.run(run())
+
+
+def test_the_error_is_shared():
+    async def run():
+        coalescer = RunCoalescer()
+        execute = Execution(error=RuntimeError("search failed"))
+        runs = [asyncio.create_task(coalescer.run("python-cairo", execute, lambda stage: None)) for _ in range(2)]
+        await settle()
+        execute.release.set()
+        results = await asyncio.gather(*runs, return_exceptions=True)
+        assert [str(result) for result in results] == ["search failed", "search failed"]
+        assert execute.calls == 1
+
+    asyncio.run(run())
+
+
+def test_a_late_joiner_catches_up_with_the_stage():
+    async def run():
+        coalescer = RunCoalescer()
+        execute = Execution()
+        leader = asyncio.create_task(coalescer.run("python-cairo", execute, lambda stage: None))
+        await settle()
+        late = []
+        follower = asyncio.create_task(coalescer.run("python-cairo", execute, late.append))
+        await settle()
+        assert late == ["analyzing"]
+        execute.release.set()
+        await asyncio.gather(leader, follower)
+        assert late == ["analyzing", "scrutinizing"]
+
+    asyncio.run(run())
+
+
+def test_a_cancelled_leader_hands_over_to_a_follower():
+    async def run():
+        coalescer = RunCoalescer()
+        execute = Execution()
+        leader = asyncio.create_task(coalescer.run("python-cairo", execute, lambda stage: None))
+        await settle()
+        follower = asyncio.create_task(coalescer.run("python-cairo", execute, lambda stage: None))
+        await settle()
+
+        leader.cancel()
+        await settle()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # the follower started over as the new leader
+        execute.release.set()
+        assert await follower == ("jobs #2", True)
+        assert execute.calls == 2
+
+    asyncio.run(run())
+
+
+def test_a_cancelled_follower_stops_following():
+    async def run():
+        coalescer = RunCoalescer()
+        execute = Execution()
+        leader = asyncio.create_task(coalescer.run("python-cairo", execute, lambda stage: None))
+        await settle()
+        gone = []
+        follower = asyncio.create_task(coalescer.run("python-cairo", execute, gone.append))
+        await settle()
+        assert gone == ["analyzing"]
+
+        follower.cancel()
+        await settle()
+        execute.release.set()
+        # the execution goes on for the leader, the cancelled run doesn't get its stages anymore
+        assert await leader == ("jobs #1", True)
+        assert gone == ["analyzing"]
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+
+    asyncio.run(run())
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+
+from app.tools.structured_data import extract_job
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+# fixture -> (page url, where the job should come from, the fields extract_job should give)
+EXPECTED = {
+    "linkedin.html": (
+        "https://www.linkedin.com/jobs/view/junior-python-developer-4000000001",
+        "json_ld",
+        {
+            "job_title": "Junior Python Developer",
+            "posting_date": "2026-10-01T14:17:58.000Z",
+            "required_years_of_experience": "1+ years",
+        },
+    ),
+    "indeed.html": (
+        "https://www.indeed.com/viewjob?jk=abc",
+        "html",
+        {
+            "job_title": "Data Engineer",
+            "posting_date": "",
+            "required_years_of_experience": "3+ years",
+        },
+    ),
+    "glassdoor.html": (
+        "https://www.glassdoor.com/job-listing/x",
+        "json_ld",
+        {
+            "job_title": "ML Engineer",
+            "posting_date": "2026-09-20",
+            "required_years_of_experience": "3+ years",
+        },
+    ),
+    "microdata.html": (
+        "https://example.com/jobs/1",
+        "microdata",
+        {
+            "job_title": "Frontend Developer",
+            "posting_date": "2026-10-10",
+            "required_years_of_experience": "2+ years",
+        },
+    ),
+}
+
+DESCRIPTION_STARTS = {
+    "linkedin.html": "We are looking for a Junior Python Developer to join our backend team.",
+    "indeed.html": "Foo Inc is hiring a Data Engineer.",
+    "glassdoor.html": "Bar builds recommendation systems at scale.",
+    "microdata.html": "Baz is looking for a Frontend Developer with React and TypeScript.",
+}
+
+
+@pytest.mark.parametrize("fixture", sorted(EXPECTED))
+def test_extract_job(fixture):
+    url, expected_source, expected_fields = EXPECTED[fixture]
+    job, source = extract_job(load(fixture), url)
+
+    assert source == expected_source
+    assert job is not None
+    assert job["job_url"] == url
+    for field, value in expected_fields.items():
+        assert job[field] == value, field
+    # plain text, the HTML (escaped or not) of the page is gone
+    assert job["job_description"].startswith(DESCRIPTION_STARTS[fixture])
+    assert "<" not in job["job_description"] and "&lt;" not in job["job_description"]
+    assert set(job) == {"job_title", "job_description", "job_url", "posting_date", "required_years_of_experience"}
+
+
+def test_glassdoor_graph_skips_the_other_items():
+    # the BreadcrumbList / Organization around the posting aren't mistaken for it
+    job, _ = extract_job(load("glassdoor.html"), "https://www.glassdoor.com/job-listing/x")
+    assert "Berlin" in job["job_description"]
+
+
+@pytest.mark.parametrize("fixture", ["login_wall.html", "broken.html"])
+def test_no_job_on_the_page(fixture):
+    # only an OpenGraph snippet / JSON-LD that doesn't parse -> left to Firecrawl
+    assert extract_job(load(fixture), "https://www.linkedin.com/jobs/view/4000000002") == (None, "none")
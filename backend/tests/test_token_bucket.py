@@ -0,0 +1,92 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.tools import token_bucket
+from app.tools.token_bucket import AsyncTokenBucket
+
+
+class FakeClock:
+    "time.monotonic / asyncio.sleep for the bucket, sleeping just moves the clock forward"
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.slept.append(round(seconds, 6))
+        self.now += seconds
+        # still let the other tasks run, like a real sleep would
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(token_bucket, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(token_bucket, "asyncio", SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+
+def test_rejects_a_non_positive_rate():
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(requests_per_minute=0)
+
+
+def test_burst_goes_through_then_one_token_per_interval(clock):
+    async def run():
+        bucket = AsyncTokenBucket(requests_per_minute=60, burst=3)
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    # 3 right away, then 1s (60 RPM) for each of the other two
+    assert clock.slept == [1.0, 1.0]
+    assert clock.now == 1002.0
+
+
+def test_refill_is_capped_at_the_burst(clock):
+    async def run():
+        bucket = AsyncTokenBucket(requests_per_minute=60, burst=2)
+        await bucket.acquire()
+        await bucket.acquire()
+        # idle for long enough to refill way more than 2 tokens
+        clock.now += 600
+        for _ in range(3):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    assert clock.slept == [1.0]
+
+
+def test_waiters_are_served_in_order(clock):
+    served = []
+
+    async def run():
+        bucket = AsyncTokenBucket(requests_per_minute=60, burst=1)
+
+        async def worker(n: int):
+            await bucket.acquire()
+            served.append((n, clock.now))
+
+        await asyncio.gather(*(worker(n) for n in range(4)))
+
+    asyncio.run(run())
+    assert served == [(0, 1000.0), (1, 1001.0), (2, 1002.0), (3, 1003.0)]
+
+
+def test_estimated_wait(clock):
+    async def run():
+        bucket = AsyncTokenBucket(requests_per_minute=30, burst=1)
+        assert bucket.estimated_wait() == 0
+        await bucket.acquire()
+        # empty bucket, a token every 2s
+        assert bucket.estimated_wait() == pytest.approx(2.0)
+        clock.now += 0.5
+        assert bucket.estimated_wait() == pytest.approx(1.5)
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+import pytest
+
+from app.tools.urls import canonicalize_url, dedupe_urls, detect_platform, normalize_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://www.Indeed.com/viewjob/?utm_source=x&jk=013dfb26c48a8ecd#apply", "https://indeed.com/viewjob?jk=013dfb26c48a8ecd"),
+    ("https://example.com/jobs/?b=2&a=1&fbclid=x", "https://example.com/jobs?a=1&b=2"),
+    ("http://example.com:80/a", "http://example.com/a"),
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+    ("", ""),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+@pytest.mark.parametrize("url, expected", [
+    # LinkedIn: slug, country subdomain, currentJobId
+    ("https://eg.linkedin.com/jobs/view/python-developer-at-acme-4000000001?trk=x", "https://linkedin.com/jobs/view/4000000001"),
+    ("https://www.linkedin.com/jobs/search/?currentJobId=4000000001&keywords=python", "https://linkedin.com/jobs/view/4000000001"),
+    # Indeed: any page carrying the job key
+    ("https://ca.indeed.com/rc/clk?jk=abc123&from=serp", "https://indeed.com/viewjob?jk=abc123"),
+    ("https://m.indeed.com/m/viewjob?jk=abc123", "https://indeed.com/viewjob?jk=abc123"),
+    ("https://uk.indeed.co.uk/viewjob?vjk=abc123", "https://indeed.com/viewjob?jk=abc123"),
+    # Wuzzuf: the id before the slug
+    ("https://wuzzuf.net/jobs/p/AbC123-python-developer-acme-cairo-egypt", "https://wuzzuf.net/jobs/p/AbC123"),
+    # the other boards lose the mobile subdomain and the locale
+    ("https://www.glassdoor.com/en/job-listing/x", "https://glassdoor.com/job-listing/x"),
+    ("https://m.remoteok.com/ar/remote-jobs/1", "https://remoteok.com/remote-jobs/1"),
+    # other sites: only a language-region locale, a 2 letter segment can be a real path
+    ("https://careers.acme.com/en-us/5/apply", "https://careers.acme.com/5/apply"),
+    ("https://jobs.example.com/hr/123/", "https://jobs.example.com/hr/123"),
+    ("https://careers.acme.com/id/5/apply", "https://careers.acme.com/id/5/apply"),
+    # a non default port is a different site
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+    ("https://m.example.com:8443/a", "https://example.com:8443/a"),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_distinct_postings_keep_distinct_keys():
+    keys = {
+        canonicalize_url(url) for url in (
+            "https://jobs.example.com/hr/123/",
+            "https://jobs.example.com/it/123/",
+            "https://careers.acme.com/id/5/apply",
+            "https://careers.acme.com/us/5/apply",
+            "https://example.com/a",
+            "https://example.com:8443/a",
+        )
+    }
+    assert len(keys) == 6
+
+
+@pytest.mark.parametrize("url, platform", [
+    ("https://eg.linkedin.com/jobs/view/1", "LinkedIn"),
+    ("https://ca.indeed.com/viewjob?jk=1", "Indeed"),
+    ("https://wuzzuf.net/jobs/p/1", "Wuzzuf"),
+    ("https://remoteok.io/remote-jobs/1", "RemoteOK"),
+    ("https://www.glassdoor.com/job-listing/x", "Glassdoor"),
+    ("https://notlinkedin.com/jobs/view/1", "Other"),
+])
+def test_detect_platform(url, platform):
+    assert detect_platform(url) == platform
+
+
+def test_dedupe_urls_keeps_the_first_of_each_posting_in_order():
+    urls = [
+        "https://www.linkedin.com/jobs/view/python-dev-4000000001",
+        "https://wuzzuf.net/jobs/p/AbC123-python",
+        "https://eg.linkedin.com/jobs/view/4000000001?trk=x",
+        "",
+        "https://wuzzuf.net/jobs/p/AbC123-python-developer",
+        "https://example.com/jobs/1",
+    ]
+    assert dedupe_urls(urls) == [
+        "https://www.linkedin.com/jobs/view/python-dev-4000000001",
+        "https://wuzzuf.net/jobs/p/AbC123-python",
+        "https://example.com/jobs/1",
+    ]
@@ -1,7 +1,15 @@
-from collections import defaultdict
-from datetime import datetime, timedelta
-from fastapi import HTTPException, Request 
-from typing import List, Dict
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from cachetools import TLRUCache
+from fastapi import HTTPException, Request
+
+from config import RATE_LIMIT_BACKEND, RATE_LIMIT_DB_PATH, RATE_LIMIT_MAX_KEYS, RATE_LIMIT_PER_DAY
 
 
 def get_client_ip(request: Request):
@@ -13,36 +21,170 @@ def get_client_ip(request: Request):
 
 
 # yeah the time window is 1 day so 3 RPD (I'm broke as hell broski  FireCrawl credits is going to be out soon)
-RATE_LIMIT_PER_DAY = 3
-TIME_WINDOW = timedelta(days=1)
+TIME_WINDOW_SECONDS = 24 * 60 * 60
+
+
+# Takes the stored TAT of a key (None if there's none) and returns the new one (None = leave it as is)
+TatUpdate = Callable[[Optional[float]], Optional[float]]
+
+
+class RateLimitBackend(ABC):
+    """
+    Where the limiter keeps one number per key (its "theoretical arrival time")
+
+    `update` has to run the read -> compute -> write atomically, and a key can be
+    forgotten once its TAT is in the past (it's the same as a key we never saw)
+    """
+
+    @abstractmethod
+    def update(self, key: str, now: float, compute: TatUpdate) -> Optional[float]:
+        "atomically apply compute to the stored TAT of key, returns the stored TAT it saw"
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per process backend, every key expires on its own once its TAT passes and
+    the least recently used keys get evicted past `max_keys` so memory stays bounded
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._store = TLRUCache(maxsize=max_keys, ttu=lambda key, tat, now: tat, timer=time.time)
+        self._lock = threading.Lock()
+
+    def update(self, key: str, now: float, compute: TatUpdate) -> Optional[float]:
+        with self._lock:
+            tat = self._store.get(key)
+            new_tat = compute(tat)
+            if new_tat is not None:
+                self._store[key] = new_tat
+            return tat
+
+    def __len__(self):
+        with self._lock:
+            self._store.expire()
+            return len(self._store)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Shared backend, every uvicorn worker (or any process on the same disk) sees the same counters
+
+    one row per key, the expired rows get purged every `purge_every` updates
+    """
 
+    def __init__(self, db_path, purge_every: int = 500):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.purge_every = purge_every
+        self._updates = 0
+        self._init_db()
 
-ip_request_store: Dict[str, List[datetime]] = defaultdict(list)
+    @contextmanager
+    def _connect(self):
+        # autocommit connection, one per call so it's safe from any thread
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limits_tat ON rate_limits (tat)")
+
+    def update(self, key: str, now: float, compute: TatUpdate) -> Optional[float]:
+        self._updates += 1
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock up front so two workers can't both read the old TAT
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._updates % self.purge_every == 0:
+                    conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                tat = row[0] if row and row[0] > now else None
+                new_tat = compute(tat)
+                if new_tat is not None:
+                    conn.execute(
+                        "INSERT INTO rate_limits (key, tat) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                        (key, new_tat),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return tat
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM rate_limits WHERE tat > ?", (time.time(),)).fetchone()[0]
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    retry_after: float  # seconds until the next request would be allowed (0 if this one was)
+
+
+class GCRARateLimiter:
+    """
+    `limit` requests per `window_seconds` per key with GCRA (generic cell rate algorithm)
+
+    Same thing as a rolling window but it only stores one float per key instead of every
+    timestamp: each request pushes the key's TAT forward by window / limit and a request is
+    let through as long as the TAT doesn't end up more than one window in the future.
+    So a fresh key gets `limit` requests right away, then one more every window / limit.
+    """
+
+    def __init__(self, limit: int, window_seconds: float, backend: RateLimitBackend):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.emission_interval = window_seconds / limit
+        self.backend = backend
+
+    def hit(self, key: str) -> RateLimitResult:
+        now = time.time()
+        result = {}
+
+        def compute(tat: Optional[float]) -> Optional[float]:
+            new_tat = max(tat or now, now) + self.emission_interval
+            if new_tat - now > self.window_seconds:
+                result["retry_after"] = new_tat - now - self.window_seconds
+                return None
+            return new_tat
+
+        self.backend.update(key, now, compute)
+        if "retry_after" in result:
+            return RateLimitResult(False, result["retry_after"])
+        return RateLimitResult(True, 0.0)
+
+
+def build_rate_limit_backend() -> RateLimitBackend:
+    if RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimitBackend(RATE_LIMIT_DB_PATH)
+    return InMemoryRateLimitBackend(max_keys=RATE_LIMIT_MAX_KEYS)
+
+
+ip_rate_limiter = GCRARateLimiter(RATE_LIMIT_PER_DAY, TIME_WINDOW_SECONDS, build_rate_limit_backend())
 
 # The Rate limiter
 def rate_limiter(request: Request):
     """
     This dependency function checks and enforces the rate limit.
     """
-    
-    # Ik anyone can get easily over it with a proxy but come on man who does this with a side project 
+
+    # Ik anyone can get easily over it with a proxy but come on man who does this with a side project
     client_ip = get_client_ip(request)
-    
-    current_time = datetime.now()
-    request_timestamps = ip_request_store[client_ip]
-    
-    relevant_timestamps = [timestamp for timestamp in request_timestamps if current_time - timestamp < TIME_WINDOW]
-    
+
+    result = ip_rate_limiter.hit(client_ip)
+
     # If the number of requests in the time window is already at the limit,
     # raise an HTTP exception.
-    if len(relevant_timestamps) >= RATE_LIMIT_PER_DAY:
+    if not result.allowed:
         raise HTTPException(
-            status_code=429, 
-            detail=f"Too many requests. Rate limit is {RATE_LIMIT_PER_DAY} requests per day."
+            status_code=429,
+            detail=f"Too many requests. Rate limit is {RATE_LIMIT_PER_DAY} requests per day.",
+            headers={"Retry-After": str(int(result.retry_after) + 1)},
         )
-    
-    # The request is allowed. Record the new request timestamp.
-    relevant_timestamps.append(current_time)
-    ip_request_store[client_ip] = relevant_timestamps
-    
-    return True
\ No newline at end of file
+
+    return True